@@ -1,10 +1,13 @@
 import streamlit as st
-import pdfplumber
 import pandas as pd
 import re
 import io
 import os
 
+from pypdf import PdfReader
+
+from pdf_layout import extract_table_rows
+
 st.set_page_config(
     page_title="拣货单增强工具-完整版",
     layout="wide",
@@ -230,7 +233,8 @@ if uploaded_file is not None and df_info is not None and df_name is not None:
 
         st.write("🟡 路标 ⑳：准备打开 PDF")
 
-        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        with io.BytesIO(pdf_bytes) as pdf_stream:
+            pdf = PdfReader(pdf_stream)
 
             st.write(
                 f"🟢 路标 ㉑：PDF 打开成功，"
@@ -275,7 +279,7 @@ if uploaded_file is not None and df_info is not None and df_name is not None:
                     f"{page_number} 页表格"
                 )
 
-                table = page.extract_table()
+                table = extract_table_rows(page)
 
                 st.write(
                     f"🟢 路标 ㉖：第 {page_number} 页"
@@ -1,23 +1,66 @@
-import io
 import os
-import re
-from typing import Any
 
 import pandas as pd
 import streamlit as st
-from pypdf import PdfReader
+
+from page_cache import PageCache
+from pick_list_jobs import (
+    JOB_CANCELLED,
+    JOB_DONE,
+    JOB_EMPTY,
+    JOB_FAILED,
+    JOB_QUEUED,
+    JobRunner,
+    PickListJob,
+)
+from reference_data import (
+    ReferenceIndex,
+    load_reference_index,
+    workbook_fingerprint,
+)
+from result_cache import ParsedResult, ResultCache, result_cache_key
+from result_export import (
+    EXPORT_FORMATS,
+    build_export,
+    export_file_name,
+)
+from result_view import (
+    DEFAULT_PAGE_SIZE,
+    PAGE_SIZE_OPTIONS,
+    ResultQuery,
+    clamp_page,
+    page_count,
+    page_rows,
+    select_rows,
+)
+from validation_rules import (
+    DEFAULT_RULE_NAMES,
+    OPTIONAL_RULE_NAMES,
+    PASSED,
+    SEVERITY_NOTICE,
+    SEVERITY_REVIEW,
+    ValidationRule,
+    needs_review,
+    resolve_rules,
+)
 
 
 APP_TITLE = "拣货单校验工具｜稳定文本解析版"
-RESULT_COLUMNS = [
-    "发货仓库",
-    "店铺名称",
-    "SKC ID",
-    "回收标签类别",
-    "货品编码",
-    "商品名称",
-    "发货数量",
-]
+INFO_PATH = "product_info.xlsx"
+NAME_PATH = "name_map.xlsx"
+
+# 后台任务运行期间页面刷新进度的间隔（秒）。
+JOB_POLL_INTERVAL = 0.5
+# 默认先行解析并展示的页数，便于在大批量处理完成前先核对前几个 SKC 区块。
+DEFAULT_PREVIEW_PAGES = 5
+# 会话状态里记录当前后台任务 ID 的键。
+JOB_STATE_KEY = "pick_list_job_id"
+# 会话状态里记录已请求生成的下载文件（结果缓存键, 格式）的键。
+EXPORT_STATE_KEY = "pick_list_export_request"
+# 结果浏览里当前页码控件的键，筛选后总页数变少时据此把页码收回范围内。
+RESULT_PAGE_KEY = "result_view_page"
+# 解析过程中实时结果表只显示最近提取的这么多行。
+LIVE_TABLE_ROWS = 200
 
 
 st.set_page_config(
@@ -28,476 +71,477 @@ st.set_page_config(
 
 st.title(f"📋 {APP_TITLE}")
 st.caption(
-    "使用纯文本解析 PDF，不调用表格识别；保留 SKU ID 优先匹配、"
+    "先按纯文本解析 PDF，文本解析失败的页再用表格引擎重试；保留 SKU ID 优先匹配、"
     "SKU 货号降级匹配、名称校验和 Excel 导出。"
 )
 
 
-def normalize_key(value: Any) -> str:
-    """统一 Excel / PDF 中的编号格式，避免 12345.0、空格、换行导致匹配失败。"""
-    if value is None:
-        return ""
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_reference_index(
+    info_fingerprint: str,
+    name_fingerprint: str,
+) -> ReferenceIndex:
+    """
+    按两张基础表的内容指纹缓存查找表。
+
+    同一进程内所有会话和 rerun 共用同一个只读对象，
+    基础表内容变化后指纹随之变化，会自动重新构建。
+    """
+    return load_reference_index(INFO_PATH, NAME_PATH)
 
-    try:
-        if pd.isna(value):
-            return ""
-    except (TypeError, ValueError):
-        pass
-
-    text = str(value).strip().replace("\n", "").replace("\r", "")
-    if text.lower() in {"nan", "none"}:
-        return ""
-
-    if re.fullmatch(r"\d+\.0", text):
-        text = text[:-2]
-
-    return text
-
-
-def find_column(
-    dataframe: pd.DataFrame,
-    candidates: list[str],
-    required: bool = True,
-) -> str | None:
-    """按候选关键词寻找列名，优先完全匹配，其次包含匹配。"""
-    columns = [str(col).strip() for col in dataframe.columns]
-
-    for candidate in candidates:
-        for original, normalized in zip(dataframe.columns, columns):
-            if normalized == candidate:
-                return original
-
-    for candidate in candidates:
-        for original, normalized in zip(dataframe.columns, columns):
-            if candidate in normalized:
-                return original
-
-    if required:
-        raise ValueError(
-            f"找不到需要的列：{' / '.join(candidates)}。"
-            f"当前文件列名：{', '.join(columns)}"
-        )
 
-    return None
+@st.cache_resource(show_spinner=False)
+def get_result_cache() -> ResultCache[ParsedResult]:
+    """进程内所有会话共用的拣货单结果缓存，按 PDF 内容和基础表指纹命中。"""
+    return ResultCache()
+
+
+@st.cache_resource(show_spinner=False)
+def get_export_cache() -> ResultCache[bytes]:
+    """进程内共用的下载文件缓存，按结果缓存键和格式命中，同一结果每种格式只生成一次。"""
+    return ResultCache()
+
 
+@st.cache_resource(show_spinner=False)
+def get_page_cache() -> PageCache:
+    """按页内容指纹缓存单页解析结果，重新出具的拣货单只解析变化的页。"""
+    return PageCache()
 
-@st.cache_data(show_spinner=False)
-def load_excel_file(path: str) -> pd.DataFrame:
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"仓库中缺少 {path}")
 
-    return pd.read_excel(path, dtype=object)
+@st.cache_resource(show_spinner=False)
+def get_job_runner() -> JobRunner:
+    """进程内所有会话共用的后台任务执行器，同一份拣货单只会同时处理一次。"""
+    return JobRunner()
 
 
-def build_reference_data(
-    df_info: pd.DataFrame,
-    df_name: pd.DataFrame,
-) -> tuple[dict[str, dict[str, str]], dict[str, dict[str, str]], dict[str, str], dict[str, str]]:
-    """生成 SKU ID、SKU 货号及商品名称映射，并返回识别到的列名。"""
-    sku_id_col = find_column(df_info, ["SKU ID", "SKUID"])
-    sku_code_col = find_column(
-        df_info,
-        ["SKU货号", "SKU 货号", "货品编码", "货号"],
-        required=False,
+@st.fragment
+def show_result_table(
+    result_df: pd.DataFrame,
+    validation_df: pd.DataFrame,
+) -> None:
+    """
+    分页浏览提取结果或校验报告。
+
+    筛选、排序和翻页都在服务端对已缓存的结果表完成，只把当前页的行发给浏览器；
+    这些操作只重新运行本片段，不会重新解析或重算看板。
+    """
+    filter_warehouse, filter_shop, filter_status = st.columns(3)
+    warehouses = filter_warehouse.multiselect(
+        "发货仓库",
+        sorted(result_df["发货仓库"].unique()),
     )
-    shop_col = find_column(df_info, ["店铺名称", "店铺"])
-    label_col = find_column(
-        df_info,
-        ["回收标签类别", "回收标签", "标签类别"],
+    shops = filter_shop.multiselect(
+        "店铺名称",
+        sorted(result_df["店铺名称"].unique()),
     )
-
-    info_by_sku_id: dict[str, dict[str, str]] = {}
-    info_by_sku_code: dict[str, dict[str, str]] = {}
-
-    for _, row in df_info.iterrows():
-        shop_name = normalize_key(row.get(shop_col))
-        recycle_label = normalize_key(row.get(label_col))
-
-        sku_id = normalize_key(row.get(sku_id_col))
-        if sku_id and sku_id not in info_by_sku_id:
-            info_by_sku_id[sku_id] = {
-                "店铺名称": shop_name or "-",
-                "回收标签类别": recycle_label or "-",
-            }
-
-        if sku_code_col is not None:
-            sku_code = normalize_key(row.get(sku_code_col))
-            if sku_code and sku_code not in info_by_sku_code:
-                info_by_sku_code[sku_code] = {
-                    "店铺名称": shop_name or "-",
-                    "回收标签类别": recycle_label or "-",
-                }
-
-    name_key_col = find_column(
-        df_name,
-        ["货品编码", "SKU货号", "SKU 货号", "编码", "货号", "SKU"],
+    severities = filter_status.multiselect(
+        "校验状态",
+        [PASSED, SEVERITY_NOTICE, SEVERITY_REVIEW],
     )
-    product_name_col = find_column(
-        df_name,
-        ["商品名称", "产品名称", "名称", "品名"],
+
+    table_column, sort_column, order_column, size_column = st.columns([2, 2, 1, 1])
+    table_name = table_column.radio(
+        "显示",
+        ["提取结果", "校验报告"],
+        horizontal=True,
     )
+    frame = result_df if table_name == "提取结果" else validation_df
 
-    name_by_sku_code: dict[str, str] = {}
-
-    for _, row in df_name.iterrows():
-        sku_code = normalize_key(row.get(name_key_col))
-        product_name = normalize_key(row.get(product_name_col))
-
-        if sku_code and sku_code not in name_by_sku_code:
-            name_by_sku_code[sku_code] = product_name or "-"
-
-    detected_columns = {
-        "基础信息 SKU ID 列": str(sku_id_col),
-        "基础信息 SKU 货号列": str(sku_code_col or "未找到"),
-        "基础信息 店铺列": str(shop_col),
-        "基础信息 标签列": str(label_col),
-        "名称表 货号列": str(name_key_col),
-        "名称表 商品名称列": str(product_name_col),
-    }
-
-    return (
-        info_by_sku_id,
-        info_by_sku_code,
-        name_by_sku_code,
-        detected_columns,
+    sort_by = sort_column.selectbox(
+        "排序",
+        [None, *frame.columns],
+        format_func=lambda column: "原顺序" if column is None else column,
+    )
+    descending = order_column.checkbox("倒序")
+    page_size = size_column.selectbox(
+        "每页行数",
+        PAGE_SIZE_OPTIONS,
+        index=PAGE_SIZE_OPTIONS.index(DEFAULT_PAGE_SIZE),
     )
 
+    positions = select_rows(
+        result_df,
+        validation_df,
+        ResultQuery(
+            warehouses=tuple(warehouses),
+            shops=tuple(shops),
+            severities=tuple(severities),
+            sort_column=sort_by,
+            descending=descending,
+        ),
+        sort_frame=frame,
+    )
+    pages = page_count(len(positions), page_size)
+    st.session_state[RESULT_PAGE_KEY] = clamp_page(
+        st.session_state.get(RESULT_PAGE_KEY, 1),
+        len(positions),
+        page_size,
+    )
 
-def extract_warehouse(text: str) -> str:
-    match = re.search(
-        r"收货仓[:：]\s*(.+?)(?:\s+拣货单|\s+打印时间|\s+第\d+页/共\d+页|$)",
-        text,
+    st.dataframe(
+        page_rows(frame, positions, st.session_state[RESULT_PAGE_KEY], page_size),
+        use_container_width=True,
     )
-    return match.group(1).strip() if match else "未知"
 
+    page_column, summary_column = st.columns([1, 3])
+    page = page_column.number_input(
+        "页码",
+        min_value=1,
+        max_value=pages,
+        step=1,
+        key=RESULT_PAGE_KEY,
+    )
+    summary_column.caption(
+        f"筛选后 {len(positions)} 行（共 {len(frame)} 行），"
+        f"第 {page}/{pages} 页，每页 {page_size} 行。"
+    )
 
-def parse_pdf_text(pdf_bytes: bytes) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
-    """
-    从 PDF 文本层提取明细。
 
-    兼容属性集被 PDF 拆成多行的情况，例如：
-    Fishing Rod
-    Stand's Holder 69172597734 Y060525004 15
-    """
-    records: list[dict[str, Any]] = []
-    issues: list[dict[str, Any]] = []
-
-    reader = PdfReader(io.BytesIO(pdf_bytes))
-
-    # 行尾固定为：SKU ID + SKU货号 + 实际发货数。
-    # 属性集允许为空，因为它可能被拆到前一行或前几行。
-    detail_pattern = re.compile(
-        r"^(?P<attribute>.*?)\s*"
-        r"(?P<sku_id>\d{8,})\s+"
-        r"(?P<sku_code>[A-Za-z0-9_-]{5,})\s+"
-        r"(?P<qty>\d+)\s*$"
+def show_results(
+    result_df: pd.DataFrame,
+    validation_df: pd.DataFrame,
+    parse_issues_df: pd.DataFrame,
+) -> None:
+    """绘制体检看板、提取结果、校验报告和解析异常；完整结果和先行预览共用。"""
+    total_rows = len(result_df)
+    shop_count = (
+        result_df.loc[
+            result_df["店铺名称"] != "-",
+            "店铺名称",
+        ].nunique()
+    )
+    missing_names = int((result_df["商品名称"] == "-").sum())
+    missing_info = int(
+        (
+            (result_df["店铺名称"] == "-")
+            | (result_df["回收标签类别"] == "-")
+        ).sum()
+    )
+    validation_problem_count = int(needs_review(validation_df).sum())
+    notice_count = (
+        int((validation_df["校验结果"] != PASSED).sum()) - validation_problem_count
+        if not validation_df.empty
+        else 0
     )
 
-    skip_patterns = [
-        r"^序号\s+商品信息",
-        r"^SKC货号[:：]?$",
-        r"^备货母单号[:：]",
-        r"^备货单号[:：]",
-        r"^数量[:：]",
-        r"^创建时间[:：]",
-        r"^要求发货时间[:：]",
-        r"^【VMI】$",
-        r"^\[VMI\]$",
-        r"^合计(?:\s+\d+)?$",
-        r"^收货仓[:：]",
-        r"^拣货单$",
-        r"^打印时间[:：]",
-        r"^第\d+页/共\d+页$",
-        r"^\d+$",
-        r"^\d{1,2}:\d{2}$",
-    ]
+    st.subheader("🔍 自动体检看板")
 
-    def should_skip(line: str) -> bool:
-        return any(re.search(pattern, line) for pattern in skip_patterns)
-
-    for page_number, page in enumerate(reader.pages, start=1):
-        text = page.extract_text() or ""
-        warehouse = extract_warehouse(text)
-        active_skc = ""
-        attribute_buffer: list[str] = []
-        parsed_on_page = 0
-
-        lines = [
-            line.strip()
-            for line in text.splitlines()
-            if line and line.strip()
-        ]
-
-        for line_number, line in enumerate(lines, start=1):
-            skc_match = re.search(r"SKC[:：]\s*(\d+)", line)
-            if skc_match:
-                active_skc = skc_match.group(1)
-                attribute_buffer = []
-                continue
-
-            detail_match = detail_pattern.match(line)
-
-            if detail_match and active_skc:
-                inline_attribute = detail_match.group("attribute").strip()
-                attribute_parts = [
-                    part
-                    for part in attribute_buffer + [inline_attribute]
-                    if part
-                ]
-                attribute = " ".join(attribute_parts).strip()
-                attribute_buffer = []
-
-                sku_id = normalize_key(detail_match.group("sku_id"))
-                sku_code = normalize_key(detail_match.group("sku_code"))
-                qty_text = normalize_key(detail_match.group("qty"))
-
-                if not sku_id or not sku_code or not qty_text.isdigit():
-                    issues.append(
-                        {
-                            "页码": page_number,
-                            "行号": line_number,
-                            "问题类型": "明细字段不完整",
-                            "原始内容": line,
-                        }
-                    )
-                    continue
-
-                records.append(
-                    {
-                        "页码": page_number,
-                        "发货仓库": warehouse,
-                        "SKC ID": active_skc,
-                        "SKU ID": sku_id,
-                        "货品编码": sku_code,
-                        "发货数量": int(qty_text),
-                        "属性集": attribute,
-                        "原始内容": " ".join(attribute_parts + [sku_id, sku_code, qty_text]),
-                    }
-                )
-                parsed_on_page += 1
-                continue
-
-            # 只有进入某个 SKC 后，才缓存可能被拆行的属性集文本。
-            if active_skc and not should_skip(line):
-                attribute_buffer.append(line)
-
-        if warehouse == "未知":
-            issues.append(
-                {
-                    "页码": page_number,
-                    "行号": "-",
-                    "问题类型": "未识别到发货仓库",
-                    "原始内容": "",
-                }
-            )
+    col1, col2, col3, col4, col5 = st.columns(5)
 
-        if parsed_on_page == 0:
-            issues.append(
-                {
-                    "页码": page_number,
-                    "行号": "-",
-                    "问题类型": "本页未提取到明细",
-                    "原始内容": "",
-                }
-            )
+    with col1:
+        st.metric("处理总行数", total_rows)
+    with col2:
+        st.metric("涉及店铺数", shop_count)
+    with col3:
+        st.metric("名称未匹配", missing_names)
+    with col4:
+        st.metric("基础信息未匹配", missing_info)
+    with col5:
+        st.metric("需人工复核", validation_problem_count)
 
-    return records, issues
-
-def enrich_and_validate(
-    raw_records: list[dict[str, Any]],
-    info_by_sku_id: dict[str, dict[str, str]],
-    info_by_sku_code: dict[str, dict[str, str]],
-    name_by_sku_code: dict[str, str],
-) -> tuple[pd.DataFrame, pd.DataFrame]:
-    result_rows: list[dict[str, Any]] = []
-    validation_rows: list[dict[str, Any]] = []
-
-    for row_number, record in enumerate(raw_records, start=1):
-        sku_id = normalize_key(record["SKU ID"])
-        sku_code = normalize_key(record["货品编码"])
-
-        matched_info = info_by_sku_id.get(sku_id)
-        match_method = "SKU ID"
-
-        if matched_info is None:
-            matched_info = info_by_sku_code.get(sku_code)
-            match_method = "SKU 货号降级匹配"
-
-        if matched_info is None:
-            matched_info = {
-                "店铺名称": "-",
-                "回收标签类别": "-",
-            }
-            match_method = "未匹配"
-
-        product_name = name_by_sku_code.get(sku_code, "-")
-
-        result_rows.append(
-            {
-                "发货仓库": record["发货仓库"],
-                "店铺名称": matched_info["店铺名称"],
-                "SKC ID": record["SKC ID"],
-                "回收标签类别": matched_info["回收标签类别"],
-                "货品编码": sku_code,
-                "商品名称": product_name,
-                "发货数量": record["发货数量"],
-            }
-        )
+    if notice_count > 0:
+        st.info(f"另有 {notice_count} 行只有提示级问题，见校验报告的“问题级别”列。")
 
-        problems: list[str] = []
-
-        if record["发货仓库"] == "未知":
-            problems.append("发货仓库未识别")
-        if record["SKC ID"] in {"", "-"}:
-            problems.append("SKC ID 缺失")
-        if matched_info["店铺名称"] == "-":
-            problems.append("店铺名称未匹配")
-        if matched_info["回收标签类别"] == "-":
-            problems.append("回收标签类别未匹配")
-        if product_name == "-":
-            problems.append("商品名称未匹配")
-
-        validation_rows.append(
-            {
-                "结果行号": row_number,
-                "页码": record["页码"],
-                "SKU ID": sku_id,
-                "货品编码": sku_code,
-                "匹配方式": match_method,
-                "校验结果": "通过" if not problems else "；".join(problems),
-                "原始内容": record["原始内容"],
-            }
+    if validation_problem_count > 0 or not parse_issues_df.empty:
+        st.warning(
+            "存在未匹配或解析异常，请先查看校验报告再下载使用。"
         )
+    else:
+        st.success("所有提取行均通过当前校验。")
+
+    st.subheader("📄 提取结果及校验报告")
+    show_result_table(result_df, validation_df)
 
-    result_df = pd.DataFrame(result_rows, columns=RESULT_COLUMNS)
-    validation_df = pd.DataFrame(validation_rows)
+    if not parse_issues_df.empty:
+        with st.expander("查看解析异常"):
+            st.dataframe(
+                parse_issues_df,
+                use_container_width=True,
+            )
 
-    return result_df, validation_df
 
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def show_job_progress(job_id: str) -> None:
+    """绘制后台任务的进度条和实时结果表；任务结束后整页重新运行以显示结果。"""
+    job = get_job_runner().get(job_id)
+    if job is None or job.finished:
+        st.rerun()
 
-def build_excel(
-    result_df: pd.DataFrame,
-    validation_df: pd.DataFrame,
-    parse_issues_df: pd.DataFrame,
-) -> bytes:
-    output = io.BytesIO()
+    progress = job.progress()
 
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        result_df.to_excel(
-            writer,
-            index=False,
-            sheet_name="提取结果",
+    if progress.status == JOB_QUEUED:
+        st.progress(0.0, text="排队等待中，前面的拣货单处理完后自动开始……")
+        return
+
+    if progress.page_count == 0:
+        progress_text = "正在读取 PDF……"
+    else:
+        progress_text = (
+            f"已解析 {progress.page_number}/{progress.page_count} 页，"
+            f"提取 {progress.row_count} 行"
         )
-        validation_df.to_excel(
-            writer,
-            index=False,
-            sheet_name="校验报告",
+        if progress.document_count > 1:
+            progress_text = (
+                f"第 {progress.document_index + 1}/{progress.document_count} 个文件"
+                f"（{progress.source_name}）{progress_text}"
+            )
+
+    st.progress(min(progress.fraction, 1.0), text=progress_text)
+    st.caption("处理在后台进行，操作页面或刷新都不会中断，完成后自动显示结果。")
+
+    if progress.preview is not None:
+        st.info(
+            f"预览：前 {progress.preview_page_count} 页已完成匹配校验"
+            f"（首批结果用时 {progress.first_rows_seconds:.2f}s），"
+            "下方看板只统计这几页；其余页处理完后自动换成完整结果。"
         )
-        parse_issues_df.to_excel(
-            writer,
-            index=False,
-            sheet_name="解析异常",
+        show_results(*progress.preview)
+    elif progress.live_results is not None:
+        st.caption(f"最近提取的 {LIVE_TABLE_ROWS} 行：")
+        st.dataframe(
+            progress.live_results.tail(LIVE_TABLE_ROWS),
+            use_container_width=True,
         )
 
-        workbook = writer.book
 
-        header_format = workbook.add_format(
-            {
-                "bold": True,
-                "border": 1,
-                "align": "center",
-                "valign": "vcenter",
-            }
+def show_job_stats(job: PickListJob) -> None:
+    st.caption(
+        f"页缓存：命中 {job.cached_page_count} 页，"
+        f"重新解析 {job.parsed_page_count} 页；"
+        f"表格引擎补救 {job.table_page_count} 页。"
+    )
+
+    if job.total_seconds is not None:
+        first_rows = (
+            f"首批结果 {job.first_rows_seconds:.2f}s，"
+            if job.first_rows_seconds is not None
+            else ""
         )
-        warning_format = workbook.add_format(
-            {
-                "bg_color": "#FFF2CC",
-                "font_color": "#9C6500",
-            }
+        st.caption(f"用时：{first_rows}全部完成 {job.total_seconds:.2f}s（含排队）。")
+
+
+def release_session_job() -> None:
+    """当前会话不再关注之前的后台任务（换了文件或清空上传）。"""
+    job_id = st.session_state.pop(JOB_STATE_KEY, None)
+    if job_id is not None:
+        get_job_runner().detach(job_id)
+
+
+def get_export_bytes(
+    cache_key: str,
+    format_key: str,
+    parsed: ParsedResult,
+    workers: int,
+) -> bytes:
+    """取出或生成某一格式的下载文件；拆分导出时用 workers 个进程同时写各组工作簿。"""
+    export_cache = get_export_cache()
+    export_key = f"{cache_key}:{format_key}"
+    data = export_cache.get(export_key)
+
+    if data is None:
+        data = build_export(
+            format_key,
+            parsed.result_df,
+            parsed.validation_df,
+            parsed.parse_issues_df,
+            workers=workers,
         )
+        export_cache.put(export_key, data, len(data))
 
-        for sheet_name, dataframe in {
-            "提取结果": result_df,
-            "校验报告": validation_df,
-            "解析异常": parse_issues_df,
-        }.items():
-            worksheet = writer.sheets[sheet_name]
-            worksheet.freeze_panes(1, 0)
-            worksheet.autofilter(
-                0,
-                0,
-                max(len(dataframe), 1),
-                max(len(dataframe.columns) - 1, 0),
-            )
+    return data
+
+
+def show_download(
+    cache_key: str,
+    parsed: ParsedResult,
+    workers: int,
+) -> None:
+    """
+    下载区。
+
+    下载文件只在点了“准备下载文件”之后才生成，平时 rerun 不产生导出开销；
+    生成过的文件按结果和格式缓存，换回同一格式或其他会话下载同一结果时直接复用。
+    """
+    format_key = st.selectbox(
+        "下载格式",
+        list(EXPORT_FORMATS),
+        format_func=lambda key: EXPORT_FORMATS[key].label,
+    )
+    export_request = (cache_key, format_key)
 
-            for col_index, column_name in enumerate(dataframe.columns):
-                worksheet.write(
-                    0,
-                    col_index,
-                    column_name,
-                    header_format,
-                )
-
-                values = dataframe[column_name].astype(str).tolist()
-                max_width = max(
-                    [len(str(column_name))]
-                    + [len(value) for value in values[:1000]]
-                )
-                worksheet.set_column(
-                    col_index,
-                    col_index,
-                    min(max_width + 2, 42),
-                )
-
-        if not validation_df.empty:
-            result_col = validation_df.columns.get_loc("校验结果")
-            worksheet = writer.sheets["校验报告"]
-            worksheet.conditional_format(
-                1,
-                result_col,
-                len(validation_df),
-                result_col,
-                {
-                    "type": "text",
-                    "criteria": "not containing",
-                    "value": "通过",
-                    "format": warning_format,
-                },
+    if st.button("准备下载文件"):
+        st.session_state[EXPORT_STATE_KEY] = export_request
+
+    if st.session_state.get(EXPORT_STATE_KEY) != export_request:
+        return
+
+    with st.spinner("正在生成下载文件..."):
+        data = get_export_bytes(cache_key, format_key, parsed, workers)
+
+    st.download_button(
+        label="📥 下载提取及校验结果",
+        data=data,
+        file_name=export_file_name("拣货单提取结果_稳定文本解析版", format_key),
+        mime=EXPORT_FORMATS[format_key].mime,
+    )
+
+
+def wait_for_pick_lists(
+    documents: list[tuple[str, bytes]],
+    cache_key: str,
+    reference: ReferenceIndex,
+    workers: int,
+    table_fallback: bool,
+    preview_pages: int,
+    rules: list[ValidationRule],
+) -> ParsedResult:
+    """
+    把拣货单交给后台任务处理，并在页面上跟踪进度，处理完成后返回结果。
+
+    任务 ID 记在会话状态里，rerun 时直接接上正在运行的任务，不会从头重新解析。
+    任务未完成时本次运行到此为止，由定时刷新的进度片段在任务结束后触发整页重新运行。
+    """
+    job_runner = get_job_runner()
+    job_id = st.session_state.get(JOB_STATE_KEY)
+    job = job_runner.get(job_id) if job_id is not None else None
+
+    if job is not None and (
+        job.cache_key != cache_key
+        or job.status == JOB_CANCELLED
+    ):
+        release_session_job()
+        job = None
+
+    if job is not None and job.status == JOB_DONE and job.result is not None:
+        show_job_stats(job)
+        return job.result
+
+    result_cache = get_result_cache()
+    parsed = result_cache.get(cache_key)
+    if parsed is not None:
+        st.caption("同样的拣货单已处理过，直接使用缓存结果。")
+        return parsed
+
+    if job is None:
+        job = job_runner.submit(
+            cache_key,
+            documents,
+            reference,
+            workers,
+            table_fallback,
+            page_cache=get_page_cache(),
+            result_cache=result_cache,
+            preview_pages=preview_pages,
+            rules=rules,
+        )
+        st.session_state[JOB_STATE_KEY] = job.job_id
+
+    if job.status == JOB_FAILED:
+        st.error("PDF 文本读取失败：")
+        st.exception(job.error)
+        st.stop()
+
+    if job.status == JOB_EMPTY:
+        show_job_stats(job)
+        st.error(
+            "没有提取到任何 SKU 明细。"
+            "请查看“解析异常”，或确认 PDF 是否仍是同类拣货单格式。"
+        )
+
+        issues_df = pd.DataFrame(job.parse_issues)
+        if not issues_df.empty:
+            st.dataframe(
+                issues_df,
+                use_container_width=True,
             )
+        st.stop()
 
-    return output.getvalue()
+    show_job_progress(job.job_id)
+    st.stop()
 
 
 # =========================================================
 # 加载两张基础表
 # =========================================================
 load_errors: list[str] = []
+fingerprints: dict[str, str] = {}
+
+for path in (INFO_PATH, NAME_PATH):
+    try:
+        fingerprints[path] = workbook_fingerprint(path)
+    except Exception as exc:
+        load_errors.append(str(exc))
 
-try:
-    df_info = load_excel_file("product_info.xlsx")
-except Exception as exc:
-    df_info = None
-    load_errors.append(str(exc))
+reference: ReferenceIndex | None = None
+reference_error: Exception | None = None
 
-try:
-    df_name = load_excel_file("name_map.xlsx")
-except Exception as exc:
-    df_name = None
-    load_errors.append(str(exc))
+if not load_errors:
+    try:
+        reference = get_reference_index(
+            fingerprints[INFO_PATH],
+            fingerprints[NAME_PATH],
+        )
+    except Exception as exc:
+        reference_error = exc
+        load_errors.append(str(exc))
 
 
 with st.sidebar:
     st.header("⚙️ 基础资料状态")
 
-    if df_info is not None:
-        st.success(f"product_info.xlsx：{len(df_info)} 行")
+    if reference is not None:
+        st.success(f"{INFO_PATH}：{reference.info_row_count} 行")
+        st.success(f"{NAME_PATH}：{reference.name_row_count} 行")
     else:
-        st.error("product_info.xlsx 未就绪")
+        for path in (INFO_PATH, NAME_PATH):
+            st.error(f"{path} 未就绪")
 
-    if df_name is not None:
-        st.success(f"name_map.xlsx：{len(df_name)} 行")
-    else:
-        st.error("name_map.xlsx 未就绪")
+    if reference is not None and reference.timings:
+        with st.expander("查看基础资料加载耗时"):
+            st.dataframe(
+                pd.DataFrame(
+                    {
+                        "阶段": list(reference.timings),
+                        "耗时（秒）": [
+                            round(seconds, 3)
+                            for seconds in reference.timings.values()
+                        ],
+                    }
+                ),
+                hide_index=True,
+                use_container_width=True,
+            )
+
+    parse_workers = int(
+        st.number_input(
+            "PDF 解析进程数",
+            min_value=1,
+            max_value=max(os.cpu_count() or 1, 1),
+            value=min(os.cpu_count() or 1, 4),
+            help="大于 1 时按页分段并行解析，结果与单进程一致；页数较少时仍按单进程解析。",
+        )
+    )
+
+    preview_pages = int(
+        st.number_input(
+            "先行预览页数",
+            min_value=0,
+            value=DEFAULT_PREVIEW_PAGES,
+            help="先解析并校验前几页，立即显示看板和结果；其余页在后台继续处理。0 表示不预览。",
+        )
+    )
+
+    table_fallback = st.checkbox(
+        "文本解析失败的页用表格引擎重试",
+        value=True,
+        help="只有未提取到明细或明细字段不完整的页才按坐标重建表格重新解析。",
+    )
+
+    extra_checks = st.multiselect(
+        "附加校验",
+        OPTIONAL_RULE_NAMES,
+        help="在默认校验之外追加的提示级检查，命中的行在校验报告里标为“提示”，不计入需人工复核。",
+    )
 
     if load_errors:
         with st.expander("查看读取错误"):
@@ -505,14 +549,23 @@ with st.sidebar:
                 st.error(error)
 
 
-uploaded_file = st.file_uploader(
-    "上传 PDF 拣货单",
+uploaded_files = st.file_uploader(
+    "上传 PDF 拣货单（可一次选择多份）",
     type=["pdf"],
+    accept_multiple_files=True,
 )
 
 
-if uploaded_file is not None:
-    if df_info is None or df_name is None:
+if not uploaded_files:
+    release_session_job()
+
+if uploaded_files:
+    if reference_error is not None:
+        st.error("基础 Excel 读取或列名识别失败：")
+        st.exception(reference_error)
+        st.stop()
+
+    if reference is None:
         st.error(
             "PDF 已上传，但基础 Excel 未全部读取成功。"
             "请先确认 product_info.xlsx 和 name_map.xlsx "
@@ -520,128 +573,34 @@ if uploaded_file is not None:
         )
         st.stop()
 
-    try:
-        (
-            info_by_sku_id,
-            info_by_sku_code,
-            name_by_sku_code,
-            detected_columns,
-        ) = build_reference_data(df_info, df_name)
-    except Exception as exc:
-        st.error("基础 Excel 的列名识别失败：")
-        st.exception(exc)
-        st.stop()
-
     with st.expander("查看自动识别到的基础表列名"):
-        st.json(detected_columns)
+        st.json(dict(reference.detected_columns))
 
-    with st.spinner("正在提取并校验拣货单……"):
-        try:
-            raw_records, parse_issues = parse_pdf_text(
-                uploaded_file.getvalue()
-            )
-        except Exception as exc:
-            st.error("PDF 文本读取失败：")
-            st.exception(exc)
-            st.stop()
-
-        if not raw_records:
-            st.error(
-                "没有提取到任何 SKU 明细。"
-                "请查看“解析异常”，或确认 PDF 是否仍是同类拣货单格式。"
-            )
-
-            issues_df = pd.DataFrame(parse_issues)
-            if not issues_df.empty:
-                st.dataframe(
-                    issues_df,
-                    use_container_width=True,
-                )
-            st.stop()
-
-        result_df, validation_df = enrich_and_validate(
-            raw_records,
-            info_by_sku_id,
-            info_by_sku_code,
-            name_by_sku_code,
-        )
-
-        parse_issues_df = pd.DataFrame(
-            parse_issues,
-            columns=["页码", "行号", "问题类型", "原始内容"],
-        )
-
-    total_rows = len(result_df)
-    shop_count = (
-        result_df.loc[
-            result_df["店铺名称"] != "-",
-            "店铺名称",
-        ].nunique()
-    )
-    missing_names = int((result_df["商品名称"] == "-").sum())
-    missing_info = int(
-        (
-            (result_df["店铺名称"] == "-")
-            | (result_df["回收标签类别"] == "-")
-        ).sum()
+    documents = [
+        (uploaded_file.name, uploaded_file.getvalue())
+        for uploaded_file in uploaded_files
+    ]
+    cache_key = result_cache_key(
+        documents,
+        fingerprints[INFO_PATH],
+        fingerprints[NAME_PATH],
+        "表格兜底" if table_fallback else "仅文本",
+        *extra_checks,
     )
-    validation_problem_count = int(
-        (validation_df["校验结果"] != "通过").sum()
+    parsed = wait_for_pick_lists(
+        documents,
+        cache_key,
+        reference,
+        parse_workers,
+        table_fallback,
+        preview_pages,
+        resolve_rules(DEFAULT_RULE_NAMES + tuple(extra_checks)),
     )
 
-    st.subheader("🔍 自动体检看板")
-
-    col1, col2, col3, col4, col5 = st.columns(5)
-
-    with col1:
-        st.metric("处理总行数", total_rows)
-    with col2:
-        st.metric("涉及店铺数", shop_count)
-    with col3:
-        st.metric("名称未匹配", missing_names)
-    with col4:
-        st.metric("基础信息未匹配", missing_info)
-    with col5:
-        st.metric("需人工复核", validation_problem_count)
-
-    if validation_problem_count > 0 or not parse_issues_df.empty:
-        st.warning(
-            "存在未匹配或解析异常，请先查看校验报告再下载使用。"
-        )
-    else:
-        st.success("所有提取行均通过当前校验。")
-
-    st.subheader("📄 提取结果")
-    st.dataframe(
-        result_df,
-        use_container_width=True,
+    show_results(
+        parsed.result_df,
+        parsed.validation_df,
+        parsed.parse_issues_df,
     )
 
-    with st.expander("查看逐行校验报告"):
-        st.dataframe(
-            validation_df,
-            use_container_width=True,
-        )
-
-    if not parse_issues_df.empty:
-        with st.expander("查看解析异常"):
-            st.dataframe(
-                parse_issues_df,
-                use_container_width=True,
-            )
-
-    excel_bytes = build_excel(
-        result_df,
-        validation_df,
-        parse_issues_df,
-    )
-
-    st.download_button(
-        label="📥 下载提取及校验结果",
-        data=excel_bytes,
-        file_name="拣货单提取结果_稳定文本解析版.xlsx",
-        mime=(
-            "application/vnd.openxmlformats-officedocument."
-            "spreadsheetml.sheet"
-        ),
-    )
+    show_download(cache_key, parsed, parse_workers)
@@ -0,0 +1,224 @@
+"""
+在大规模合成拣货单文本上对比逐条 re.search 的旧逐行逻辑与 classify_line 单次分类的逐行耗时，
+并核对两者解析出的明细和异常完全一致。
+
+合成文本覆盖页眉页脚、SKC 块、被拆成多行的属性集、各类跳过行和页内 SKC 之前的内容。
+
+用法（在仓库根目录执行）：
+    python benchmarks/bench_line_classifier.py [页数]
+"""
+import os
+import random
+import re
+import sys
+import time
+from typing import Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_text_parser import (  # noqa: E402
+    DETAIL_PATTERN,
+    SKIP_PATTERNS,
+    extract_warehouse,
+    parse_page_text,
+)
+from reference_data import normalize_key  # noqa: E402
+
+
+def parse_page_text_legacy(
+    page_number: int,
+    text: str,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """原先每行逐条 re.search 的实现，仅作为对照基准保留在这里。"""
+    records: list[dict[str, Any]] = []
+    issues: list[dict[str, Any]] = []
+
+    def should_skip(line: str) -> bool:
+        return any(re.search(pattern, line) for pattern in SKIP_PATTERNS)
+
+    warehouse = extract_warehouse(text)
+    active_skc = ""
+    attribute_buffer: list[str] = []
+    parsed_on_page = 0
+
+    lines = [
+        line.strip()
+        for line in text.splitlines()
+        if line and line.strip()
+    ]
+
+    for line_number, line in enumerate(lines, start=1):
+        skc_match = re.search(r"SKC[:：]\s*(\d+)", line)
+        if skc_match:
+            active_skc = skc_match.group(1)
+            attribute_buffer = []
+            continue
+
+        detail_match = DETAIL_PATTERN.match(line)
+
+        if detail_match and active_skc:
+            inline_attribute = detail_match.group("attribute").strip()
+            attribute_parts = [
+                part
+                for part in attribute_buffer + [inline_attribute]
+                if part
+            ]
+            attribute = " ".join(attribute_parts).strip()
+            attribute_buffer = []
+
+            sku_id = normalize_key(detail_match.group("sku_id"))
+            sku_code = normalize_key(detail_match.group("sku_code"))
+            qty_text = normalize_key(detail_match.group("qty"))
+
+            if not sku_id or not sku_code or not qty_text.isdigit():
+                issues.append(
+                    {
+                        "页码": page_number,
+                        "行号": line_number,
+                        "问题类型": "明细字段不完整",
+                        "原始内容": line,
+                    }
+                )
+                continue
+
+            records.append(
+                {
+                    "页码": page_number,
+                    "发货仓库": warehouse,
+                    "SKC ID": active_skc,
+                    "SKU ID": sku_id,
+                    "货品编码": sku_code,
+                    "发货数量": int(qty_text),
+                    "属性集": attribute,
+                    "原始内容": " ".join(attribute_parts + [sku_id, sku_code, qty_text]),
+                }
+            )
+            parsed_on_page += 1
+            continue
+
+        if active_skc and not should_skip(line):
+            attribute_buffer.append(line)
+
+    if warehouse == "未知":
+        issues.append(
+            {
+                "页码": page_number,
+                "行号": "-",
+                "问题类型": "未识别到发货仓库",
+                "原始内容": "",
+            }
+        )
+
+    if parsed_on_page == 0:
+        issues.append(
+            {
+                "页码": page_number,
+                "行号": "-",
+                "问题类型": "本页未提取到明细",
+                "原始内容": "",
+            }
+        )
+
+    return records, issues
+
+
+ATTRIBUTES = [
+    "颜色：黑色",
+    "型号：5.9FT Set",
+    "规格：100cm竿+20cm",
+    "Fishing Rod",
+    "Stand's Holder",
+    "尺寸：XL 2 pcs",
+    "风格：Type-B-with",
+]
+
+
+def synthetic_pages(page_count: int, seed: int = 20260713) -> list[str]:
+    """生成与真实拣货单文本层结构相近的页面文本。"""
+    rnd = random.Random(seed)
+    pages = []
+
+    for page_number in range(1, page_count + 1):
+        lines = [
+            f"收货仓：华东{page_number % 3 + 1}号仓 拣货单 打印时间：2026-07-13 10:21",
+            "拣货单",
+            "序号 商品信息 属性集 SKU ID SKU货号 发货数",
+            "【VMI】",
+            f"备货母单号：WB{rnd.randint(10**9, 10**10)}",
+        ]
+
+        for block in range(1, rnd.randint(3, 7)):
+            lines += [
+                str(block),
+                f"SKC：{rnd.randint(10**9, 10**11)}",
+                "SKC货号：",
+                f"备货单号：WB{rnd.randint(10**9, 10**10)}",
+                f"创建时间：2026-07-1{rnd.randint(0, 9)}",
+                f"{rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}",
+                f"要求发货时间：2026-07-2{rnd.randint(0, 9)}",
+                f"数量：{rnd.randint(1, 99)}",
+            ]
+
+            for _ in range(rnd.randint(1, 6)):
+                attribute = rnd.choice(ATTRIBUTES)
+                detail = (
+                    f"{rnd.randint(10**9, 10**11)} "
+                    f"Y{rnd.randint(10**8, 10**9)} {rnd.randint(1, 60)}"
+                )
+
+                if rnd.random() < 0.3:
+                    # 属性集被拆到前一行。
+                    lines += [attribute, detail]
+                else:
+                    lines.append(f"{attribute} {detail}")
+
+            lines.append(f"合计 {rnd.randint(1, 300)}")
+
+        lines.append(f"第{page_number}页/共{page_count}页")
+        pages.append("\n".join(lines))
+
+    return pages
+
+
+def run(parser: Any, pages: list[str]) -> tuple[float, Any]:
+    started = time.perf_counter()
+    records: list[dict[str, Any]] = []
+    issues: list[dict[str, Any]] = []
+
+    for page_number, text in enumerate(pages, start=1):
+        page_records, page_issues = parser(page_number, text)
+        records.extend(page_records)
+        issues.extend(page_issues)
+
+    return time.perf_counter() - started, (records, issues)
+
+
+def main() -> None:
+    page_count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    pages = synthetic_pages(page_count)
+    line_count = sum(
+        1 for text in pages for line in text.splitlines() if line.strip()
+    )
+
+    legacy_seconds, legacy_result = min(
+        (run(parse_page_text_legacy, pages) for _ in range(3)),
+        key=lambda item: item[0],
+    )
+    new_seconds, new_result = min(
+        (run(parse_page_text, pages) for _ in range(3)),
+        key=lambda item: item[0],
+    )
+
+    if legacy_result != new_result:
+        raise SystemExit("两种实现的解析结果不一致")
+
+    print(
+        f"{page_count} 页，{line_count} 行，{len(new_result[0])} 条明细：\n"
+        f"  逐条 re.search：{legacy_seconds:.3f}s（{legacy_seconds / line_count * 1e9:.0f} ns/行）\n"
+        f"  classify_line：{new_seconds:.3f}s（{new_seconds / line_count * 1e9:.0f} ns/行）\n"
+        f"  加速 {legacy_seconds / new_seconds:.1f}x，结果一致"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+对比逐行 iterrows 与整列构建 build_reference_index 的耗时，并核对两者映射完全一致。
+
+用法（在仓库根目录执行）：
+    python benchmarks/bench_reference_build.py
+"""
+import os
+import sys
+import time
+from typing import Any, Callable
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reference_data import (  # noqa: E402
+    INFO_COLUMNS,
+    NAME_COLUMNS,
+    ReferenceIndex,
+    build_reference_index,
+    find_column,
+    load_reference_workbook,
+    normalize_key,
+)
+
+
+def build_reference_data_iterrows(
+    df_info: pd.DataFrame,
+    df_name: pd.DataFrame,
+) -> tuple[dict[str, dict[str, str]], dict[str, dict[str, str]], dict[str, str], dict[str, str]]:
+    """原先逐行构建的实现，仅作为对照基准保留在这里。"""
+    sku_id_col = find_column(df_info, ["SKU ID", "SKUID"])
+    sku_code_col = find_column(
+        df_info,
+        ["SKU货号", "SKU 货号", "货品编码", "货号"],
+        required=False,
+    )
+    shop_col = find_column(df_info, ["店铺名称", "店铺"])
+    label_col = find_column(
+        df_info,
+        ["回收标签类别", "回收标签", "标签类别"],
+    )
+
+    info_by_sku_id: dict[str, dict[str, str]] = {}
+    info_by_sku_code: dict[str, dict[str, str]] = {}
+
+    for _, row in df_info.iterrows():
+        shop_name = normalize_key(row.get(shop_col))
+        recycle_label = normalize_key(row.get(label_col))
+
+        sku_id = normalize_key(row.get(sku_id_col))
+        if sku_id and sku_id not in info_by_sku_id:
+            info_by_sku_id[sku_id] = {
+                "店铺名称": shop_name or "-",
+                "回收标签类别": recycle_label or "-",
+            }
+
+        if sku_code_col is not None:
+            sku_code = normalize_key(row.get(sku_code_col))
+            if sku_code and sku_code not in info_by_sku_code:
+                info_by_sku_code[sku_code] = {
+                    "店铺名称": shop_name or "-",
+                    "回收标签类别": recycle_label or "-",
+                }
+
+    name_key_col = find_column(
+        df_name,
+        ["货品编码", "SKU货号", "SKU 货号", "编码", "货号", "SKU"],
+    )
+    product_name_col = find_column(
+        df_name,
+        ["商品名称", "产品名称", "名称", "品名"],
+    )
+
+    name_by_sku_code: dict[str, str] = {}
+
+    for _, row in df_name.iterrows():
+        sku_code = normalize_key(row.get(name_key_col))
+        product_name = normalize_key(row.get(product_name_col))
+
+        if sku_code and sku_code not in name_by_sku_code:
+            name_by_sku_code[sku_code] = product_name or "-"
+
+    detected_columns = {
+        "基础信息 SKU ID 列": str(sku_id_col),
+        "基础信息 SKU 货号列": str(sku_code_col or "未找到"),
+        "基础信息 店铺列": str(shop_col),
+        "基础信息 标签列": str(label_col),
+        "名称表 货号列": str(name_key_col),
+        "名称表 商品名称列": str(product_name_col),
+    }
+
+    return (
+        info_by_sku_id,
+        info_by_sku_code,
+        name_by_sku_code,
+        detected_columns,
+    )
+
+
+def as_plain_dicts(
+    index: ReferenceIndex,
+) -> tuple[dict[str, dict[str, str]], dict[str, dict[str, str]], dict[str, str], dict[str, str]]:
+    """把紧凑索引展开成旧的逐 SKU dict 结构，用于逐项比对。"""
+
+    def expand(table: Any) -> dict[str, dict[str, str]]:
+        return {
+            key: {"店铺名称": shop_name, "回收标签类别": recycle_label}
+            for key, (shop_name, recycle_label) in table.items()
+        }
+
+    return (
+        expand(index.info_by_sku_id),
+        expand(index.info_by_sku_code),
+        dict(index.name_by_sku_code),
+        dict(index.detected_columns),
+    )
+
+
+def best_of(function: Callable[[], Any], repeat: int = 5) -> tuple[float, Any]:
+    timings = []
+    result = None
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+
+    return min(timings), result
+
+
+def main() -> None:
+    inputs = {
+        "原始 Excel（dtype=object）": (
+            pd.read_excel("product_info.xlsx", dtype=object),
+            pd.read_excel("name_map.xlsx", dtype=object),
+        ),
+        "Parquet 快照（仅需要的列）": (
+            load_reference_workbook("product_info.xlsx", INFO_COLUMNS),
+            load_reference_workbook("name_map.xlsx", NAME_COLUMNS),
+        ),
+    }
+
+    for label, (df_info, df_name) in inputs.items():
+        old_seconds, old_result = best_of(
+            lambda: build_reference_data_iterrows(df_info, df_name)
+        )
+        new_seconds, new_result = best_of(
+            lambda: build_reference_index(df_info, df_name)
+        )
+
+        if old_result != as_plain_dicts(new_result):
+            raise SystemExit(f"{label}：两种实现的映射不一致")
+
+        print(
+            f"{label}：{len(df_info)} + {len(df_name)} 行，"
+            f"iterrows {old_seconds * 1000:.1f} ms，"
+            f"整列 {new_seconds * 1000:.1f} ms，"
+            f"加速 {old_seconds / new_seconds:.1f}x，映射一致"
+        )
+
+
+if __name__ == "__main__":
+    main()
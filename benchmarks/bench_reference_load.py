@@ -0,0 +1,74 @@
+"""
+对比整表 pd.read_excel 与只读需要列的 read_reference_columns 在快照未命中时的耗时和峰值内存，
+并核对选中列经 normalize_key 后的值完全一致。
+
+用法（在仓库根目录执行）：
+    python benchmarks/bench_reference_load.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reference_data import (  # noqa: E402
+    INFO_COLUMNS,
+    NAME_COLUMNS,
+    normalize_key,
+    read_reference_columns,
+)
+
+
+def measure(function: Callable[[], Any], repeat: int = 3) -> tuple[float, int, Any]:
+    """耗时取多次中最快的一次；峰值内存单独跑一次，避免 tracemalloc 拖慢计时。"""
+    timings = []
+    result = None
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return min(timings), peak, result
+
+
+def main() -> None:
+    for path, specs in (
+        ("product_info.xlsx", INFO_COLUMNS),
+        ("name_map.xlsx", NAME_COLUMNS),
+    ):
+        full_seconds, full_peak, full = measure(
+            lambda: pd.read_excel(path, dtype=object)
+        )
+        used_seconds, used_peak, used = measure(
+            lambda: read_reference_columns(path, specs)
+        )
+
+        if len(full) != len(used):
+            raise SystemExit(f"{path}：行数不一致")
+
+        for column in used.columns:
+            expected = [normalize_key(value) for value in full[column]]
+            actual = [normalize_key(value) for value in used[column]]
+            if expected != actual:
+                raise SystemExit(f"{path}：列 {column} 的值不一致")
+
+        print(
+            f"{path}：{len(full.columns)} 列中读取 {len(used.columns)} 列，"
+            f"耗时 {full_seconds:.2f}s -> {used_seconds:.2f}s，"
+            f"峰值内存 {full_peak / 1024 / 1024:.1f} MiB"
+            f" -> {used_peak / 1024 / 1024:.1f} MiB，数据一致"
+        )
+
+
+if __name__ == "__main__":
+    main()
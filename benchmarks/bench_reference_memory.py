@@ -0,0 +1,111 @@
+"""
+对比逐 SKU dict 与紧凑索引两种查找表在随仓库提供的基础表上的常驻内存。
+
+每种结构在独立子进程中构建：先完整读表、构建一次再丢弃（让延迟导入和缓存到位），
+记录 RSS；再读表、构建、释放 DataFrame 并 malloc_trim 归还空闲内存后再次记录 RSS。
+查找表本身只有几 MiB，RSS 差值会受分配器碎片影响上下浮动，
+因此同时用 tracemalloc 统计构建完成后仍被查找表占用的字节数，以它为准。
+
+用法（在仓库根目录执行，仅支持 Linux）：
+    python benchmarks/bench_reference_memory.py
+"""
+import ctypes
+import gc
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+VARIANTS = {
+    "dict": "逐 SKU dict（旧）",
+    "compact": "紧凑索引",
+}
+
+
+def rss_bytes() -> int:
+    gc.collect()
+
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+    with open("/proc/self/statm") as handle:
+        resident_pages = int(handle.read().split()[1])
+
+    return resident_pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def measure(variant: str) -> dict[str, int]:
+    import pyarrow as pa
+
+    from bench_reference_build import build_reference_data_iterrows
+    from reference_data import (
+        INFO_COLUMNS,
+        NAME_COLUMNS,
+        build_reference_index,
+        load_reference_workbook,
+    )
+
+    # Arrow 默认内存池按时间延迟归还内存，换成系统分配器才能让 malloc_trim 生效。
+    pa.set_memory_pool(pa.system_memory_pool())
+
+    build_reference_index(
+        load_reference_workbook("product_info.xlsx", INFO_COLUMNS),
+        load_reference_workbook("name_map.xlsx", NAME_COLUMNS),
+    )
+    rss_before = rss_bytes()
+
+    df_info = load_reference_workbook("product_info.xlsx", INFO_COLUMNS)
+    df_name = load_reference_workbook("name_map.xlsx", NAME_COLUMNS)
+    tracemalloc.start()
+
+    if variant == "dict":
+        lookup = build_reference_data_iterrows(df_info, df_name)
+    else:
+        lookup = build_reference_index(df_info, df_name)
+
+    del df_info, df_name
+    gc.collect()
+
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = rss_bytes()
+
+    assert lookup is not None
+    return {
+        "retained": retained,
+        "rss_before": rss_before,
+        "rss_after": rss_after,
+    }
+
+
+def main() -> None:
+    if len(sys.argv) == 3 and sys.argv[1] == "--variant":
+        print(json.dumps(measure(sys.argv[2])))
+        return
+
+    for variant, label in VARIANTS.items():
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--variant", variant],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+
+        print(
+            f"{label}：查找表常驻 {result['retained'] / 1024 / 1024:.2f} MiB，"
+            f"进程 RSS {result['rss_before'] / 1024 / 1024:.1f} MiB"
+            f" -> {result['rss_after'] / 1024 / 1024:.1f} MiB"
+            f"（+{(result['rss_after'] - result['rss_before']) / 1024 / 1024:.1f} MiB）"
+        )
+
+
+if __name__ == "__main__":
+    main()
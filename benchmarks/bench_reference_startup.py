@@ -0,0 +1,45 @@
+"""
+冷启动（快照失效）时串行与进程池并行读取两张基础表的墙钟耗时对比，以及快照命中时的耗时。
+
+基础表会复制到临时目录，不影响仓库里已有的快照。并行只有在多核机器上才有收益。
+
+用法（在仓库根目录执行）：
+    python benchmarks/bench_reference_startup.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reference_data import SNAPSHOT_DIR_NAME, load_reference_index  # noqa: E402
+
+
+def report(label: str, timings: dict[str, float]) -> None:
+    breakdown = "，".join(
+        f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()
+    )
+    print(f"{label}：{breakdown}")
+
+
+def main() -> None:
+    print(f"CPU 核数：{os.cpu_count()}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        info_path = os.path.join(directory, "product_info.xlsx")
+        name_path = os.path.join(directory, "name_map.xlsx")
+        shutil.copyfile("product_info.xlsx", info_path)
+        shutil.copyfile("name_map.xlsx", name_path)
+
+        for label, max_workers in (("冷启动 串行", 1), ("冷启动 并行", 2)):
+            shutil.rmtree(os.path.join(directory, SNAPSHOT_DIR_NAME), ignore_errors=True)
+            index = load_reference_index(info_path, name_path, max_workers=max_workers)
+            report(label, dict(index.timings))
+
+        index = load_reference_index(info_path, name_path)
+        report("快照命中", dict(index.timings))
+
+
+if __name__ == "__main__":
+    main()
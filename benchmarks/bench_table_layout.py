@@ -0,0 +1,83 @@
+"""
+在同一批 PDF 上对比 pdfplumber extract_table 与按坐标重建表格的 extract_table_rows：
+逐页核对行结构（表头、行数、每个单元格文字）是否一致，并统计每页耗时。
+
+pdfplumber 只用于对照，需要单独安装。
+
+用法（在仓库根目录执行）：
+    python benchmarks/bench_table_layout.py 拣货单1.pdf [拣货单2.pdf ...]
+"""
+import io
+import os
+import sys
+import time
+
+import pdfplumber
+from pypdf import PdfReader
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_layout import extract_table_rows  # noqa: E402
+
+
+def plumber_tables(pdf_bytes: bytes) -> tuple[float, list[list[list[str]] | None]]:
+    started = time.perf_counter()
+    tables = []
+
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        for page in pdf.pages:
+            table = page.extract_table()
+            tables.append(
+                [[cell or "" for cell in row] for row in table]
+                if table
+                else None
+            )
+
+    return time.perf_counter() - started, tables
+
+
+def layout_tables(pdf_bytes: bytes) -> tuple[float, list[list[list[str]] | None]]:
+    started = time.perf_counter()
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    tables = [extract_table_rows(page) for page in reader.pages]
+    return time.perf_counter() - started, tables
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        raise SystemExit(__doc__)
+
+    for path in sys.argv[1:]:
+        with open(path, "rb") as handle:
+            pdf_bytes = handle.read()
+
+        plumber_seconds, expected = plumber_tables(pdf_bytes)
+        layout_seconds, actual = layout_tables(pdf_bytes)
+        page_count = len(expected)
+
+        mismatched = [
+            page_number
+            for page_number, (left, right) in enumerate(
+                zip(expected, actual),
+                start=1,
+            )
+            if left != right
+        ]
+
+        print(
+            f"{os.path.basename(path)}：{page_count} 页，"
+            f"extract_table {plumber_seconds:.2f}s"
+            f"（{plumber_seconds / page_count * 1000:.1f} ms/页），"
+            f"坐标重建 {layout_seconds:.2f}s"
+            f"（{layout_seconds / page_count * 1000:.1f} ms/页），"
+            f"加速 {plumber_seconds / layout_seconds:.1f}x"
+        )
+
+        if mismatched:
+            print(f"  行结构不一致的页：{mismatched}")
+        else:
+            print("  所有页行结构一致")
+
+
+if __name__ == "__main__":
+    main()
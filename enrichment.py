@@ -0,0 +1,275 @@
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from pdf_text_parser import ENGINE_TABLE, PageResult
+from reference_data import (
+    PRODUCT_NAME_COLUMN,
+    SKU_INFO_COLUMNS,
+    ReferenceIndex,
+    normalize_series,
+)
+from validation_rules import (
+    DEFAULT_RULES,
+    SEVERITY_COLUMN,
+    SOURCE_COLUMN,
+    ValidationRule,
+    evaluate_rules,
+)
+
+
+RESULT_COLUMNS = [
+    "发货仓库",
+    "店铺名称",
+    "SKC ID",
+    "回收标签类别",
+    "货品编码",
+    "商品名称",
+    "发货数量",
+]
+ISSUE_COLUMNS = [
+    "页码",
+    "行号",
+    "问题类型",
+    "原始内容",
+]
+
+
+# ResultBuilder 攒够这么多行明细就整批匹配校验一次。
+ENRICH_BATCH_ROWS = 5000
+
+
+def _info_frame(table: Mapping[str, tuple[str, str]]) -> pd.DataFrame:
+    """查找表对应的左连接用 DataFrame；SkuInfoTable 自带缓存，普通 dict 临时生成。"""
+    to_frame = getattr(table, "to_frame", None)
+    if to_frame is not None:
+        return to_frame()
+
+    return pd.DataFrame(
+        list(table.values()),
+        index=pd.Index(list(table), dtype=object),
+        columns=SKU_INFO_COLUMNS,
+    )
+
+
+def _name_series(table: Mapping[str, str]) -> pd.Series:
+    to_series = getattr(table, "to_series", None)
+    if to_series is not None:
+        return to_series()
+
+    return pd.Series(
+        list(table.values()),
+        index=pd.Index(list(table), dtype=object),
+        dtype=object,
+        name=PRODUCT_NAME_COLUMN,
+    )
+
+
+def enrich_and_validate(
+    raw_records: list[dict[str, Any]],
+    info_by_sku_id: Mapping[str, tuple[str, str]],
+    info_by_sku_code: Mapping[str, tuple[str, str]],
+    name_by_sku_code: Mapping[str, str],
+    first_row_number: int = 1,
+    rules: Sequence[ValidationRule] | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    匹配店铺、回收标签和商品名称，并生成逐行校验报告。
+
+    整批明细一次转成 DataFrame，先按 SKU ID 左连接基础信息，未命中的行用
+    SKU 货号左连接的结果补上，校验结果由 rules 的掩码组合得出，
+    默认使用 DEFAULT_RULES。
+    按页增量调用时，first_row_number 传入本批第一行在整份结果中的行号。
+    """
+    if not raw_records:
+        return pd.DataFrame(columns=RESULT_COLUMNS), pd.DataFrame()
+
+    records = pd.DataFrame.from_records(raw_records)
+    sku_ids = normalize_series(records["SKU ID"])
+    sku_codes = normalize_series(records["货品编码"])
+
+    # 查找表以键为唯一索引，按键 reindex 就是左连接，且复用索引已建好的哈希表，
+    # 不必像 merge/join 那样每次重新对整张基础表做因子化。
+    by_sku_id = _info_frame(info_by_sku_id).reindex(sku_ids.to_numpy())
+    by_sku_code = _info_frame(info_by_sku_code).reindex(sku_codes.to_numpy())
+
+    id_matched = by_sku_id["店铺名称"].notna().to_numpy()
+    code_matched = by_sku_code["店铺名称"].notna().to_numpy()
+    shop_names, recycle_labels = (
+        np.select(
+            [id_matched, code_matched],
+            [
+                by_sku_id[column].to_numpy(dtype=object),
+                by_sku_code[column].to_numpy(dtype=object),
+            ],
+            default="-",
+        )
+        for column in SKU_INFO_COLUMNS
+    )
+
+    product_names = (
+        _name_series(name_by_sku_code)
+        .reindex(sku_codes.to_numpy())
+        .fillna("-")
+        .to_numpy(dtype=object)
+    )
+
+    match_methods = np.select(
+        [id_matched, code_matched],
+        ["SKU ID", "SKU 货号降级匹配"],
+        default="未匹配",
+    ).astype(object)
+
+    result_df = pd.DataFrame(
+        {
+            "发货仓库": records["发货仓库"],
+            "店铺名称": shop_names,
+            "SKC ID": records["SKC ID"],
+            "回收标签类别": recycle_labels,
+            "货品编码": sku_codes,
+            "商品名称": product_names,
+            "发货数量": records["发货数量"],
+        },
+        columns=RESULT_COLUMNS,
+    )
+    validation_df = pd.DataFrame(
+        {
+            "结果行号": np.arange(
+                first_row_number,
+                first_row_number + len(records),
+            ),
+            "页码": records["页码"],
+            "SKU ID": sku_ids,
+            "货品编码": sku_codes,
+            "匹配方式": match_methods,
+        }
+    )
+    add_validation_results(
+        validation_df,
+        result_df,
+        DEFAULT_RULES if rules is None else rules,
+    )
+    validation_df["原始内容"] = records["原始内容"]
+
+    return result_df, validation_df
+
+
+def add_validation_results(
+    validation_df: pd.DataFrame,
+    result_df: pd.DataFrame,
+    rules: Sequence[ValidationRule],
+) -> None:
+    """按规则求值后写入（或覆盖）校验报告的“校验结果”和“问题级别”两列。"""
+    check_frame = result_df.assign(
+        **{
+            "SKU ID": validation_df["SKU ID"].to_numpy(),
+            "页码": validation_df["页码"].to_numpy(),
+        }
+    )
+    messages, severities = evaluate_rules(check_frame, rules)
+    validation_df["校验结果"] = messages
+    validation_df[SEVERITY_COLUMN] = severities
+
+
+class ResultBuilder:
+    """
+    按页累积匹配校验结果，供页面和命令行共用。
+
+    整列连接每次调用有固定开销，所以各页明细先攒着，取结果时或攒满
+    ENRICH_BATCH_ROWS 行时再整批匹配校验，原始明细不必整份留在内存里；
+    校验规则在 build 时对整份结果统一求值一次，跨页规则也能看到全部行。
+    with_source 为 True 时三张表都带来源文件列，结果行号跨文件连续编号。
+    """
+
+    def __init__(
+        self,
+        reference: ReferenceIndex,
+        with_source: bool = False,
+        rules: Sequence[ValidationRule] | None = None,
+    ) -> None:
+        self.reference = reference
+        self.with_source = with_source
+        self.rules = DEFAULT_RULES if rules is None else tuple(rules)
+        self.row_count = 0
+        self.page_count = 0
+        self.cached_page_count = 0
+        self.table_page_count = 0
+        self.parse_issues: list[dict[str, Any]] = []
+        self._result_parts: list[pd.DataFrame] = []
+        self._validation_parts: list[pd.DataFrame] = []
+        self._pending_records: list[dict[str, Any]] = []
+        self._pending_sources: list[str] = []
+
+    @property
+    def has_records(self) -> bool:
+        return self.row_count > 0
+
+    def add_page(self, page: PageResult, source_name: str = "") -> None:
+        self.page_count += 1
+        self.cached_page_count += page.from_cache
+        self.table_page_count += page.engine == ENGINE_TABLE
+
+        if self.with_source:
+            self.parse_issues.extend(
+                {SOURCE_COLUMN: source_name, **issue}
+                for issue in page.issues
+            )
+        else:
+            self.parse_issues.extend(page.issues)
+
+        if not page.records:
+            return
+
+        self._pending_records.extend(page.records)
+        if self.with_source:
+            self._pending_sources.extend([source_name] * len(page.records))
+        self.row_count += len(page.records)
+
+        if len(self._pending_records) >= ENRICH_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self) -> None:
+        """把攒下的明细整批匹配校验，结果行号接在已完成的行之后。"""
+        if not self._pending_records:
+            return
+
+        result_df, validation_df = enrich_and_validate(
+            self._pending_records,
+            self.reference.info_by_sku_id,
+            self.reference.info_by_sku_code,
+            self.reference.name_by_sku_code,
+            first_row_number=self.row_count - len(self._pending_records) + 1,
+            rules=(),
+        )
+
+        if self.with_source:
+            result_df.insert(0, SOURCE_COLUMN, self._pending_sources)
+            validation_df.insert(0, SOURCE_COLUMN, self._pending_sources)
+
+        self._result_parts.append(result_df)
+        self._validation_parts.append(validation_df)
+        self._pending_records = []
+        self._pending_sources = []
+
+    def current_results(self) -> pd.DataFrame:
+        """目前为止的提取结果，用于解析过程中的实时预览。"""
+        self._flush()
+        return pd.concat(self._result_parts, ignore_index=True)
+
+    def build(self) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """返回 (提取结果, 校验报告, 解析异常) 三张表。"""
+        result_columns = ([SOURCE_COLUMN] if self.with_source else []) + RESULT_COLUMNS
+        issue_columns = ([SOURCE_COLUMN] if self.with_source else []) + ISSUE_COLUMNS
+
+        self._flush()
+        if self._result_parts:
+            result_df = pd.concat(self._result_parts, ignore_index=True)
+            validation_df = pd.concat(self._validation_parts, ignore_index=True)
+            add_validation_results(validation_df, result_df, self.rules)
+        else:
+            result_df = pd.DataFrame(columns=result_columns)
+            validation_df = pd.DataFrame()
+
+        parse_issues_df = pd.DataFrame(self.parse_issues, columns=issue_columns)
+        return result_df, validation_df, parse_issues_df
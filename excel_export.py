@@ -0,0 +1,140 @@
+import tempfile
+from typing import IO, Any, Iterator
+
+import pandas as pd
+import xlsxwriter
+
+
+# 结果表较大时，工作簿先写在内存里，超过这个大小才落到临时文件。
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+# 逐块把 DataFrame 转成 Python 值写出，内存里只多出一块的副本。
+ROW_CHUNK_SIZE = 10_000
+
+# 列宽按每列前这么多行估算，最宽不超过 MAX_COLUMN_WIDTH。
+WIDTH_SAMPLE_ROWS = 1000
+MAX_COLUMN_WIDTH = 42
+
+
+def _iter_rows(dataframe: pd.DataFrame) -> Iterator[tuple[Any, ...]]:
+    """按顺序逐行产出单元格值，空值换成 None（写成空白单元格）。"""
+    for start in range(0, len(dataframe), ROW_CHUNK_SIZE):
+        chunk = dataframe.iloc[start:start + ROW_CHUNK_SIZE]
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        yield from chunk.itertuples(index=False, name=None)
+
+
+def _column_width(column_name: Any, values: pd.Series) -> int:
+    sample_width = values.iloc[:WIDTH_SAMPLE_ROWS].astype(str).str.len().max()
+    max_width = max(
+        len(str(column_name)),
+        0 if pd.isna(sample_width) else int(sample_width),
+    )
+    return min(max_width + 2, MAX_COLUMN_WIDTH)
+
+
+def write_excel(
+    target: str | IO[bytes],
+    result_df: pd.DataFrame,
+    validation_df: pd.DataFrame,
+    parse_issues_df: pd.DataFrame,
+) -> None:
+    """
+    把三张表写成工作簿，target 是文件路径或可写的二进制文件对象。
+
+    用 xlsxwriter 的 constant_memory 模式按行顺序写出，每个工作表只保留当前一行，
+    单元格数据不会在内存里再整份复制一遍。
+    """
+    workbook = xlsxwriter.Workbook(
+        target,
+        {"constant_memory": True},
+    )
+
+    header_format = workbook.add_format(
+        {
+            "bold": True,
+            "border": 1,
+            "align": "center",
+            "valign": "vcenter",
+        }
+    )
+    warning_format = workbook.add_format(
+        {
+            "bg_color": "#FFF2CC",
+            "font_color": "#9C6500",
+        }
+    )
+
+    try:
+        for sheet_name, dataframe in {
+            "提取结果": result_df,
+            "校验报告": validation_df,
+            "解析异常": parse_issues_df,
+        }.items():
+            worksheet = workbook.add_worksheet(sheet_name)
+            worksheet.freeze_panes(1, 0)
+            worksheet.autofilter(
+                0,
+                0,
+                max(len(dataframe), 1),
+                max(len(dataframe.columns) - 1, 0),
+            )
+
+            for col_index, column_name in enumerate(dataframe.columns):
+                worksheet.set_column(
+                    col_index,
+                    col_index,
+                    _column_width(column_name, dataframe[column_name]),
+                )
+                worksheet.write(
+                    0,
+                    col_index,
+                    column_name,
+                    header_format,
+                )
+
+            for row_index, row in enumerate(_iter_rows(dataframe), start=1):
+                worksheet.write_row(row_index, 0, row)
+
+            if sheet_name == "校验报告" and not dataframe.empty:
+                result_col = dataframe.columns.get_loc("校验结果")
+                worksheet.conditional_format(
+                    1,
+                    result_col,
+                    len(dataframe),
+                    result_col,
+                    {
+                        "type": "text",
+                        "criteria": "not containing",
+                        "value": "通过",
+                        "format": warning_format,
+                    },
+                )
+    finally:
+        workbook.close()
+
+
+def spool_excel(
+    result_df: pd.DataFrame,
+    validation_df: pd.DataFrame,
+    parse_issues_df: pd.DataFrame,
+) -> IO[bytes]:
+    """
+    生成工作簿并返回定位在开头的临时文件对象，调用方读完后关闭即删除。
+
+    小工作簿留在内存里，超过 SPOOL_MAX_BYTES 自动转存到磁盘临时文件，
+    适合直接流式写给 HTTP 响应或复制到目标文件。
+    """
+    spool = tempfile.SpooledTemporaryFile(
+        max_size=SPOOL_MAX_BYTES,
+        suffix=".xlsx",
+    )
+
+    try:
+        write_excel(spool, result_df, validation_df, parse_issues_df)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+
+    return spool
@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+import threading
+from typing import Any
+
+
+PAGE_CACHE_DIR_NAME = ".page_cache"
+
+# 磁盘上页缓存的总大小上限，超过后按最近使用时间淘汰最旧的页。
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_ENTRY_SUFFIX = ".json"
+
+
+class PageCache:
+    """
+    按页内容指纹缓存单页解析结果的本地磁盘存储。
+
+    每页一个 JSON 文件，文件名就是页指纹；命中时刷新文件修改时间，
+    prune 按修改时间从旧到新淘汰，直到总大小回到上限以内。
+    """
+
+    def __init__(
+        self,
+        directory: str = PAGE_CACHE_DIR_NAME,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._prune_lock = threading.Lock()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _ENTRY_SUFFIX)
+
+    def get(
+        self,
+        key: str,
+    ) -> tuple[list[dict[str, Any]], list[dict[str, Any]], str] | None:
+        """读取缓存的 (明细, 异常, 解析引擎)；不存在或文件损坏时视为未命中。"""
+        path = self._entry_path(key)
+
+        try:
+            with open(path, encoding="utf-8") as handle:
+                entry = json.load(handle)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(entry, dict):
+            return None
+
+        records = entry.get("records")
+        issues = entry.get("issues")
+        engine = entry.get("engine")
+        if (
+            not isinstance(records, list)
+            or not isinstance(issues, list)
+            or not isinstance(engine, str)
+        ):
+            return None
+
+        return records, issues, engine
+
+    def put(
+        self,
+        key: str,
+        records: list[dict[str, Any]],
+        issues: list[dict[str, Any]],
+        engine: str,
+    ) -> None:
+        """原子写入单页结果；缓存目录不可写时静默跳过，不影响解析。"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            file_descriptor, temp_path = tempfile.mkstemp(
+                dir=self.directory,
+                suffix=".tmp",
+            )
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(file_descriptor, "w", encoding="utf-8") as handle:
+                json.dump(
+                    {"records": records, "issues": issues, "engine": engine},
+                    handle,
+                    ensure_ascii=False,
+                )
+            os.replace(temp_path, self._entry_path(key))
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def prune(self) -> int:
+        """把缓存目录压回 max_bytes 以内，返回删除的页数。"""
+        with self._prune_lock:
+            try:
+                entries = []
+                with os.scandir(self.directory) as iterator:
+                    for entry in iterator:
+                        if entry.name.endswith(_ENTRY_SUFFIX):
+                            stat = entry.stat()
+                            entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+            except OSError:
+                return 0
+
+            total_bytes = sum(size for _, size, _ in entries)
+            removed = 0
+
+            for _, size, path in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+
+                total_bytes -= size
+                removed += 1
+
+            return removed
@@ -0,0 +1,392 @@
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from pypdf import PageObject
+
+from reference_data import normalize_key
+
+
+# 表头里用来定位表格和列范围的关键字，必须在同一行全部出现才认定为表头。
+HEADER_KEYWORDS = [
+    "商品信息",
+    "货号",
+    "发货数",
+]
+
+# 穿过此列的横线划分表格行；其他列只穿过部分横线时，跨行的合并单元格
+# 归入它覆盖的第一行，与 pdfplumber extract_table 的合并单元格结果一致。
+ANCHOR_KEYWORD = "货号"
+
+# 基线 y 坐标相差不超过该值（pt）的文字片段视为同一视觉行。
+LINE_TOLERANCE = 2.0
+
+# 两端 y 坐标相差不超过该值（pt）的线段视为横线，y 坐标相差不超过该值的横线视为同一条。
+RULING_TOLERANCE = 1.0
+
+# 这些绘制操作把当前路径画到页面上；n 只结束路径（用于裁剪），不产生可见的线。
+_PAINT_OPERATORS = {
+    b"S",
+    b"s",
+    b"f",
+    b"F",
+    b"f*",
+    b"B",
+    b"B*",
+    b"b",
+    b"b*",
+}
+
+TABLE_SKC_PATTERN = re.compile(r"SKC[:：\s]+(\d+)")
+
+
+@dataclass(frozen=True)
+class TextRun:
+    """pypdf 文本回调给出的一段文字及其起点坐标（PDF 坐标系，y 向上）。"""
+
+    x: float
+    y: float
+    text: str
+
+
+def collect_text_runs(page: PageObject) -> list[TextRun]:
+    """用 pypdf 的文本 visitor 回调收集页面上所有非空文字片段的位置。"""
+    runs: list[TextRun] = []
+
+    def visit(
+        text: str,
+        cm: list[float],
+        tm: list[float],
+        font_dict: object,
+        font_size: float,
+    ) -> None:
+        text = text.strip()
+        if not text:
+            return
+
+        # 文本矩阵的平移量再经当前变换矩阵换算到页面坐标。
+        x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+        y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+        runs.append(TextRun(x, y, text))
+
+    page.extract_text(visitor_text=visit)
+    return runs
+
+
+@dataclass(frozen=True)
+class Ruling:
+    """页面上的一条横线（线段或矩形的上下边），PDF 坐标系。"""
+
+    y: float
+    x0: float
+    x1: float
+
+    def crosses(self, x: float) -> bool:
+        return self.x0 - RULING_TOLERANCE <= x <= self.x1 + RULING_TOLERANCE
+
+
+def _multiply(
+    left: tuple[float, ...],
+    right: tuple[float, ...],
+) -> tuple[float, ...]:
+    a, b, c, d, e, f = left
+    g, h, i, j, k, m = right
+    return (
+        a * g + b * i,
+        a * h + b * j,
+        c * g + d * i,
+        c * h + d * j,
+        e * g + f * i + k,
+        e * h + f * j + m,
+    )
+
+
+def collect_rulings(page: PageObject) -> list[Ruling]:
+    """
+    从页面内容流里收集画出来的横线，按 cm/q/Q 换算到页面坐标。
+
+    直线段两端 y 坐标相近即为横线，矩形取上下两条边。
+    只看页面自身的内容流，不展开 Form XObject。
+    """
+    contents = page.get_contents()
+    if contents is None:
+        return []
+
+    rulings: list[Ruling] = []
+    path: list[tuple[float, float, float, float]] = []
+    ctm: tuple[float, ...] = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+    saved: list[tuple[float, ...]] = []
+    current = start = (0.0, 0.0)
+
+    def point(x: float, y: float) -> tuple[float, float]:
+        a, b, c, d, e, f = ctm
+        return a * x + c * y + e, b * x + d * y + f
+
+    for operands, operator in contents.operations:
+        if operator == b"q":
+            saved.append(ctm)
+        elif operator == b"Q":
+            if saved:
+                ctm = saved.pop()
+        elif operator == b"cm":
+            ctm = _multiply(tuple(float(value) for value in operands), ctm)
+        elif operator == b"m":
+            current = start = point(float(operands[0]), float(operands[1]))
+        elif operator == b"l":
+            end = point(float(operands[0]), float(operands[1]))
+            path.append((*current, *end))
+            current = end
+        elif operator in (b"c", b"v", b"y"):
+            current = point(float(operands[-2]), float(operands[-1]))
+        elif operator == b"h":
+            path.append((*current, *start))
+            current = start
+        elif operator == b"re":
+            x, y, width, height = (float(value) for value in operands)
+            corners = [
+                point(x, y),
+                point(x + width, y),
+                point(x + width, y + height),
+                point(x, y + height),
+            ]
+            path.extend(
+                (*corners[index], *corners[(index + 1) % 4])
+                for index in range(4)
+            )
+            current = start = corners[0]
+        elif operator in _PAINT_OPERATORS:
+            rulings.extend(
+                Ruling((y0 + y1) / 2, min(x0, x1), max(x0, x1))
+                for x0, y0, x1, y1 in path
+                if abs(y0 - y1) <= RULING_TOLERANCE
+                and abs(x0 - x1) > RULING_TOLERANCE
+            )
+            path = []
+        elif operator == b"n":
+            path = []
+
+    return rulings
+
+
+def _ruling_edges(rulings: list[Ruling], x: float, below: float) -> list[float]:
+    """穿过横坐标 x、位于 below 以下的横线，合并相近的 y 后从上到下排列。"""
+    edges: list[float] = []
+
+    for y in sorted(
+        (ruling.y for ruling in rulings if ruling.y < below and ruling.crosses(x)),
+        reverse=True,
+    ):
+        if not edges or edges[-1] - y > RULING_TOLERANCE:
+            edges.append(y)
+
+    return edges
+
+
+def group_lines(runs: list[TextRun]) -> list[list[TextRun]]:
+    """按 y 坐标把文字片段聚成视觉行，行从上到下、行内从左到右排列。"""
+    lines: list[list[TextRun]] = []
+
+    for run in sorted(runs, key=lambda item: (-item.y, item.x)):
+        if lines and abs(lines[-1][0].y - run.y) <= LINE_TOLERANCE:
+            lines[-1].append(run)
+        else:
+            lines.append([run])
+
+    for line in lines:
+        line.sort(key=lambda item: item.x)
+
+    return lines
+
+
+def _find_header(lines: list[list[TextRun]]) -> int | None:
+    for index, line in enumerate(lines):
+        line_text = " ".join(run.text for run in line)
+        if all(keyword in line_text for keyword in HEADER_KEYWORDS):
+            return index
+
+    return None
+
+
+def _column_index(x: float, boundaries: list[float]) -> int:
+    for index, boundary in enumerate(boundaries):
+        if x < boundary:
+            return index
+
+    return len(boundaries)
+
+
+def _join_cells(cells: list[list[str]]) -> list[str]:
+    return ["\n".join(parts) for parts in cells]
+
+
+def extract_table_rows(page: PageObject) -> list[list[str]] | None:
+    """
+    按坐标重建拣货单表格，返回与 pdfplumber extract_table 相同结构的行：
+    第一行是表头，之后每个表格行一行，单元格内多行文字用换行符连接，空单元格为空字符串。
+
+    列范围取相邻表头单元格起点的中点为界；行按穿过货号列的横线划分，
+    文字归入它所在单元格（以穿过本列的横线为上下边）覆盖的第一行，
+    因此单元格顶端、居中或底端对齐的多行文字都留在自己的行里。
+    没有识别到表头或表头下没有横线时返回 None。
+    """
+    lines = group_lines(collect_text_runs(page))
+    header_index = _find_header(lines)
+
+    if header_index is None:
+        return None
+
+    header_runs = lines[header_index]
+    header = [run.text for run in header_runs]
+    boundaries = [
+        (left.x + right.x) / 2
+        for left, right in zip(header_runs, header_runs[1:])
+    ]
+    anchor_column = next(
+        index
+        for index, name in enumerate(header)
+        if ANCHOR_KEYWORD in name
+    )
+
+    rulings = collect_rulings(page)
+    header_y = header_runs[0].y
+    row_edges = _ruling_edges(rulings, header_runs[anchor_column].x, header_y)
+    if len(row_edges) < 2:
+        return None
+
+    column_edges = [
+        _ruling_edges(rulings, run.x, header_y) or row_edges
+        for run in header_runs
+    ]
+
+    def row_of(column: int, y: float) -> int | None:
+        if not row_edges[-1] < y < row_edges[0]:
+            return None
+
+        # 单元格上边是本列在这段文字上方最近的横线，单元格归入这条横线下的第一行。
+        cell_top = min(
+            (edge for edge in column_edges[column] if edge > y),
+            default=row_edges[0],
+        )
+        return next(
+            index
+            for index, bottom in enumerate(row_edges[1:])
+            if bottom < cell_top - RULING_TOLERANCE
+        )
+
+    cells: list[list[list[str]]] = [
+        [[] for _ in header]
+        for _ in row_edges[1:]
+    ]
+
+    for line in lines[header_index + 1:]:
+        line_cells: dict[tuple[int, int], list[str]] = {}
+        for run in line:
+            column = _column_index(run.x, boundaries)
+            row = row_of(column, run.y)
+            if row is not None:
+                line_cells.setdefault((row, column), []).append(run.text)
+
+        for (row, column), parts in line_cells.items():
+            cells[row][column].append(" ".join(parts))
+
+    return [header] + [_join_cells(row) for row in cells]
+
+
+def _find_column(header: list[str], *keywords: str) -> int | None:
+    for index, name in enumerate(header):
+        compact_name = name.replace(" ", "")
+        if any(keyword.replace(" ", "") in compact_name for keyword in keywords):
+            return index
+
+    return None
+
+
+def parse_table_page(
+    page_number: int,
+    page: PageObject,
+    warehouse: str,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]] | None:
+    """
+    用坐标重建的表格解析单页，明细和异常的字段与文本解析一致。
+
+    列的识别和逐行规则沿用 app.py 的表格版：SKC 从商品信息列向下延续，
+    没有货号或含“合计”的行跳过。找不到表头或必要列时返回 None。
+    """
+    table = extract_table_rows(page)
+    if not table:
+        return None
+
+    header = table[0]
+    sku_code_column = _find_column(header, "货号", "编码")
+    info_column = _find_column(header, "商品信息")
+    qty_column = _find_column(header, "发货数")
+    sku_id_column = _find_column(header, "SKU ID")
+    attribute_column = _find_column(header, "属性")
+
+    if sku_code_column is None or info_column is None or qty_column is None:
+        return None
+
+    records: list[dict[str, Any]] = []
+    issues: list[dict[str, Any]] = []
+    active_skc = ""
+
+    for row_number, row in enumerate(table[1:], start=2):
+        skc_match = TABLE_SKC_PATTERN.search(row[info_column])
+        if skc_match:
+            active_skc = skc_match.group(1)
+
+        if not row[sku_code_column] or any("合计" in cell for cell in row):
+            continue
+
+        sku_id = (
+            normalize_key(row[sku_id_column])
+            if sku_id_column is not None
+            else ""
+        )
+        sku_code = normalize_key(row[sku_code_column])
+        qty_text = normalize_key(row[qty_column])
+        attribute = (
+            " ".join(row[attribute_column].split())
+            if attribute_column is not None
+            else ""
+        )
+
+        if not sku_id or not sku_code or not qty_text.isdigit():
+            issues.append(
+                {
+                    "页码": page_number,
+                    "行号": row_number,
+                    "问题类型": "明细字段不完整",
+                    "原始内容": " ".join(cell for cell in row if cell),
+                }
+            )
+            continue
+
+        records.append(
+            {
+                "页码": page_number,
+                "发货仓库": warehouse,
+                "SKC ID": active_skc,
+                "SKU ID": sku_id,
+                "货品编码": sku_code,
+                "发货数量": int(qty_text),
+                "属性集": attribute,
+                "原始内容": " ".join(
+                    part
+                    for part in [attribute, sku_id, sku_code, qty_text]
+                    if part
+                ),
+            }
+        )
+
+    if not records:
+        issues.append(
+            {
+                "页码": page_number,
+                "行号": "-",
+                "问题类型": "本页未提取到明细",
+                "原始内容": "",
+            }
+        )
+
+    return records, issues
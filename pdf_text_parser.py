@@ -0,0 +1,711 @@
+import hashlib
+import io
+import itertools
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Iterator, Sequence
+
+from pypdf import PageObject, PdfReader
+from pypdf.generic import (
+    ArrayObject,
+    DictionaryObject,
+    IndirectObject,
+    PdfObject,
+    StreamObject,
+)
+
+from page_cache import PageCache
+from pdf_layout import parse_table_page
+from process_pool import new_process_pool
+from reference_data import normalize_key
+
+
+# 每个进程任务至少处理的页数，页数太少时启动进程的开销比解析本身还大。
+MIN_PAGES_PER_TASK = 8
+
+# 修改解析逻辑后递增，让页缓存里旧规则解析出的结果全部失效。
+PARSER_VERSION = "3"
+
+# 文本解析给出这些异常的页，再用按坐标重建表格的引擎重新解析一次。
+TABLE_FALLBACK_ISSUE_TYPES = {
+    "本页未提取到明细",
+    "明细字段不完整",
+}
+
+ENGINE_TEXT = "文本"
+ENGINE_TABLE = "表格"
+
+# 字体程序只影响字形外观，不影响文本提取，计算页指纹时跳过以免读取大块数据。
+_FINGERPRINT_SKIPPED_KEYS = {
+    "/Parent",
+    "/FontFile",
+    "/FontFile2",
+    "/FontFile3",
+}
+
+SKC_PATTERN = re.compile(r"SKC[:：]\s*(\d+)")
+
+# 行尾固定为：SKU ID + SKU货号 + 实际发货数。
+# 属性集允许为空，因为它可能被拆到前一行或前几行。
+DETAIL_PATTERN = re.compile(
+    r"^(?P<attribute>.*?)\s*"
+    r"(?P<sku_id>\d{8,})\s+"
+    r"(?P<sku_code>[A-Za-z0-9_-]{5,})\s+"
+    r"(?P<qty>\d+)\s*$"
+)
+
+SKIP_PATTERNS = [
+    r"^序号\s+商品信息",
+    r"^SKC货号[:：]?$",
+    r"^备货母单号[:：]",
+    r"^备货单号[:：]",
+    r"^数量[:：]",
+    r"^创建时间[:：]",
+    r"^要求发货时间[:：]",
+    r"^【VMI】$",
+    r"^\[VMI\]$",
+    r"^合计(?:\s+\d+)?$",
+    r"^收货仓[:：]",
+    r"^拣货单$",
+    r"^打印时间[:：]",
+    r"^第\d+页/共\d+页$",
+    r"^\d+$",
+    r"^\d{1,2}:\d{2}$",
+]
+
+
+# 所有跳过规则都以 ^ 开头，合并成一个交替式后只需匹配一次。
+SKIP_PATTERN = re.compile("|".join(f"(?:{pattern})" for pattern in SKIP_PATTERNS))
+
+# 行的分类结果。
+LINE_SKC_HEADER = "SKC 行"
+LINE_DETAIL = "明细行"
+LINE_SKIP = "跳过"
+LINE_ATTRIBUTE = "属性集续行"
+LINE_OUTSIDE_SKC = "SKC 之外"
+
+
+def _skip_first_chars(patterns: list[str]) -> tuple[frozenset[str], bool] | None:
+    """
+    汇总跳过规则可能的首字符，返回 (首字符集合, 是否允许数字开头)。
+
+    只要有一条规则的首字符不是普通字符、转义字符或 \\d，就返回 None，不做首字符预筛。
+    """
+    first_chars: set[str] = set()
+    allows_digit = False
+
+    for pattern in patterns:
+        if not pattern.startswith("^") or "|" in pattern:
+            return None
+
+        body = pattern[1:]
+        token_length = 2 if body.startswith("\\") else 1
+
+        # 首个字符后面跟着可为零次的量词时，首字符并不确定。
+        if body[token_length:token_length + 1] in {"?", "*"} or body[
+            token_length:
+        ].startswith("{0"):
+            return None
+
+        if body.startswith("\\d"):
+            allows_digit = True
+        elif body.startswith("\\") and len(body) > 1 and not body[1].isalnum():
+            first_chars.add(body[1])
+        elif body and body[0] not in ".^$*+?{}[]()|\\":
+            first_chars.add(body[0])
+        else:
+            return None
+
+    return frozenset(first_chars), allows_digit
+
+
+_SKIP_PREFILTER = _skip_first_chars(SKIP_PATTERNS)
+
+
+def classify_line(
+    line: str,
+    in_skc_block: bool,
+) -> tuple[str, re.Match[str] | None]:
+    """
+    一次判断一行属于 SKC 行、明细行、跳过行还是属性集续行。
+
+    先用子串和首尾字符做廉价预筛，只有可能命中的行才跑对应的预编译正则。
+    判定顺序与原先逐条 re.search 的逻辑一致：SKC 优先，其次明细，最后跳过规则。
+    """
+    if "SKC" in line:
+        skc_match = SKC_PATTERN.search(line)
+        if skc_match:
+            return LINE_SKC_HEADER, skc_match
+
+    # 进入 SKC 之前的行既不是明细也不需要缓存属性集。
+    if not in_skc_block:
+        return LINE_OUTSIDE_SKC, None
+
+    # 明细行以发货数结尾，最后一个字符一定是数字。
+    if line[-1].isdecimal():
+        detail_match = DETAIL_PATTERN.match(line)
+        if detail_match:
+            return LINE_DETAIL, detail_match
+
+    if _SKIP_PREFILTER is not None:
+        first_chars, allows_digit = _SKIP_PREFILTER
+        first_char = line[0]
+        if first_char not in first_chars and not (
+            allows_digit and first_char.isdecimal()
+        ):
+            return LINE_ATTRIBUTE, None
+
+    if SKIP_PATTERN.match(line):
+        return LINE_SKIP, None
+
+    return LINE_ATTRIBUTE, None
+
+
+def extract_warehouse(text: str) -> str:
+    match = re.search(
+        r"收货仓[:：]\s*(.+?)(?:\s+拣货单|\s+打印时间|\s+第\d+页/共\d+页|$)",
+        text,
+    )
+    return match.group(1).strip() if match else "未知"
+
+
+def parse_page_text(
+    page_number: int,
+    text: str,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    解析单页文本。每页都会重置 SKC 和属性集缓存，页与页之间互不依赖。
+
+    兼容属性集被 PDF 拆成多行的情况，例如：
+    Fishing Rod
+    Stand's Holder 69172597734 Y060525004 15
+    """
+    records: list[dict[str, Any]] = []
+    issues: list[dict[str, Any]] = []
+
+    warehouse = extract_warehouse(text)
+    active_skc = ""
+    attribute_buffer: list[str] = []
+    parsed_on_page = 0
+
+    lines = [
+        line.strip()
+        for line in text.splitlines()
+        if line and line.strip()
+    ]
+
+    for line_number, line in enumerate(lines, start=1):
+        line_kind, match = classify_line(line, bool(active_skc))
+
+        if line_kind == LINE_SKC_HEADER:
+            active_skc = match.group(1)
+            attribute_buffer = []
+            continue
+
+        if line_kind == LINE_DETAIL:
+            detail_match = match
+            inline_attribute = detail_match.group("attribute").strip()
+            attribute_parts = [
+                part
+                for part in attribute_buffer + [inline_attribute]
+                if part
+            ]
+            attribute = " ".join(attribute_parts).strip()
+            attribute_buffer = []
+
+            sku_id = normalize_key(detail_match.group("sku_id"))
+            sku_code = normalize_key(detail_match.group("sku_code"))
+            qty_text = normalize_key(detail_match.group("qty"))
+
+            if not sku_id or not sku_code or not qty_text.isdigit():
+                issues.append(
+                    {
+                        "页码": page_number,
+                        "行号": line_number,
+                        "问题类型": "明细字段不完整",
+                        "原始内容": line,
+                    }
+                )
+                continue
+
+            records.append(
+                {
+                    "页码": page_number,
+                    "发货仓库": warehouse,
+                    "SKC ID": active_skc,
+                    "SKU ID": sku_id,
+                    "货品编码": sku_code,
+                    "发货数量": int(qty_text),
+                    "属性集": attribute,
+                    "原始内容": " ".join(attribute_parts + [sku_id, sku_code, qty_text]),
+                }
+            )
+            parsed_on_page += 1
+            continue
+
+        # 只有进入某个 SKC 后，才缓存可能被拆行的属性集文本。
+        if line_kind == LINE_ATTRIBUTE:
+            attribute_buffer.append(line)
+
+    if warehouse == "未知":
+        issues.append(
+            {
+                "页码": page_number,
+                "行号": "-",
+                "问题类型": "未识别到发货仓库",
+                "原始内容": "",
+            }
+        )
+
+    if parsed_on_page == 0:
+        issues.append(
+            {
+                "页码": page_number,
+                "行号": "-",
+                "问题类型": "本页未提取到明细",
+                "原始内容": "",
+            }
+        )
+
+    return records, issues
+
+
+def _update_fingerprint(
+    digest: Any,
+    value: PdfObject,
+    visited: set[tuple[int, int]],
+) -> None:
+    if isinstance(value, IndirectObject):
+        reference = (value.idnum, value.generation)
+        if reference in visited:
+            digest.update(b"<visited>")
+            return
+        visited.add(reference)
+        value = value.get_object()
+
+    if isinstance(value, DictionaryObject):
+        digest.update(b"<<")
+        for key in sorted(value):
+            if key in _FINGERPRINT_SKIPPED_KEYS:
+                continue
+            digest.update(key.encode("utf-8"))
+            _update_fingerprint(digest, value.get(key), visited)
+        digest.update(b">>")
+
+        # 图片数据与文本无关；其余流（ToUnicode、表单 XObject 等）都计入指纹。
+        if isinstance(value, StreamObject) and value.get("/Subtype") != "/Image":
+            digest.update(value.get_data())
+    elif isinstance(value, ArrayObject):
+        digest.update(b"[")
+        for item in value:
+            _update_fingerprint(digest, item, visited)
+        digest.update(b"]")
+    else:
+        digest.update(repr(value).encode("utf-8"))
+
+
+def page_fingerprint(page: PageObject, table_fallback: bool = True) -> str:
+    """
+    按页内容流、页面资源（字体编码、表单 XObject）和旋转角度计算单页指纹。
+
+    同一页重新出具时指纹不变，与它在文档中的页码无关；
+    是否启用表格兜底会影响解析结果，因此也计入指纹。
+    """
+    digest = hashlib.sha256(PARSER_VERSION.encode("utf-8"))
+    digest.update(b"table" if table_fallback else b"text")
+    visited: set[tuple[int, int]] = set()
+
+    contents = page.get_contents()
+    digest.update(contents.get_data() if contents is not None else b"")
+    _update_fingerprint(digest, page.get("/Resources"), visited)
+    _update_fingerprint(digest, page.get("/Rotate"), visited)
+
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class PageResult:
+    """单页解析结果，page_count 是整份 PDF 的页数，便于调用方显示进度。"""
+
+    page_number: int
+    page_count: int
+    records: list[dict[str, Any]]
+    issues: list[dict[str, Any]]
+    engine: str = ENGINE_TEXT
+    from_cache: bool = False
+
+    def ends_preview(self, preview_pages: int) -> bool:
+        """是否为先行解析的最后一页（PDF 不足 preview_pages 页时即最后一页）。"""
+        return (
+            preview_pages > 0
+            and self.page_number == min(preview_pages, self.page_count)
+        )
+
+
+ParsedPage = tuple[int, list[dict[str, Any]], list[dict[str, Any]], str]
+
+
+def _needs_table_fallback(issues: list[dict[str, Any]]) -> bool:
+    return any(
+        issue["问题类型"] in TABLE_FALLBACK_ISSUE_TYPES
+        for issue in issues
+    )
+
+
+def _parse_page(
+    page_number: int,
+    page: PageObject,
+    table_fallback: bool,
+) -> ParsedPage:
+    """
+    先按文本解析；文本解析失败或有不完整明细时，再用表格引擎重解析这一页。
+
+    表格引擎的明细只有 SKC ID 和货号都不为空才算数，缺任一项的行改记为
+    “明细字段不完整”；按此计数，表格引擎提取到更多明细（或明细一样多但不完整的行更少）
+    时才采用它的结果，文本解析给出的其他异常（例如未识别到发货仓库）仍然保留。
+    """
+    text = page.extract_text() or ""
+    records, issues = parse_page_text(page_number, text)
+
+    if not table_fallback or not _needs_table_fallback(issues):
+        return page_number, records, issues, ENGINE_TEXT
+
+    table_result = parse_table_page(page_number, page, extract_warehouse(text))
+    if table_result is None:
+        return page_number, records, issues, ENGINE_TEXT
+
+    table_records: list[dict[str, Any]] = []
+    table_issues = list(table_result[1])
+    for record in table_result[0]:
+        if record["SKC ID"] and record["货品编码"]:
+            table_records.append(record)
+        else:
+            table_issues.append(
+                {
+                    "页码": page_number,
+                    "行号": "-",
+                    "问题类型": "明细字段不完整",
+                    "原始内容": record["原始内容"],
+                }
+            )
+
+    def score(
+        candidate_records: list[dict[str, Any]],
+        candidate_issues: list[dict[str, Any]],
+    ) -> tuple[int, int]:
+        incomplete = sum(
+            issue["问题类型"] == "明细字段不完整"
+            for issue in candidate_issues
+        )
+        return len(candidate_records), -incomplete
+
+    if score(table_records, table_issues) <= score(records, issues):
+        return page_number, records, issues, ENGINE_TEXT
+
+    kept_issues = [
+        issue
+        for issue in issues
+        if issue["问题类型"] not in TABLE_FALLBACK_ISSUE_TYPES
+    ]
+    return page_number, table_records, kept_issues + table_issues, ENGINE_TABLE
+
+
+def _parse_pages(
+    reader: PdfReader,
+    page_numbers: list[int],
+    table_fallback: bool,
+) -> Iterator[ParsedPage]:
+    """按给定顺序逐页解析（页码从 1 开始）。"""
+    for page_number in page_numbers:
+        yield _parse_page(page_number, reader.pages[page_number - 1], table_fallback)
+
+
+def _parse_page_numbers(
+    pdf_bytes: bytes,
+    page_numbers: list[int],
+    table_fallback: bool,
+) -> list[ParsedPage]:
+    """进程池任务入口：各进程自行打开 PDF，只解析分到的页，需要兜底的页也在本进程内重解析。"""
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    return list(_parse_pages(reader, page_numbers, table_fallback))
+
+
+def _iter_parsed_pages(
+    reader: PdfReader,
+    pdf_bytes: bytes,
+    page_numbers: list[int],
+    workers: int,
+    table_fallback: bool,
+) -> Iterator[ParsedPage]:
+    """
+    按顺序解析给定的页。
+
+    workers 大于 1 且页数足够时，把连续的若干页分给进程池并行解析，
+    以任务为单位按顺序产出；提前停止迭代时，尚未开始的任务会被取消。
+    """
+    task_count = min(workers * 4, len(page_numbers) // MIN_PAGES_PER_TASK)
+
+    if workers <= 1 or task_count < 2:
+        yield from _parse_pages(reader, page_numbers, table_fallback)
+        return
+
+    pages_per_task = math.ceil(len(page_numbers) / task_count)
+    page_groups = [
+        page_numbers[start:start + pages_per_task]
+        for start in range(0, len(page_numbers), pages_per_task)
+    ]
+
+    with new_process_pool(workers) as pool:
+        futures = [
+            pool.submit(_parse_page_numbers, pdf_bytes, page_group, table_fallback)
+            for page_group in page_groups
+        ]
+
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def _with_page_number(
+    rows: list[dict[str, Any]],
+    page_number: int,
+) -> list[dict[str, Any]]:
+    """缓存里的页可能来自另一份文档的其他页码，取出时改成当前页码。"""
+    return [{**row, "页码": page_number} for row in rows]
+
+
+def _iter_page_range(
+    reader: PdfReader,
+    pdf_bytes: bytes,
+    page_numbers: range,
+    workers: int,
+    page_cache: PageCache | None,
+    table_fallback: bool,
+) -> Iterator[PageResult]:
+    """按页码顺序产出一段连续页的解析结果，先查页缓存，未命中的页解析后写回。"""
+    page_count = len(reader.pages)
+    page_keys: dict[int, str] = {}
+    cached_pages: dict[int, tuple[list[dict[str, Any]], list[dict[str, Any]], str]] = {}
+
+    if page_cache is not None:
+        for page_number in page_numbers:
+            page_keys[page_number] = page_fingerprint(
+                reader.pages[page_number - 1],
+                table_fallback,
+            )
+            cached = page_cache.get(page_keys[page_number])
+            if cached is not None:
+                cached_pages[page_number] = cached
+
+    pending_pages = [
+        page_number
+        for page_number in page_numbers
+        if page_number not in cached_pages
+    ]
+    parsed_pages = _iter_parsed_pages(
+        reader,
+        pdf_bytes,
+        pending_pages,
+        workers,
+        table_fallback,
+    )
+
+    try:
+        for page_number in page_numbers:
+            if page_number in cached_pages:
+                page_records, page_issues, engine = cached_pages.pop(page_number)
+                yield PageResult(
+                    page_number,
+                    page_count,
+                    _with_page_number(page_records, page_number),
+                    _with_page_number(page_issues, page_number),
+                    engine=engine,
+                    from_cache=True,
+                )
+                continue
+
+            _, page_records, page_issues, engine = next(parsed_pages)
+
+            if page_cache is not None:
+                page_cache.put(
+                    page_keys[page_number],
+                    page_records,
+                    page_issues,
+                    engine,
+                )
+
+            yield PageResult(
+                page_number,
+                page_count,
+                page_records,
+                page_issues,
+                engine=engine,
+            )
+    finally:
+        parsed_pages.close()
+
+        if page_cache is not None and pending_pages:
+            page_cache.prune()
+
+
+def iter_pdf_pages(
+    pdf_bytes: bytes,
+    workers: int = 1,
+    page_cache: PageCache | None = None,
+    table_fallback: bool = True,
+    preview_pages: int = 0,
+) -> Iterator[PageResult]:
+    """
+    按页码顺序逐页产出解析结果，每页解析完就交给调用方，不必等整份 PDF 结束。
+
+    传入 page_cache 时先按页指纹查缓存，只有未命中的页才提取文本和逐行解析，
+    解析结果随即写回缓存；重新出具、只改了少数页的拣货单因此只解析变化的页。
+    table_fallback 为 True 时，文本解析失败的页改用表格引擎重解析，
+    只有这些少数页承担表格重建的开销。
+    preview_pages 大于 0 时，前几页在当前进程里立即解析并产出，
+    不等进程池启动、也不等整份 PDF 的页指纹算完，其余页再按 workers 并行解析。
+    """
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    page_count = len(reader.pages)
+    preview_end = min(max(preview_pages, 0), page_count)
+
+    if preview_end > 0:
+        yield from _iter_page_range(
+            reader,
+            pdf_bytes,
+            range(1, preview_end + 1),
+            1,
+            page_cache,
+            table_fallback,
+        )
+
+    yield from _iter_page_range(
+        reader,
+        pdf_bytes,
+        range(preview_end + 1, page_count + 1),
+        workers,
+        page_cache,
+        table_fallback,
+    )
+
+
+def parse_document(
+    pdf_bytes: bytes,
+    cache_directory: str | None,
+    cache_max_bytes: int,
+    table_fallback: bool,
+) -> list[PageResult]:
+    """
+    进程池任务入口：在子进程内单进程解析整份 PDF。
+
+    页缓存对象不跨进程传递，按目录和大小上限在子进程里重新打开；cache_directory 为 None 时不用页缓存。
+    """
+    page_cache = (
+        PageCache(cache_directory, cache_max_bytes)
+        if cache_directory is not None
+        else None
+    )
+    return list(
+        iter_pdf_pages(
+            pdf_bytes,
+            page_cache=page_cache,
+            table_fallback=table_fallback,
+        )
+    )
+
+
+def iter_pdf_documents(
+    documents: Sequence[bytes],
+    workers: int = 1,
+    page_cache: PageCache | None = None,
+    table_fallback: bool = True,
+    preview_pages: int = 0,
+) -> Iterator[tuple[int, PageResult]]:
+    """
+    批量解析多份 PDF，按上传顺序产出 (文档序号, 单页结果)。
+
+    只有一份时按页分段并行、逐页产出；多份时每份 PDF 作为一个任务分给进程池，
+    各文件之间并行解析，某份解析完成后依次产出它的各页。
+    preview_pages 只作用于第一份 PDF：它的前几页在当前进程里先行解析产出。
+    """
+    if len(documents) == 1 or workers <= 1:
+        for document_index, pdf_bytes in enumerate(documents):
+            for page in iter_pdf_pages(
+                pdf_bytes,
+                workers=workers,
+                page_cache=page_cache,
+                table_fallback=table_fallback,
+                preview_pages=preview_pages if document_index == 0 else 0,
+            ):
+                yield document_index, page
+        return
+
+    with new_process_pool(min(workers, len(documents))) as pool:
+        futures = [
+            pool.submit(
+                parse_document,
+                pdf_bytes,
+                page_cache.directory if page_cache is not None else None,
+                page_cache.max_bytes if page_cache is not None else 0,
+                table_fallback,
+            )
+            for pdf_bytes in documents
+        ]
+
+        try:
+            # 进程池已在解析各份 PDF，同时在当前进程里先解析第一份的前几页；
+            # 这几页稍后会在进程池的结果里再出现一次，届时跳过。
+            preview_end = 0
+            if preview_pages > 0:
+                preview = iter_pdf_pages(
+                    documents[0],
+                    page_cache=page_cache,
+                    table_fallback=table_fallback,
+                    preview_pages=preview_pages,
+                )
+                for page in itertools.islice(preview, preview_pages):
+                    preview_end = page.page_number
+                    yield 0, page
+                preview.close()
+
+            for document_index, future in enumerate(futures):
+                for page in future.result():
+                    if document_index == 0 and page.page_number <= preview_end:
+                        continue
+                    yield document_index, page
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def parse_pdf_text(
+    pdf_bytes: bytes,
+    workers: int = 1,
+    page_cache: PageCache | None = None,
+    table_fallback: bool = True,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    从 PDF 文本层提取明细。
+
+    workers 大于 1 且页数足够时，把连续的页段分给进程池并行解析，
+    再按页码顺序合并明细和异常，结果与逐页串行解析完全一致。
+    传入 page_cache 时，内容未变的页直接复用缓存结果；
+    table_fallback 为 True 时，文本解析失败的页由表格引擎补救。
+    """
+    records: list[dict[str, Any]] = []
+    issues: list[dict[str, Any]] = []
+
+    for page in iter_pdf_pages(
+        pdf_bytes,
+        workers=workers,
+        page_cache=page_cache,
+        table_fallback=table_fallback,
+    ):
+        records.extend(page.records)
+        issues.extend(page.issues)
+
+    return records, issues
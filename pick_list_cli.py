@@ -0,0 +1,445 @@
+"""
+命令行批量处理拣货单，不导入 Streamlit，供夜间批处理直接调用。
+
+与页面共用同一套解析、匹配校验和 Excel 导出逻辑。每个工作进程启动时加载一次基础表
+（命中快照时很快），之后逐个文件解析、校验；默认每份 PDF 输出一个工作簿，
+加 --merge 时合并成一个带来源文件列的工作簿。
+
+用法（在仓库根目录执行）：
+    python pick_list_cli.py 拣货单目录 "归档/2026-07-*/*.pdf" -o 输出目录 [--merge] [--workers 4]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+import pandas as pd
+
+from enrichment import SOURCE_COLUMN, ResultBuilder
+from excel_export import write_excel
+from page_cache import PAGE_CACHE_DIR_NAME, PageCache
+from pdf_text_parser import iter_pdf_pages
+from process_pool import new_process_pool
+from reference_data import ReferenceIndex, load_reference_index
+from validation_rules import (
+    DEFAULT_RULE_NAMES,
+    OPTIONAL_RULE_NAMES,
+    ValidationRule,
+    needs_review,
+    resolve_rules,
+)
+
+
+MERGED_FILE_NAME = "拣货单提取结果_合并.xlsx"
+OUTPUT_SUFFIX = "_提取结果.xlsx"
+
+
+@dataclass
+class FileOutcome:
+    """单个 PDF 的处理结果。合并模式下带回三张表，逐文件模式下只带回统计。"""
+
+    path: str
+    row_count: int = 0
+    problem_count: int = 0
+    issue_count: int = 0
+    output_path: str | None = None
+    tables: tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame] | None = None
+    error: str | None = None
+
+
+# 工作进程内的共享状态，由 _init_worker 在进程启动时设置一次。
+_worker_reference: ReferenceIndex | None = None
+_worker_page_cache: PageCache | None = None
+_worker_table_fallback = True
+_worker_rules: list[ValidationRule] | None = None
+
+
+def collect_pdf_paths(patterns: Iterable[str], recursive: bool = False) -> list[str]:
+    """把目录、通配符和文件路径展开成去重后的 PDF 列表，保持参数顺序。"""
+    paths: list[str] = []
+
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            directory_glob = "**/*" if recursive else "*"
+            matches = sorted(
+                path
+                for path in glob.glob(
+                    os.path.join(glob.escape(pattern), directory_glob),
+                    recursive=recursive,
+                )
+                if path.lower().endswith(".pdf") and os.path.isfile(path)
+            )
+        elif glob.has_magic(pattern):
+            matches = sorted(
+                path
+                for path in glob.glob(pattern, recursive=True)
+                if os.path.isfile(path)
+            )
+        else:
+            matches = [pattern]
+
+        paths.extend(matches)
+
+    return list(dict.fromkeys(os.path.normpath(path) for path in paths))
+
+
+def output_paths(pdf_paths: list[str], output_dir: str) -> dict[str, str]:
+    """逐文件模式下每份 PDF 的输出路径；不同目录下同名的文件依次加序号区分。"""
+    taken: set[str] = set()
+    outputs: dict[str, str] = {}
+
+    for pdf_path in pdf_paths:
+        stem = os.path.splitext(os.path.basename(pdf_path))[0]
+        candidate = stem
+        counter = 2
+
+        while candidate in taken:
+            candidate = f"{stem}_{counter}"
+            counter += 1
+
+        taken.add(candidate)
+        outputs[pdf_path] = os.path.join(output_dir, candidate + OUTPUT_SUFFIX)
+
+    return outputs
+
+
+def _init_worker(
+    info_path: str,
+    name_path: str,
+    cache_directory: str | None,
+    table_fallback: bool,
+    rule_names: tuple[str, ...] = DEFAULT_RULE_NAMES,
+) -> None:
+    global _worker_reference, _worker_page_cache, _worker_table_fallback, _worker_rules
+
+    _worker_reference = load_reference_index(info_path, name_path)
+    _worker_page_cache = (
+        PageCache(cache_directory)
+        if cache_directory is not None
+        else None
+    )
+    _worker_table_fallback = table_fallback
+    _worker_rules = resolve_rules(rule_names)
+
+
+def write_atomically(path: str, data: bytes) -> None:
+    """先写临时文件再替换，读取方不会看到写了一半的工作簿。"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        with open(temp_path, "wb") as handle:
+            handle.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_excel_atomically(
+    path: str,
+    result_df: pd.DataFrame,
+    validation_df: pd.DataFrame,
+    parse_issues_df: pd.DataFrame,
+) -> None:
+    """把工作簿按行直接写到临时文件再替换，不在内存里攒整份工作簿字节。"""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        write_excel(temp_path, result_df, validation_df, parse_issues_df)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def process_pdf(
+    pdf_path: str,
+    pdf_bytes: bytes,
+    output_path: str | None,
+    reference: ReferenceIndex,
+    page_cache: PageCache | None = None,
+    table_fallback: bool = True,
+    with_source: bool = False,
+    page_workers: int = 1,
+    rules: list[ValidationRule] | None = None,
+) -> FileOutcome:
+    """
+    解析并校验一份 PDF。给了 output_path 就直接写出工作簿，否则把三张表带回给调用方。
+
+    单个文件出错只记录在结果里，不影响同批其他文件。
+    """
+    outcome = FileOutcome(path=pdf_path)
+
+    try:
+        builder = ResultBuilder(reference, with_source=with_source, rules=rules)
+        source_name = os.path.basename(pdf_path)
+
+        for page in iter_pdf_pages(
+            pdf_bytes,
+            workers=page_workers,
+            page_cache=page_cache,
+            table_fallback=table_fallback,
+        ):
+            builder.add_page(page, source_name)
+
+        result_df, validation_df, parse_issues_df = builder.build()
+    except Exception as exc:
+        outcome.error = f"{type(exc).__name__}: {exc}"
+        return outcome
+
+    outcome.row_count = len(result_df)
+    outcome.issue_count = len(parse_issues_df)
+    outcome.problem_count = int(needs_review(validation_df).sum())
+
+    if output_path is None:
+        outcome.tables = (result_df, validation_df, parse_issues_df)
+        return outcome
+
+    try:
+        write_excel_atomically(
+            output_path,
+            result_df,
+            validation_df,
+            parse_issues_df,
+        )
+    except Exception as exc:
+        outcome.error = f"写出 {output_path} 失败：{type(exc).__name__}: {exc}"
+        return outcome
+
+    outcome.output_path = output_path
+    return outcome
+
+
+def _process_file(
+    pdf_path: str,
+    output_path: str | None,
+    with_source: bool,
+    page_workers: int = 1,
+) -> FileOutcome:
+    """工作进程任务入口：读入文件后用进程内共享的基础表处理。"""
+    try:
+        with open(pdf_path, "rb") as handle:
+            pdf_bytes = handle.read()
+    except OSError as exc:
+        return FileOutcome(path=pdf_path, error=f"{type(exc).__name__}: {exc}")
+
+    return process_pdf(
+        pdf_path,
+        pdf_bytes,
+        output_path,
+        _worker_reference,
+        page_cache=_worker_page_cache,
+        table_fallback=_worker_table_fallback,
+        with_source=with_source,
+        page_workers=page_workers,
+        rules=_worker_rules,
+    )
+
+
+def process_files(
+    pdf_paths: list[str],
+    outputs: dict[str, str] | None,
+    workers: int,
+    init_args: tuple[str, str, str | None, bool, tuple[str, ...]],
+) -> Iterator[FileOutcome]:
+    """
+    按输入顺序产出每个文件的处理结果。
+
+    多个文件时按文件分给进程池；只有一个文件时在本进程内按页分段并行。
+    """
+    with_source = outputs is None
+
+    if workers <= 1 or len(pdf_paths) == 1:
+        _init_worker(*init_args)
+        for pdf_path in pdf_paths:
+            yield _process_file(
+                pdf_path,
+                outputs[pdf_path] if outputs is not None else None,
+                with_source,
+                page_workers=workers,
+            )
+        return
+
+    with new_process_pool(
+        min(workers, len(pdf_paths)),
+        initializer=_init_worker,
+        initargs=init_args,
+    ) as pool:
+        yield from pool.map(
+            _process_file,
+            pdf_paths,
+            [
+                outputs[pdf_path] if outputs is not None else None
+                for pdf_path in pdf_paths
+            ],
+            [with_source] * len(pdf_paths),
+        )
+
+
+def merge_tables(
+    tables: list[tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]],
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """按输入顺序合并各文件的三张表，结果行号改成跨文件连续编号。"""
+    result_parts: list[pd.DataFrame] = []
+    validation_parts: list[pd.DataFrame] = []
+    issue_parts: list[pd.DataFrame] = []
+    row_offset = 0
+
+    for result_df, validation_df, parse_issues_df in tables:
+        if not result_df.empty:
+            result_parts.append(result_df)
+            validation_df = validation_df.copy()
+            validation_df["结果行号"] += row_offset
+            validation_parts.append(validation_df)
+            row_offset += len(result_df)
+
+        if not parse_issues_df.empty:
+            issue_parts.append(parse_issues_df)
+
+    empty_result, empty_validation, empty_issues = tables[0]
+
+    return (
+        pd.concat(result_parts, ignore_index=True) if result_parts else empty_result,
+        pd.concat(validation_parts, ignore_index=True) if validation_parts else empty_validation,
+        pd.concat(issue_parts, ignore_index=True) if issue_parts else empty_issues,
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="批量提取并校验 PDF 拣货单，输出 Excel。",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="PDF 文件、目录或通配符（通配符请加引号）",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        default="输出",
+        help="输出目录，默认 ./输出",
+    )
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help=f"合并成一个工作簿（{MERGED_FILE_NAME}），三张表都带“{SOURCE_COLUMN}”列",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="工作进程数，默认等于 CPU 核数",
+    )
+    parser.add_argument(
+        "-r",
+        "--recursive",
+        action="store_true",
+        help="目录参数递归查找子目录中的 PDF",
+    )
+    parser.add_argument(
+        "--info",
+        default="product_info.xlsx",
+        help="商品基础信息表，默认 product_info.xlsx",
+    )
+    parser.add_argument(
+        "--name-map",
+        default="name_map.xlsx",
+        help="商品名称对照表，默认 name_map.xlsx",
+    )
+    parser.add_argument(
+        "--no-table-fallback",
+        action="store_true",
+        help="文本解析失败的页不再用表格引擎重试",
+    )
+    parser.add_argument(
+        "--no-page-cache",
+        action="store_true",
+        help=f"不读写页缓存（{PAGE_CACHE_DIR_NAME}/）",
+    )
+    parser.add_argument(
+        "--check",
+        action="append",
+        choices=OPTIONAL_RULE_NAMES,
+        default=[],
+        help="在默认校验之外追加的提示级校验，可重复指定",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    started = time.perf_counter()
+
+    pdf_paths = collect_pdf_paths(args.inputs, recursive=args.recursive)
+    if not pdf_paths:
+        print("没有找到任何 PDF 文件。", file=sys.stderr)
+        return 2
+
+    # 先在主进程加载一次基础表：列名有问题时尽早报错，快照失效时也只重建一次。
+    try:
+        load_reference_index(args.info, args.name_map)
+    except Exception as exc:
+        print(f"基础 Excel 读取或列名识别失败：{exc}", file=sys.stderr)
+        return 2
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    outputs = None if args.merge else output_paths(pdf_paths, args.output_dir)
+    init_args = (
+        args.info,
+        args.name_map,
+        None if args.no_page_cache else PAGE_CACHE_DIR_NAME,
+        not args.no_table_fallback,
+        DEFAULT_RULE_NAMES + tuple(dict.fromkeys(args.check)),
+    )
+
+    merged_tables: list[tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]] = []
+    failed = 0
+
+    for index, outcome in enumerate(
+        process_files(pdf_paths, outputs, max(args.workers, 1), init_args),
+        start=1,
+    ):
+        prefix = f"[{index}/{len(pdf_paths)}] {outcome.path}"
+
+        if outcome.error is not None:
+            failed += 1
+            print(f"{prefix}：失败，{outcome.error}", file=sys.stderr)
+            continue
+
+        summary = (
+            f"{prefix}：{outcome.row_count} 行，"
+            f"需人工复核 {outcome.problem_count} 行，"
+            f"解析异常 {outcome.issue_count} 条"
+        )
+        if outcome.output_path is not None:
+            summary += f" -> {outcome.output_path}"
+        print(summary)
+
+        if outcome.tables is not None:
+            merged_tables.append(outcome.tables)
+
+    if merged_tables:
+        merged_path = os.path.join(args.output_dir, MERGED_FILE_NAME)
+        write_excel_atomically(merged_path, *merge_tables(merged_tables))
+        print(f"已合并 {len(merged_tables)} 个文件 -> {merged_path}")
+
+    print(
+        f"完成：成功 {len(pdf_paths) - failed} 个，失败 {failed} 个，"
+        f"耗时 {time.perf_counter() - started:.1f}s"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
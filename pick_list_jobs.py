@@ -0,0 +1,349 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+import pandas as pd
+
+from enrichment import ResultBuilder
+from page_cache import PageCache
+from pdf_text_parser import iter_pdf_documents
+from reference_data import ReferenceIndex
+from result_cache import ParsedResult, ResultCache
+from validation_rules import ValidationRule
+
+
+# 同时在后台处理的拣货单任务数，超出的任务排队等待。
+DEFAULT_MAX_RUNNING_JOBS = 2
+
+# 最多保留的已结束任务数，超出后丢弃最早结束的任务。
+DEFAULT_MAX_FINISHED_JOBS = 32
+
+# 后台生成实时结果表的最短间隔（秒），避免每页都重新拼接整张表。
+LIVE_TABLE_INTERVAL = 0.5
+
+JOB_QUEUED = "排队中"
+JOB_RUNNING = "处理中"
+JOB_DONE = "已完成"
+JOB_EMPTY = "无明细"
+JOB_FAILED = "失败"
+JOB_CANCELLED = "已取消"
+
+FINISHED_STATES = {
+    JOB_DONE,
+    JOB_EMPTY,
+    JOB_FAILED,
+    JOB_CANCELLED,
+}
+
+
+class JobCancelled(Exception):
+    """任务在解析途中被取消。"""
+
+
+@dataclass(frozen=True)
+class JobProgress:
+    """某一时刻的任务进度快照，页面按这个对象绘制，不直接读任务内部状态。"""
+
+    status: str
+    document_index: int
+    document_count: int
+    source_name: str
+    page_number: int
+    page_count: int
+    row_count: int
+    live_results: pd.DataFrame | None
+    preview: tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame] | None
+    preview_page_count: int
+    first_rows_seconds: float | None
+
+    @property
+    def fraction(self) -> float:
+        if self.page_count <= 0:
+            return self.document_index / self.document_count
+
+        return (
+            self.document_index + self.page_number / self.page_count
+        ) / self.document_count
+
+
+class PickListJob:
+    """
+    一次拣货单处理任务，在后台线程里逐页解析并匹配校验。
+
+    进度、实时结果和最终结果都只在锁内读写，页面线程随时可以取快照。
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        cache_key: str,
+        documents: list[tuple[str, bytes]],
+    ) -> None:
+        self.job_id = job_id
+        self.cache_key = cache_key
+        self.source_names = [file_name for file_name, _ in documents]
+        self.submitted_at = time.time()
+        self.finished_at: float | None = None
+        # 从提交到第一批结果行可用、到全部处理完成的耗时（秒），包含排队时间。
+        self.first_rows_seconds: float | None = None
+        self.total_seconds: float | None = None
+
+        self.result: ParsedResult | None = None
+        self.error: BaseException | None = None
+        self.parse_issues: list[dict[str, Any]] = []
+        self.cached_page_count = 0
+        self.parsed_page_count = 0
+        self.table_page_count = 0
+        # 正在关注这个任务的会话数，由 JobRunner 在锁内维护。
+        self.subscribers = 0
+
+        self._documents = documents
+        self._status = JOB_QUEUED
+        self._document_index = 0
+        self._source_name = self.source_names[0] if self.source_names else ""
+        self._page_number = 0
+        self._page_count = 0
+        self._row_count = 0
+        self._live_results: pd.DataFrame | None = None
+        self._preview: tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame] | None = None
+        self._preview_page_count = 0
+        self._submitted_clock = time.perf_counter()
+        self._cancel_requested = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def status(self) -> str:
+        with self._lock:
+            return self._status
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_requested.is_set()
+
+    def progress(self) -> JobProgress:
+        with self._lock:
+            return JobProgress(
+                status=self._status,
+                document_index=self._document_index,
+                document_count=max(len(self.source_names), 1),
+                source_name=self._source_name,
+                page_number=self._page_number,
+                page_count=self._page_count,
+                row_count=self._row_count,
+                live_results=self._live_results,
+                preview=self._preview,
+                preview_page_count=self._preview_page_count,
+                first_rows_seconds=self.first_rows_seconds,
+            )
+
+    def cancel(self) -> None:
+        """请求取消；正在解析的任务在下一页处停下，排队中的任务不会开始。"""
+        self._cancel_requested.set()
+
+    def _finish(self, status: str) -> None:
+        with self._lock:
+            self._status = status
+            self._live_results = None
+            self._preview = None
+            self._documents = []
+        self.finished_at = time.time()
+        self.total_seconds = time.perf_counter() - self._submitted_clock
+
+    def run(
+        self,
+        reference: ReferenceIndex,
+        workers: int,
+        table_fallback: bool,
+        page_cache: PageCache | None,
+        result_cache: ResultCache[ParsedResult] | None,
+        preview_pages: int = 0,
+        rules: Sequence[ValidationRule] | None = None,
+    ) -> None:
+        """
+        处理整批拣货单。
+
+        preview_pages 大于 0 时第一份 PDF 的前几页先行解析，随即生成这几页的
+        三张表作为预览，页面可以先展示；其余页继续在后台处理。
+        """
+        if self._cancel_requested.is_set():
+            self._finish(JOB_CANCELLED)
+            return
+
+        with self._lock:
+            self._status = JOB_RUNNING
+
+        documents = self._documents
+        builder = ResultBuilder(
+            reference,
+            with_source=len(documents) > 1,
+            rules=rules,
+        )
+        last_render = 0.0
+
+        try:
+            for document_index, page in iter_pdf_documents(
+                [pdf_bytes for _, pdf_bytes in documents],
+                workers=workers,
+                page_cache=page_cache,
+                table_fallback=table_fallback,
+                preview_pages=preview_pages,
+            ):
+                if self._cancel_requested.is_set():
+                    raise JobCancelled
+
+                source_name = documents[document_index][0]
+                builder.add_page(page, source_name)
+
+                now = time.perf_counter()
+                if self.first_rows_seconds is None and builder.has_records:
+                    self.first_rows_seconds = now - self._submitted_clock
+
+                preview = None
+                if (
+                    builder.has_records
+                    and document_index == 0
+                    and page.ends_preview(preview_pages)
+                ):
+                    preview = builder.build()
+
+                live_results = None
+                if builder.has_records and now - last_render >= LIVE_TABLE_INTERVAL:
+                    live_results = builder.current_results()
+                    last_render = now
+
+                with self._lock:
+                    self._document_index = document_index
+                    self._source_name = source_name
+                    self._page_number = page.page_number
+                    self._page_count = page.page_count
+                    self._row_count = builder.row_count
+                    if live_results is not None:
+                        self._live_results = live_results
+                    if preview is not None:
+                        self._preview = preview
+                        self._preview_page_count = page.page_number
+
+            self.parse_issues = builder.parse_issues
+            self.cached_page_count = builder.cached_page_count
+            self.parsed_page_count = builder.page_count - builder.cached_page_count
+            self.table_page_count = builder.table_page_count
+
+            if not builder.has_records:
+                self._finish(JOB_EMPTY)
+                return
+
+            result_df, validation_df, parse_issues_df = builder.build()
+            result = ParsedResult(
+                result_df=result_df,
+                validation_df=validation_df,
+                parse_issues_df=parse_issues_df,
+            )
+        except JobCancelled:
+            self._finish(JOB_CANCELLED)
+            return
+        except Exception as exc:
+            self.error = exc
+            self._finish(JOB_FAILED)
+            return
+
+        # 先写结果缓存再标记完成，其他会话看到“已完成”时已经可以直接命中缓存。
+        if result_cache is not None:
+            result_cache.put(self.cache_key, result, result.size_bytes())
+
+        self.result = result
+        self._finish(JOB_DONE)
+
+
+class JobRunner:
+    """
+    进程内的后台任务执行器，所有会话共用。
+
+    同一份拣货单（相同缓存键）正在处理时，再次提交会直接挂到已有任务上，
+    不会重复解析；没有会话再关注的未完成任务会被取消，让出执行名额。
+    """
+
+    def __init__(
+        self,
+        max_running: int = DEFAULT_MAX_RUNNING_JOBS,
+        max_finished: int = DEFAULT_MAX_FINISHED_JOBS,
+    ) -> None:
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_running,
+            thread_name_prefix="pick-list-job",
+        )
+        self._jobs: OrderedDict[str, PickListJob] = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def get(self, job_id: str) -> PickListJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def submit(
+        self,
+        cache_key: str,
+        documents: list[tuple[str, bytes]],
+        reference: ReferenceIndex,
+        workers: int,
+        table_fallback: bool,
+        page_cache: PageCache | None = None,
+        result_cache: ResultCache[ParsedResult] | None = None,
+        preview_pages: int = 0,
+        rules: Sequence[ValidationRule] | None = None,
+    ) -> PickListJob:
+        """提交任务并登记一个关注者；同一缓存键已有未结束的任务时直接返回它。"""
+        with self._lock:
+            for job in self._jobs.values():
+                if (
+                    job.cache_key == cache_key
+                    and not job.finished
+                    and not job.cancel_requested
+                ):
+                    job.subscribers += 1
+                    return job
+
+            job = PickListJob(f"{next(self._ids):06d}", cache_key, documents)
+            job.subscribers = 1
+            self._jobs[job.job_id] = job
+            self._prune()
+
+        self._executor.submit(
+            job.run,
+            reference,
+            workers,
+            table_fallback,
+            page_cache,
+            result_cache,
+            preview_pages,
+            rules,
+        )
+        return job
+
+    def detach(self, job_id: str) -> None:
+        """一个会话不再关注该任务；没有关注者且尚未结束时取消它。"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+
+            job.subscribers -= 1
+            if job.subscribers <= 0 and not job.finished:
+                job.cancel()
+
+    def _prune(self) -> None:
+        finished = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished
+        ]
+        for job_id in finished[: max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job_id]
@@ -0,0 +1,599 @@
+"""
+本地 HTTP 服务：其他内部工具直接 POST PDF 拣货单，拿回 JSON、Excel，
+或 CSV/Parquet/Arrow 的 ZIP 包，不必经过页面。
+
+只用标准库。解析在固定大小的进程池里进行，同时处理的请求数等于进程数，
+超出的请求排队等待，排队也满时立即返回 503 并带 Retry-After，调用方据此退避重试。
+查找表在服务进程内常驻，基础表变化时自动重新加载。每个响应都带分阶段耗时。
+
+接口：
+    POST /extract?format=json&table_fallback=1         请求体为 PDF 原始字节
+    GET  /health                                        运行状态和排队情况
+
+format 可选 json（默认）、xlsx、csv、parquet、arrow，以及按发货仓库/店铺拆成
+多个工作簿打包的 xlsx_by_warehouse、xlsx_by_shop、xlsx_by_warehouse_shop。
+
+用法（在仓库根目录执行）：
+    python pick_list_server.py [--port 8765] [--workers 4] [--max-queue 16]
+    curl --data-binary @拣货单.pdf "http://127.0.0.1:8765/extract?format=xlsx" -o 结果.xlsx
+    curl --data-binary @拣货单.pdf "http://127.0.0.1:8765/extract?format=parquet" -o 结果.zip
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import IO, Any, Callable
+from urllib.parse import parse_qs, quote, urlsplit
+
+from enrichment import ResultBuilder
+from page_cache import PageCache
+from pdf_text_parser import PageResult, parse_document
+from process_pool import new_process_pool
+from reference_data import WarmReferenceIndex
+from result_export import EXPORT_FORMATS, export_file_name, spool_export
+from validation_rules import needs_review
+
+
+DEFAULT_MAX_UPLOAD_BYTES = 64 * 1024 * 1024
+
+# 发送 Excel 临时文件时每次读写的块大小。
+COPY_CHUNK_BYTES = 1024 * 1024
+
+# 处理中和排队的请求之外，额外留给 /health 等轻量请求的处理线程数。
+SPARE_HANDLER_THREADS = 4
+
+# 拒绝请求后最多再读掉这么多字节的请求体、最多等这么久；超过后直接关闭连接。
+DISCARD_MAX_BYTES = 256 * 1024 * 1024
+DISCARD_TIMEOUT_SECONDS = 10.0
+
+
+class AdmissionControl:
+    """
+    限制同时处理的请求数，并给等待的请求设上限。
+
+    处理中的请求达到 max_active 时新请求排队；排队数达到 max_waiting 时直接拒绝，
+    不让请求无限堆积在内存里。
+    """
+
+    def __init__(self, max_active: int, max_waiting: int) -> None:
+        self.max_active = max_active
+        self.max_waiting = max_waiting
+        self.active = 0
+        self.waiting = 0
+        self._condition = threading.Condition()
+
+    def enter(self) -> bool:
+        """取得处理名额，必要时排队等待；排队已满时返回 False。"""
+        with self._condition:
+            if self.active >= self.max_active:
+                if self.waiting >= self.max_waiting:
+                    return False
+
+                self.waiting += 1
+                try:
+                    self._condition.wait_for(lambda: self.active < self.max_active)
+                finally:
+                    self.waiting -= 1
+
+            self.active += 1
+            return True
+
+    def leave(self) -> None:
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+
+class RequestError(Exception):
+    """请求本身有问题，按给定状态码返回给调用方。"""
+
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class PickListService:
+    """服务的共享状态：常驻查找表、解析进程池和准入控制。"""
+
+    def __init__(
+        self,
+        info_path: str,
+        name_path: str,
+        workers: int,
+        max_queue: int,
+        max_upload_bytes: int = DEFAULT_MAX_UPLOAD_BYTES,
+        page_cache: PageCache | None = None,
+    ) -> None:
+        self.reference = WarmReferenceIndex(info_path, name_path)
+        self.workers = workers
+        self.pool = self._new_pool()
+        self.pool_restarts = 0
+        self.admission = AdmissionControl(workers, max_queue)
+        self.max_upload_bytes = max_upload_bytes
+        self.page_cache = page_cache
+        self._pool_lock = threading.Lock()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return new_process_pool(self.workers)
+
+    def _restart_pool(self, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        """
+        解析进程意外退出后进程池整体不可再用，换一个新的进程池。
+
+        多个请求同时发现同一个坏掉的进程池时只重建一次。
+        """
+        with self._pool_lock:
+            if self.pool is broken:
+                self.pool = self._new_pool()
+                self.pool_restarts += 1
+                broken.shutdown(wait=False, cancel_futures=True)
+            return self.pool
+
+    def _parse(self, pdf_bytes: bytes, table_fallback: bool) -> list[PageResult]:
+        task = (
+            parse_document,
+            pdf_bytes,
+            self.page_cache.directory if self.page_cache is not None else None,
+            self.page_cache.max_bytes if self.page_cache is not None else 0,
+            table_fallback,
+        )
+
+        pool = self.pool
+        try:
+            future = pool.submit(*task)
+        except BrokenProcessPool:
+            # 进程池在本请求之前就已损坏（例如空闲的工作进程被杀），重建后重新提交一次。
+            pool = self._restart_pool(pool)
+            future = pool.submit(*task)
+
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            self._restart_pool(pool)
+            raise
+
+    def extract(
+        self,
+        read_body: Callable[[], bytes],
+        table_fallback: bool,
+        export_format: str | None,
+    ) -> tuple[dict[str, Any] | IO[bytes], dict[str, float]]:
+        """
+        处理一份 PDF，返回 (JSON 结果或导出文件, 各阶段耗时秒数)。
+
+        先取得处理名额再调用 read_body 读入请求体：排队已满的请求直接拒绝，
+        它的 PDF 不会读进内存。export_format 为 None 时返回 JSON；否则按该格式
+        写在 spool_export 的临时文件里，由调用方流式发出后关闭。
+        """
+        timings: dict[str, float] = {}
+        started = time.perf_counter()
+
+        if not self.admission.enter():
+            raise RequestError(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                "排队请求已满，请稍后重试",
+            )
+
+        try:
+            admitted = time.perf_counter()
+            timings["queue"] = admitted - started
+
+            pdf_bytes = read_body()
+            uploaded = time.perf_counter()
+            timings["upload"] = uploaded - admitted
+
+            reference, _ = self.reference.get()
+            reference_ready = time.perf_counter()
+            timings["reference"] = reference_ready - uploaded
+
+            try:
+                pages = self._parse(pdf_bytes, table_fallback)
+            except BrokenProcessPool as exc:
+                raise RequestError(
+                    HTTPStatus.SERVICE_UNAVAILABLE,
+                    "解析进程意外退出，已重新启动，请稍后重试",
+                ) from exc
+            except Exception as exc:
+                raise RequestError(
+                    HTTPStatus.UNPROCESSABLE_ENTITY,
+                    f"PDF 文本读取失败：{type(exc).__name__}: {exc}",
+                ) from exc
+
+            parsed = time.perf_counter()
+            timings["parse"] = parsed - reference_ready
+
+            builder = ResultBuilder(reference)
+            for page in pages:
+                builder.add_page(page)
+            result_df, validation_df, parse_issues_df = builder.build()
+
+            enriched = time.perf_counter()
+            timings["enrich"] = enriched - parsed
+
+            if export_format is not None:
+                payload: dict[str, Any] | IO[bytes] = spool_export(
+                    export_format,
+                    result_df,
+                    validation_df,
+                    parse_issues_df,
+                )
+            else:
+                payload = {
+                    "summary": {
+                        "pages": builder.page_count,
+                        "rows": len(result_df),
+                        "needs_review": int(needs_review(validation_df).sum()),
+                        "parse_issues": len(parse_issues_df),
+                        "cached_pages": builder.cached_page_count,
+                        "table_engine_pages": builder.table_page_count,
+                    },
+                    "提取结果": result_df.to_dict(orient="records"),
+                    "校验报告": validation_df.to_dict(orient="records"),
+                    "解析异常": parse_issues_df.to_dict(orient="records"),
+                }
+
+            timings["export"] = time.perf_counter() - enriched
+        finally:
+            self.admission.leave()
+
+        timings["total"] = time.perf_counter() - started
+        return payload, timings
+
+    def health(self) -> dict[str, Any]:
+        reference, _ = self.reference.get()
+
+        # 提交到已损坏的进程池会立即报错，不必等任务执行；借此发现并重建坏掉的进程池。
+        pool = self.pool
+        try:
+            pool.submit(int)
+        except BrokenProcessPool:
+            self._restart_pool(pool)
+
+        return {
+            "status": "ok",
+            "active": self.admission.active,
+            "waiting": self.admission.waiting,
+            "max_active": self.admission.max_active,
+            "max_waiting": self.admission.max_waiting,
+            "pool_restarts": self.pool_restarts,
+            "info_rows": reference.info_row_count,
+            "name_rows": reference.name_row_count,
+        }
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+
+
+def _server_timing(timings: dict[str, float]) -> str:
+    return ", ".join(
+        f"{stage};dur={seconds * 1000:.1f}"
+        for stage, seconds in timings.items()
+    )
+
+
+class PickListRequestHandler(BaseHTTPRequestHandler):
+    server_version = "PickListServer/1.0"
+    service: PickListService
+    _body_read = False
+
+    def _send(
+        self,
+        status: HTTPStatus,
+        body: bytes,
+        content_type: str,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_file(
+        self,
+        status: HTTPStatus,
+        spool: IO[bytes],
+        content_type: str,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        """分块发出临时文件内容，不把整份文件读进内存。"""
+        spool.seek(0, os.SEEK_END)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(spool.tell()))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        spool.seek(0)
+        shutil.copyfileobj(spool, self.wfile, COPY_CHUNK_BYTES)
+
+    def _send_json(
+        self,
+        status: HTTPStatus,
+        payload: dict[str, Any],
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        self._send(
+            status,
+            json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8"),
+            "application/json; charset=utf-8",
+            headers,
+        )
+
+    def do_GET(self) -> None:
+        if urlsplit(self.path).path != "/health":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "接口不存在"})
+            return
+
+        try:
+            self._send_json(HTTPStatus.OK, self.service.health())
+        except Exception as exc:
+            self._send_json(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                {"status": "error", "error": str(exc)},
+            )
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/extract":
+            self._reject(HTTPStatus.NOT_FOUND, "接口不存在")
+            return
+
+        query = parse_qs(url.query)
+        output_format = query.get("format", ["json"])[0].lower()
+        table_fallback = query.get("table_fallback", ["1"])[0] not in {"0", "false"}
+
+        try:
+            if output_format != "json" and output_format not in EXPORT_FORMATS:
+                raise RequestError(
+                    HTTPStatus.BAD_REQUEST,
+                    f"format 只支持 json、{'、'.join(EXPORT_FORMATS)}",
+                )
+
+            length = self._content_length()
+            payload, timings = self.service.extract(
+                lambda: self._read_body(length),
+                table_fallback,
+                export_format=None if output_format == "json" else output_format,
+            )
+        except RequestError as exc:
+            headers = None
+            if exc.status == HTTPStatus.SERVICE_UNAVAILABLE:
+                headers = {"Retry-After": "1"}
+            self._reject(exc.status, exc.message, headers)
+            return
+        except Exception as exc:
+            self._reject(
+                HTTPStatus.INTERNAL_SERVER_ERROR,
+                f"{type(exc).__name__}: {exc}",
+            )
+            return
+
+        timing_header = {"Server-Timing": _server_timing(timings)}
+
+        if not isinstance(payload, dict):
+            file_name = quote(export_file_name("拣货单提取结果", output_format))
+            timing_header["Content-Disposition"] = (
+                f"attachment; filename*=UTF-8''{file_name}"
+            )
+            with payload:
+                self._send_file(
+                    HTTPStatus.OK,
+                    payload,
+                    EXPORT_FORMATS[output_format].mime,
+                    timing_header,
+                )
+        else:
+            payload["timings"] = {
+                stage: round(seconds, 4)
+                for stage, seconds in timings.items()
+            }
+            self._send_json(HTTPStatus.OK, payload, timing_header)
+
+    def _content_length(self) -> int:
+        """只看请求头检查上传大小，此时还不读请求体。"""
+        length_header = self.headers.get("Content-Length")
+        if length_header is None:
+            raise RequestError(HTTPStatus.LENGTH_REQUIRED, "缺少 Content-Length")
+
+        try:
+            length = int(length_header)
+        except ValueError:
+            raise RequestError(HTTPStatus.BAD_REQUEST, "Content-Length 无效") from None
+
+        if length > self.service.max_upload_bytes:
+            raise RequestError(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"PDF 超过 {self.service.max_upload_bytes // 1024 // 1024} MiB 上限",
+            )
+
+        return length
+
+    def _read_body(self, length: int) -> bytes:
+        self._body_read = True
+        body = self.rfile.read(length)
+        if not body.startswith(b"%PDF"):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "请求体不是 PDF 文件")
+
+        return body
+
+    def _reject(
+        self,
+        status: HTTPStatus,
+        message: str,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        """回应出错的请求；请求体还没读时随后丢弃，见 _discard_body。"""
+        self._send_json(status, {"error": message}, headers)
+        self._discard_body()
+
+    def _discard_body(self) -> None:
+        """
+        回应已经发出后，分块读掉未读的请求体再关闭连接，内存占用只有一块。
+
+        直接关闭还有未读数据的连接会发出 RST，先发完请求体再读回应的调用方会在
+        发送时断开，收不到 4xx/5xx 的说明。回应写完后先关闭发送方向，带
+        Expect: 100-continue 的调用方据此不再发送请求体；最多读 DISCARD_MAX_BYTES、
+        等 DISCARD_TIMEOUT_SECONDS，长度未知时读到对方关闭为止。
+        """
+        if self._body_read:
+            return
+        self._body_read = True
+
+        try:
+            remaining = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            remaining = DISCARD_MAX_BYTES
+
+        try:
+            self.wfile.flush()
+            self.connection.shutdown(socket.SHUT_WR)
+            self.connection.settimeout(DISCARD_TIMEOUT_SECONDS)
+
+            remaining = min(remaining, DISCARD_MAX_BYTES)
+            while remaining > 0:
+                chunk = self.rfile.read(min(remaining, COPY_CHUNK_BYTES))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+        except OSError:
+            pass
+
+    def log_message(self, format: str, *args: Any) -> None:
+        sys.stderr.write(
+            f"{self.log_date_time_string()} {self.address_string()} {format % args}\n"
+        )
+
+
+class BoundedThreadingHTTPServer(ThreadingHTTPServer):
+    """
+    限制处理线程数的 ThreadingHTTPServer。
+
+    线程用满时不再接受新连接，新连接留在监听队列里等待，不会每个连接都开一个线程。
+    """
+
+    def __init__(
+        self,
+        server_address: tuple[str, int],
+        handler_class: type[BaseHTTPRequestHandler],
+        max_threads: int,
+    ) -> None:
+        super().__init__(server_address, handler_class)
+        self._thread_slots = threading.BoundedSemaphore(max_threads)
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        self._thread_slots.acquire()
+        try:
+            super().process_request(request, client_address)
+        except BaseException:
+            self._thread_slots.release()
+            raise
+
+    def process_request_thread(self, request: Any, client_address: Any) -> None:
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._thread_slots.release()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="本地 HTTP 服务：上传 PDF 拣货单，返回 JSON 或 Excel。",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址，默认 127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口，默认 8765")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=min(os.cpu_count() or 1, 4),
+        help="解析进程数，也是同时处理的请求数",
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=16,
+        help="最多排队等待的请求数，超出时返回 503，默认 16",
+    )
+    parser.add_argument(
+        "--max-upload-mb",
+        type=int,
+        default=DEFAULT_MAX_UPLOAD_BYTES // 1024 // 1024,
+        help="单个 PDF 的大小上限（MiB）",
+    )
+    parser.add_argument(
+        "--info",
+        default="product_info.xlsx",
+        help="商品基础信息表，默认 product_info.xlsx",
+    )
+    parser.add_argument(
+        "--name-map",
+        default="name_map.xlsx",
+        help="商品名称对照表，默认 name_map.xlsx",
+    )
+    parser.add_argument(
+        "--no-page-cache",
+        action="store_true",
+        help="不读写页缓存",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    service = PickListService(
+        args.info,
+        args.name_map,
+        workers=max(args.workers, 1),
+        max_queue=max(args.max_queue, 0),
+        max_upload_bytes=args.max_upload_mb * 1024 * 1024,
+        page_cache=None if args.no_page_cache else PageCache(),
+    )
+
+    # 启动时先加载查找表，第一个请求不用承担加载开销。
+    try:
+        service.reference.get()
+    except Exception as exc:
+        print(f"基础 Excel 读取或列名识别失败：{exc}", file=sys.stderr)
+        service.close()
+        return 2
+
+    PickListRequestHandler.service = service
+    server = BoundedThreadingHTTPServer(
+        (args.host, args.port),
+        PickListRequestHandler,
+        max_threads=service.admission.max_active
+        + service.admission.max_waiting
+        + SPARE_HANDLER_THREADS,
+    )
+    print(
+        f"拣货单服务已启动：http://{args.host}:{args.port}/extract，"
+        f"{args.workers} 个解析进程，最多排队 {args.max_queue} 个请求",
+        flush=True,
+    )
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
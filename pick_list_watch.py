@@ -0,0 +1,383 @@
+"""
+常驻监视一个目录，WMS 新放入或修改的 PDF 拣货单逐个处理，工作簿写在 PDF 旁边。
+
+基础表只在启动时加载一次并常驻内存，基础表文件变化时才重新加载；
+已处理过的内容按 SHA-256 记录在目录下的状态文件里，改名、重复投放或重启后都不会重复处理。
+状态文件同时记下已处理文件的相对路径、大小和修改时间，重启后没改动过的文件不再读取；
+内容哈希只保留最近 DIGEST_RETENTION_DAYS 天、至多 MAX_DIGESTS 条。
+每个文件落盘稳定后立即单独处理，从投放到出表的延迟只取决于这一个文件。
+
+用法（在仓库根目录执行）：
+    python pick_list_watch.py 监视目录 [--interval 2] [--workers 4] [--once]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from page_cache import PageCache
+from pick_list_cli import OUTPUT_SUFFIX, process_pdf, write_atomically
+from reference_data import ReferenceIndex, WarmReferenceIndex
+
+
+STATE_FILE_NAME = ".pick_list_watch.json"
+STATE_VERSION = 2
+
+# 内容哈希记录保留的天数和条数上限，超出的旧记录在保存状态时淘汰。
+DIGEST_RETENTION_DAYS = 30
+MAX_DIGESTS = 10_000
+
+
+@dataclass
+class WatchedFile:
+    """目录中一个 PDF 最近一次看到的大小和修改时间，用来判断是否需要重新计算哈希。"""
+
+    size: int
+    mtime_ns: int
+    handled: bool = False
+
+
+def log(message: str) -> None:
+    print(f"{datetime.now():%Y-%m-%d %H:%M:%S} {message}", flush=True)
+
+
+def output_path_for(pdf_path: str) -> str:
+    return os.path.splitext(pdf_path)[0] + OUTPUT_SUFFIX
+
+
+class PickListWatcher:
+    """
+    轮询监视目录，只用标准库，不依赖文件系统事件。
+
+    文件最后修改时间早于 settle_seconds 才视为写入完成，避免读到 WMS 还没写完的 PDF。
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        info_path: str,
+        name_path: str,
+        settle_seconds: float = 2.0,
+        page_workers: int = 1,
+        table_fallback: bool = True,
+        page_cache: PageCache | None = None,
+        recursive: bool = False,
+    ) -> None:
+        self.directory = directory
+        self.settle_seconds = settle_seconds
+        self.page_workers = page_workers
+        self.table_fallback = table_fallback
+        self.page_cache = page_cache
+        self.recursive = recursive
+        self.state_path = os.path.join(directory, STATE_FILE_NAME)
+
+        self._files: dict[str, WatchedFile] = {}
+        self._processed, self._recorded_files = self._load_state()
+        self._state_changed = False
+        self._reference = WarmReferenceIndex(info_path, name_path)
+
+    def _load_state(self) -> tuple[dict[str, dict[str, str]], dict[str, dict[str, int]]]:
+        """读取 (内容哈希 -> 处理记录, 相对路径 -> 大小和修改时间)。"""
+        try:
+            with open(self.state_path, encoding="utf-8") as handle:
+                state = json.load(handle)
+        except (OSError, ValueError):
+            return {}, {}
+
+        if not isinstance(state, dict):
+            return {}, {}
+
+        # 旧版状态文件只有内容哈希一层，没有文件记录。
+        if state.get("version") != STATE_VERSION:
+            return state, {}
+
+        return state.get("digests") or {}, state.get("files") or {}
+
+    def _save_state(self) -> None:
+        cutoff = (datetime.now() - timedelta(days=DIGEST_RETENTION_DAYS)).isoformat(
+            timespec="seconds"
+        )
+        recent = sorted(
+            (
+                (digest, entry)
+                for digest, entry in self._processed.items()
+                if str(entry.get("处理时间", "")) >= cutoff
+            ),
+            key=lambda item: str(item[1].get("处理时间", "")),
+            reverse=True,
+        )
+        self._processed = dict(recent[:MAX_DIGESTS])
+
+        state = {
+            "version": STATE_VERSION,
+            "files": self._recorded_files,
+            "digests": self._processed,
+        }
+        write_atomically(
+            self.state_path,
+            json.dumps(state, ensure_ascii=False, indent=1).encode("utf-8"),
+        )
+        self._state_changed = False
+
+    def _relative(self, pdf_path: str) -> str:
+        return os.path.relpath(pdf_path, self.directory)
+
+    def _record_file(self, pdf_path: str, stat: os.stat_result) -> None:
+        self._recorded_files[self._relative(pdf_path)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        self._state_changed = True
+
+    def _unchanged_since_recorded(self, pdf_path: str, stat: os.stat_result) -> bool:
+        recorded = self._recorded_files.get(self._relative(pdf_path))
+        return recorded == {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def reference(self) -> ReferenceIndex:
+        """常驻内存的查找表；两张基础表的指纹变化时才重新加载。"""
+        reference, reloaded = self._reference.get()
+
+        if reloaded:
+            log(f"基础资料已加载，耗时 {reference.timings['合计']:.2f}s")
+
+        return reference
+
+    def _scan(self) -> list[str]:
+        paths: list[str] = []
+        pending = [self.directory]
+
+        while pending:
+            current = pending.pop()
+            try:
+                with os.scandir(current) as iterator:
+                    for entry in iterator:
+                        if entry.is_dir() and self.recursive:
+                            pending.append(entry.path)
+                        elif entry.is_file() and entry.name.lower().endswith(".pdf"):
+                            paths.append(entry.path)
+            except OSError:
+                continue
+
+        return sorted(paths)
+
+    def poll(self) -> int:
+        """
+        扫描一轮并处理所有已稳定的新文件或改动过的文件，返回本轮处理的文件数。
+
+        状态有变化时在本轮结束后写一次状态文件。
+        """
+        now_ns = time.time_ns()
+        settle_ns = int(self.settle_seconds * 1e9)
+        processed = 0
+        seen: set[str] = set()
+
+        for pdf_path in self._scan():
+            seen.add(pdf_path)
+
+            try:
+                stat = os.stat(pdf_path)
+            except OSError:
+                continue
+
+            known = self._files.get(pdf_path)
+            if known is None or (known.size, known.mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+                # 以前处理过、之后没改动过的文件直接视为已处理，不再读取和计算哈希。
+                known = WatchedFile(
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    handled=self._unchanged_since_recorded(pdf_path, stat),
+                )
+                self._files[pdf_path] = known
+
+            if known.handled or now_ns - stat.st_mtime_ns < settle_ns:
+                continue
+
+            known.handled = True
+            processed += self._handle(pdf_path, stat)
+
+        for pdf_path in set(self._files) - seen:
+            del self._files[pdf_path]
+
+        seen_relative = {self._relative(pdf_path) for pdf_path in seen}
+        for relative_path in set(self._recorded_files) - seen_relative:
+            del self._recorded_files[relative_path]
+            self._state_changed = True
+
+        if self._state_changed:
+            self._save_state()
+
+        return processed
+
+    def _handle(self, pdf_path: str, stat: os.stat_result) -> int:
+        try:
+            with open(pdf_path, "rb") as handle:
+                pdf_bytes = handle.read()
+        except OSError as exc:
+            log(f"{pdf_path}：读取失败，{exc}")
+            self._files[pdf_path].handled = False
+            return 0
+
+        digest = hashlib.sha256(pdf_bytes).hexdigest()
+        earlier = self._processed.get(digest)
+        if earlier is not None:
+            # 同一个文件在旧版状态文件里只有哈希记录，补上文件记录即可，不算重复投放。
+            if earlier.get("文件") != self._relative(pdf_path):
+                log(
+                    f"{pdf_path}：内容与已处理的 {earlier.get('文件', '-')} 相同，跳过；"
+                    f"结果见 {earlier.get('输出', '-')}"
+                )
+            self._record_file(pdf_path, stat)
+            return 0
+
+        started = time.perf_counter()
+
+        try:
+            reference = self.reference()
+        except Exception as exc:
+            log(f"基础 Excel 读取或列名识别失败：{exc}")
+            # 基础表修好之前不记录为已处理，下一轮重新尝试。
+            self._files[pdf_path].handled = False
+            return 0
+
+        output_path = output_path_for(pdf_path)
+        outcome = process_pdf(
+            pdf_path,
+            pdf_bytes,
+            output_path,
+            reference,
+            page_cache=self.page_cache,
+            table_fallback=self.table_fallback,
+            page_workers=self.page_workers,
+        )
+
+        if outcome.error is not None:
+            log(f"{pdf_path}：失败，{outcome.error}")
+            # 不记录为已处理，下一轮重新尝试。
+            self._files[pdf_path].handled = False
+            return 0
+
+        finished_ns = time.time_ns()
+        log(
+            f"{pdf_path} -> {output_path}：{outcome.row_count} 行，"
+            f"需人工复核 {outcome.problem_count} 行，解析异常 {outcome.issue_count} 条，"
+            f"处理 {time.perf_counter() - started:.2f}s，"
+            f"距落盘 {(finished_ns - stat.st_mtime_ns) / 1e9:.1f}s"
+        )
+
+        self._processed[digest] = {
+            "文件": self._relative(pdf_path),
+            "输出": self._relative(output_path),
+            "处理时间": datetime.now().isoformat(timespec="seconds"),
+        }
+        self._record_file(pdf_path, stat)
+        return 1
+
+    def run(self, interval: float) -> None:
+        log(f"开始监视 {self.directory}，每 {interval:g}s 扫描一次，Ctrl+C 退出")
+
+        while True:
+            self.poll()
+            time.sleep(interval)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="监视目录，自动提取并校验新放入的 PDF 拣货单。",
+    )
+    parser.add_argument("directory", help="要监视的目录")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=2.0,
+        help="扫描间隔（秒），默认 2",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        help="文件最后修改后至少静置多少秒才处理，默认 2",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=min(os.cpu_count() or 1, 4),
+        help="单个 PDF 按页并行解析的进程数",
+    )
+    parser.add_argument(
+        "-r",
+        "--recursive",
+        action="store_true",
+        help="同时监视子目录",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="只扫描处理一轮就退出，适合交给定时任务调用",
+    )
+    parser.add_argument(
+        "--info",
+        default="product_info.xlsx",
+        help="商品基础信息表，默认 product_info.xlsx",
+    )
+    parser.add_argument(
+        "--name-map",
+        default="name_map.xlsx",
+        help="商品名称对照表，默认 name_map.xlsx",
+    )
+    parser.add_argument(
+        "--no-table-fallback",
+        action="store_true",
+        help="文本解析失败的页不再用表格引擎重试",
+    )
+    parser.add_argument(
+        "--no-page-cache",
+        action="store_true",
+        help="不读写页缓存",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        print(f"目录不存在：{args.directory}", file=sys.stderr)
+        return 2
+
+    watcher = PickListWatcher(
+        args.directory,
+        args.info,
+        args.name_map,
+        settle_seconds=args.settle,
+        page_workers=max(args.workers, 1),
+        table_fallback=not args.no_table_fallback,
+        page_cache=None if args.no_page_cache else PageCache(),
+        recursive=args.recursive,
+    )
+
+    # 启动时先加载基础表，之后每个文件都直接用常驻内存的查找表。
+    try:
+        watcher.reference()
+    except Exception as exc:
+        print(f"基础 Excel 读取或列名识别失败：{exc}", file=sys.stderr)
+        return 2
+
+    if args.once:
+        watcher.poll()
+        return 0
+
+    try:
+        watcher.run(args.interval)
+    except KeyboardInterrupt:
+        log("已停止监视")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+from typing import Any
+
+
+# forkserver 先导入这些模块，工作进程从它 fork 出来，不必每个进程池都重新导入 pandas、pypdf。
+FORKSERVER_PRELOAD = [
+    "pdf_text_parser",
+    "reference_data",
+    "excel_export",
+]
+
+_context: BaseContext | None = None
+_context_lock = threading.Lock()
+
+
+def pool_context() -> BaseContext:
+    """
+    进程池使用的启动方式，第一次创建进程池时才确定。
+
+    页面、后台任务线程和 HTTP 服务都在多线程进程里创建进程池。fork 会把其他线程
+    当时持有的锁原样复制进子进程，子进程可能永远等不到解锁，所以优先用 forkserver；
+    Windows 等不支持 forkserver 的平台改用 spawn。
+    """
+    global _context
+
+    with _context_lock:
+        if _context is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload(FORKSERVER_PRELOAD)
+            else:
+                context = multiprocessing.get_context("spawn")
+            _context = context
+
+        return _context
+
+
+def new_process_pool(max_workers: int, **kwargs: Any) -> ProcessPoolExecutor:
+    """创建用 pool_context() 启动工作进程的进程池，其余参数同 ProcessPoolExecutor。"""
+    return ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=pool_context(),
+        **kwargs,
+    )
@@ -0,0 +1,662 @@
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl.cell.cell import ERROR_CODES
+
+from process_pool import new_process_pool
+
+
+# 基础表快照放在工作簿同级的隐藏目录中，每个工作簿一份 Parquet 文件。
+SNAPSHOT_DIR_NAME = ".reference_cache"
+
+# SkuInfoTable 取值元组的两项，以及整列左连接后的列名。
+SKU_INFO_COLUMNS = ["店铺名称", "回收标签类别"]
+PRODUCT_NAME_COLUMN = "商品名称"
+
+# 快照的 schema metadata 中记录源文件指纹，用来判断快照是否过期。
+_META_SIZE = b"source_size"
+_META_MTIME = b"source_mtime_ns"
+_META_SHA256 = b"source_sha256"
+_META_COLUMNS = b"column_candidates"
+
+# 两张基础表需要的列：字段名 -> (候选列名, 是否必需)，读取和构建查找表共用。
+ColumnSpecs = Mapping[str, tuple[list[str], bool]]
+
+INFO_COLUMNS: ColumnSpecs = {
+    "sku_id": (["SKU ID", "SKUID"], True),
+    "sku_code": (["SKU货号", "SKU 货号", "货品编码", "货号"], False),
+    "shop": (["店铺名称", "店铺"], True),
+    "label": (["回收标签类别", "回收标签", "标签类别"], True),
+}
+NAME_COLUMNS: ColumnSpecs = {
+    "sku_code": (["货品编码", "SKU货号", "SKU 货号", "编码", "货号", "SKU"], True),
+    "product_name": (["商品名称", "产品名称", "名称", "品名"], True),
+}
+
+# 与 pd.read_excel 默认一致、读取时视为空单元格的文本，以及 Excel 错误值。
+_NA_STRINGS = frozenset(
+    {
+        "",
+        "#N/A",
+        "#N/A N/A",
+        "#NA",
+        "-1.#IND",
+        "-1.#QNAN",
+        "-NaN",
+        "-nan",
+        "1.#IND",
+        "1.#QNAN",
+        "<NA>",
+        "N/A",
+        "NA",
+        "NULL",
+        "NaN",
+        "None",
+        "n/a",
+        "nan",
+        "null",
+        *ERROR_CODES,
+    }
+)
+
+# (绝对路径, 大小, 修改时间) -> SHA-256，避免每次 rerun 都重新哈希整个工作簿。
+_fingerprint_memo: dict[tuple[str, int, int], str] = {}
+
+
+def normalize_key(value: Any) -> str:
+    """统一 Excel / PDF 中的编号格式，避免 12345.0、空格、换行导致匹配失败。"""
+    if value is None:
+        return ""
+
+    try:
+        if pd.isna(value):
+            return ""
+    except (TypeError, ValueError):
+        pass
+
+    text = str(value).strip().replace("\n", "").replace("\r", "")
+    if text.lower() in {"nan", "none"}:
+        return ""
+
+    if re.fullmatch(r"\d+\.0", text):
+        text = text[:-2]
+
+    return text
+
+
+def normalize_series(series: pd.Series) -> pd.Series:
+    """normalize_key 的整列版本，结果与逐个单元格调用完全一致。"""
+    text = series.where(series.notna(), "").astype(str).str.strip()
+
+    # 换行和 .0 结尾都只出现在少数单元格里，先筛出来再处理，避免整列逐个替换。
+    positions = np.flatnonzero(
+        (
+            text.str.contains("\n", regex=False)
+            | text.str.contains("\r", regex=False)
+        ).to_numpy()
+    )
+    if len(positions):
+        text.iloc[positions] = (
+            text.iloc[positions]
+            .str.replace("\n", "", regex=False)
+            .str.replace("\r", "", regex=False)
+        )
+
+    text = text.mask(text.str.lower().isin(["nan", "none"]), "")
+
+    positions = np.flatnonzero(text.str.endswith(".0").to_numpy())
+    positions = positions[
+        text.iloc[positions].str.fullmatch(r"\d+\.0").to_numpy()
+    ]
+    if len(positions):
+        text.iloc[positions] = text.iloc[positions].str[:-2]
+
+    return text
+
+
+def find_column(
+    dataframe: pd.DataFrame | Sequence[Any],
+    candidates: list[str],
+    required: bool = True,
+) -> str | None:
+    """按候选关键词寻找列名，优先完全匹配，其次包含匹配；也可直接传入表头列表。"""
+    originals = list(
+        dataframe.columns if isinstance(dataframe, pd.DataFrame) else dataframe
+    )
+    columns = [str(col).strip() for col in originals]
+
+    for candidate in candidates:
+        for original, normalized in zip(originals, columns):
+            if normalized == candidate:
+                return original
+
+    for candidate in candidates:
+        for original, normalized in zip(originals, columns):
+            if candidate in normalized:
+                return original
+
+    if required:
+        raise ValueError(
+            f"找不到需要的列：{' / '.join(candidates)}。"
+            f"当前文件列名：{', '.join(columns)}"
+        )
+
+    return None
+
+
+def resolve_columns(
+    columns: pd.DataFrame | Sequence[Any],
+    specs: ColumnSpecs,
+) -> dict[str, Any]:
+    """按列规格逐个调用 find_column，返回 字段名 -> 实际列名（可选列找不到时为 None）。"""
+    return {
+        name: find_column(columns, candidates, required)
+        for name, (candidates, required) in specs.items()
+    }
+
+
+def file_fingerprint(path: str) -> str:
+    """计算文件内容的 SHA-256，用作基础表的内容指纹。"""
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def workbook_fingerprint(path: str) -> str:
+    """返回基础表的内容指纹；文件大小和修改时间不变时直接复用上次的哈希。"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"仓库中缺少 {path}")
+
+    source_stat = os.stat(path)
+    memo_key = (os.path.abspath(path), source_stat.st_size, source_stat.st_mtime_ns)
+
+    if memo_key not in _fingerprint_memo:
+        _fingerprint_memo[memo_key] = file_fingerprint(path)
+
+    return _fingerprint_memo[memo_key]
+
+
+def snapshot_path(path: str) -> str:
+    directory = os.path.dirname(os.path.abspath(path))
+    file_name = os.path.basename(path)
+    return os.path.join(directory, SNAPSHOT_DIR_NAME, f"{file_name}.parquet")
+
+
+def _header_names(cells: Sequence[Any]) -> list[str]:
+    """按 pd.read_excel 的规则命名表头：空表头记为 Unnamed: n，重名依次加 .1、.2。"""
+    names: list[str] = []
+    seen: dict[str, int] = {}
+
+    for position, cell in enumerate(cells):
+        name = f"Unnamed: {position}" if cell is None or cell == "" else str(cell)
+
+        if name in seen:
+            base = name
+            while name in seen:
+                seen[base] += 1
+                name = f"{base}.{seen[base]}"
+
+        seen[name] = 0
+        names.append(name)
+
+    return names
+
+
+def _cell_text(value: Any) -> str | None:
+    """
+    把单元格值转成快照使用的文本。
+
+    与 pd.read_excel(dtype=object) 相同：整数值的浮点数按整数处理，
+    错误单元格和默认缺失值文本视为空；
+    其余按 str() 保存，normalize_key 对快照值与对原始值的结果一致。
+    """
+    if value is None:
+        return None
+
+    if isinstance(value, str):
+        return None if value in _NA_STRINGS else value
+
+    if isinstance(value, float) and math.isfinite(value) and value.is_integer():
+        return str(int(value))
+
+    return str(value)
+
+
+def read_reference_columns(path: str, specs: ColumnSpecs) -> pd.DataFrame:
+    """
+    只读取列规格需要的几列。
+
+    先用 openpyxl 只读模式读取第一行表头并解析候选列，
+    再按列范围流式读取数据行，只保留选中的列；
+    耗时和内存随用到的列数变化，而不随导出表的总列数变化。
+    """
+    workbook = openpyxl.load_workbook(
+        path,
+        read_only=True,
+        data_only=True,
+        keep_links=False,
+    )
+
+    try:
+        sheet = workbook.worksheets[0]
+        sheet.reset_dimensions()
+
+        header_row = next(sheet.iter_rows(max_row=1, values_only=True), ())
+        header = _header_names(header_row)
+        resolved = resolve_columns(header, specs)
+
+        positions = sorted(
+            {header.index(column) for column in resolved.values() if column is not None}
+        )
+        names = [header[position] for position in positions]
+        values: list[list[str | None]] = [[] for _ in positions]
+
+        if positions:
+            first_col = positions[0]
+            offsets = [position - first_col for position in positions]
+
+            for row in sheet.iter_rows(
+                min_row=2,
+                min_col=first_col + 1,
+                max_col=positions[-1] + 1,
+                values_only=True,
+            ):
+                texts = [
+                    _cell_text(row[offset]) if offset < len(row) else None
+                    for offset in offsets
+                ]
+
+                # 与 pd.read_excel 一样跳过整行为空的行。
+                if all(text is None for text in texts):
+                    continue
+
+                for column_values, text in zip(values, texts):
+                    column_values.append(text)
+    finally:
+        workbook.close()
+
+    return pd.DataFrame(
+        {name: pd.Series(column, dtype=object) for name, column in zip(names, values)},
+        columns=names,
+    )
+
+
+def _read_snapshot_metadata(path: str) -> dict[bytes, bytes] | None:
+    if not os.path.exists(path):
+        return None
+
+    try:
+        return pq.read_schema(path).metadata or {}
+    except (OSError, pa.ArrowException):
+        return None
+
+
+def _write_snapshot(
+    frame: pd.DataFrame,
+    path: str,
+    source_stat: os.stat_result,
+    source_sha256: str,
+    specs_key: str,
+) -> None:
+    schema = pa.schema(
+        [pa.field(column, pa.string()) for column in frame.columns],
+        metadata={
+            _META_SIZE: str(source_stat.st_size).encode(),
+            _META_MTIME: str(source_stat.st_mtime_ns).encode(),
+            _META_SHA256: source_sha256.encode(),
+            _META_COLUMNS: specs_key.encode(),
+        },
+    )
+    table = pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        pq.write_table(table, temp_path)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _specs_key(specs: ColumnSpecs) -> str:
+    return json.dumps(specs, ensure_ascii=False, sort_keys=True)
+
+
+def snapshot_is_current(path: str, specs: ColumnSpecs) -> bool:
+    """
+    判断工作簿的 Parquet 快照能否直接使用。
+
+    快照以源文件的大小、修改时间和 SHA-256 以及列规格为键：
+    大小和修改时间都一致时直接可用；
+    修改时间变化但内容哈希一致时（例如重新 checkout）仍然可用。
+    """
+    metadata = _read_snapshot_metadata(snapshot_path(path))
+    source_stat = os.stat(path)
+
+    if (
+        not metadata
+        or metadata.get(_META_COLUMNS) != _specs_key(specs).encode()
+        or metadata.get(_META_SIZE) != str(source_stat.st_size).encode()
+    ):
+        return False
+
+    if metadata.get(_META_MTIME) == str(source_stat.st_mtime_ns).encode():
+        return True
+
+    return metadata.get(_META_SHA256) == workbook_fingerprint(path).encode()
+
+
+def load_reference_workbook(path: str, specs: ColumnSpecs) -> pd.DataFrame:
+    """读取基础 Excel 中列规格需要的列，快照可用时直接读快照，否则重新读取并覆盖快照。"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"仓库中缺少 {path}")
+
+    snapshot = snapshot_path(path)
+
+    if snapshot_is_current(path, specs):
+        return pq.read_table(snapshot).to_pandas()
+
+    source_stat = os.stat(path)
+    source_sha256 = workbook_fingerprint(path)
+    frame = read_reference_columns(path, specs)
+
+    try:
+        _write_snapshot(frame, snapshot, source_stat, source_sha256, _specs_key(specs))
+    except OSError:
+        # 只读部署环境下写不了快照，不影响本次读取结果。
+        pass
+
+    return frame
+
+
+def _load_reference_workbook_timed(
+    path: str,
+    specs: ColumnSpecs,
+) -> tuple[pd.DataFrame, float]:
+    started = time.perf_counter()
+    frame = load_reference_workbook(path, specs)
+    return frame, time.perf_counter() - started
+
+
+def load_reference_workbooks(
+    workbooks: Sequence[tuple[str, ColumnSpecs]],
+    max_workers: int | None = None,
+) -> tuple[list[tuple[pd.DataFrame, float]], int]:
+    """
+    读取多张基础表，返回 [(DataFrame, 读取耗时秒数)] 以及实际使用的进程数。
+
+    Excel 解析是纯 CPU 的 XML 处理，两张表都需要重新解析时放进进程池并行；
+    快照命中只需几十毫秒，此时启动进程反而更慢，直接在当前进程读取。
+    """
+    for path, _ in workbooks:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"仓库中缺少 {path}")
+
+    stale_count = sum(
+        not snapshot_is_current(path, specs) for path, specs in workbooks
+    )
+    workers = min(stale_count, max_workers or os.cpu_count() or 1)
+
+    if workers < 2:
+        results = [
+            _load_reference_workbook_timed(path, specs)
+            for path, specs in workbooks
+        ]
+        return results, 1
+
+    with new_process_pool(workers) as pool:
+        results = list(
+            pool.map(
+                _load_reference_workbook_timed,
+                [path for path, _ in workbooks],
+                [specs for _, specs in workbooks],
+            )
+        )
+
+    return results, workers
+
+
+class SkuInfoTable(Mapping[str, tuple[str, str]]):
+    """
+    SKU 键 -> (店铺名称, 回收标签类别) 的只读紧凑映射。
+
+    键只保存一份 pd.Index，单个查找和整列左连接共用索引上的同一张哈希表；
+    店铺和标签按行存成分类编码，连接用的表直接由编码生成分类列，
+    不再为每个 SKU 展开一份字符串。
+    """
+
+    __slots__ = ("_keys", "_shop_names", "_recycle_labels", "_frame")
+
+    def __init__(
+        self,
+        keys: pd.Series,
+        shop_names: pd.Categorical,
+        recycle_labels: pd.Categorical,
+    ) -> None:
+        # 去掉空键后按键去重，保留第一次出现的行（与逐行构建时的先到先得一致）。
+        keep = ((keys != "") & ~keys.duplicated(keep="first")).to_numpy()
+
+        self._keys = pd.Index(keys.to_numpy()[keep], dtype=object)
+        self._shop_names = pd.Categorical.from_codes(
+            shop_names.codes[keep],
+            dtype=shop_names.dtype,
+        )
+        self._recycle_labels = pd.Categorical.from_codes(
+            recycle_labels.codes[keep],
+            dtype=recycle_labels.dtype,
+        )
+        self._frame: pd.DataFrame | None = None
+
+    def __getitem__(self, key: str) -> tuple[str, str]:
+        row = self._keys.get_loc(key)
+        return self._shop_names[row], self._recycle_labels[row]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def to_frame(self) -> pd.DataFrame:
+        """以 SKU 键为索引、店铺名称和回收标签类别为分类列的表，供整列左连接；首次调用时生成。"""
+        if self._frame is None:
+            shop_column, label_column = SKU_INFO_COLUMNS
+            self._frame = pd.DataFrame(
+                {
+                    shop_column: self._shop_names,
+                    label_column: self._recycle_labels,
+                },
+                index=self._keys,
+                copy=False,
+            )
+
+        return self._frame
+
+
+class ProductNameTable(Mapping[str, str]):
+    """SKU 货号 -> 商品名称的只读映射，查找和整列左连接共用同一个以货号为索引的 Series。"""
+
+    __slots__ = ("_series",)
+
+    def __init__(self, names: pd.Series) -> None:
+        self._series = names
+
+    def __getitem__(self, key: str) -> str:
+        return self._series.iat[self._series.index.get_loc(key)]
+
+    def __iter__(self):
+        return iter(self._series.index)
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._series.index
+
+    def to_series(self) -> pd.Series:
+        """以 SKU 货号为索引的商品名称列。"""
+        return self._series
+
+
+@dataclass(frozen=True)
+class ReferenceIndex:
+    """构建完成的只读查找表，供同一进程内的所有会话共享。"""
+
+    info_by_sku_id: SkuInfoTable
+    info_by_sku_code: SkuInfoTable
+    name_by_sku_code: Mapping[str, str]
+    detected_columns: Mapping[str, str]
+    info_row_count: int
+    name_row_count: int
+    timings: Mapping[str, float] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+
+
+def build_reference_index(
+    df_info: pd.DataFrame,
+    df_name: pd.DataFrame,
+) -> ReferenceIndex:
+    """生成 SKU ID、SKU 货号及商品名称的只读查找表，并记录识别到的列名。"""
+    info_columns = resolve_columns(df_info, INFO_COLUMNS)
+    sku_id_col = info_columns["sku_id"]
+    sku_code_col = info_columns["sku_code"]
+    shop_col = info_columns["shop"]
+    label_col = info_columns["label"]
+
+    shop_names = pd.Categorical(
+        normalize_series(df_info[shop_col]).replace("", "-")
+    )
+    recycle_labels = pd.Categorical(
+        normalize_series(df_info[label_col]).replace("", "-")
+    )
+    info_by_sku_id = SkuInfoTable(
+        normalize_series(df_info[sku_id_col]),
+        shop_names,
+        recycle_labels,
+    )
+
+    if sku_code_col is not None:
+        sku_codes = normalize_series(df_info[sku_code_col])
+    else:
+        sku_codes = pd.Series("", index=df_info.index, dtype=object)
+
+    info_by_sku_code = SkuInfoTable(sku_codes, shop_names, recycle_labels)
+
+    name_columns = resolve_columns(df_name, NAME_COLUMNS)
+    name_key_col = name_columns["sku_code"]
+    product_name_col = name_columns["product_name"]
+
+    name_keys = normalize_series(df_name[name_key_col])
+    product_names = normalize_series(df_name[product_name_col]).replace("", "-")
+    keep = ((name_keys != "") & ~name_keys.duplicated(keep="first")).to_numpy()
+    name_by_sku_code = pd.Series(
+        product_names.to_numpy()[keep],
+        index=pd.Index(name_keys.to_numpy()[keep], dtype=object),
+        dtype=object,
+        name=PRODUCT_NAME_COLUMN,
+    )
+
+    detected_columns = {
+        "基础信息 SKU ID 列": str(sku_id_col),
+        "基础信息 SKU 货号列": str(sku_code_col or "未找到"),
+        "基础信息 店铺列": str(shop_col),
+        "基础信息 标签列": str(label_col),
+        "名称表 货号列": str(name_key_col),
+        "名称表 商品名称列": str(product_name_col),
+    }
+
+    return ReferenceIndex(
+        info_by_sku_id=info_by_sku_id,
+        info_by_sku_code=info_by_sku_code,
+        name_by_sku_code=ProductNameTable(name_by_sku_code),
+        detected_columns=MappingProxyType(detected_columns),
+        info_row_count=len(df_info),
+        name_row_count=len(df_name),
+    )
+
+
+def load_reference_index(
+    info_path: str,
+    name_path: str,
+    max_workers: int | None = None,
+) -> ReferenceIndex:
+    """读取两张基础表并构建查找表，在 timings 中记录各阶段的墙钟耗时（秒）。"""
+    started = time.perf_counter()
+    (
+        [(df_info, info_seconds), (df_name, name_seconds)],
+        workers,
+    ) = load_reference_workbooks(
+        [(info_path, INFO_COLUMNS), (name_path, NAME_COLUMNS)],
+        max_workers=max_workers,
+    )
+    loaded = time.perf_counter()
+
+    index = build_reference_index(df_info, df_name)
+    finished = time.perf_counter()
+
+    return replace(
+        index,
+        timings=MappingProxyType(
+            {
+                f"读取 {os.path.basename(info_path)}": info_seconds,
+                f"读取 {os.path.basename(name_path)}": name_seconds,
+                f"读取阶段（{workers} 个进程）": loaded - started,
+                "构建查找表": finished - loaded,
+                "合计": finished - started,
+            }
+        ),
+    )
+
+
+class WarmReferenceIndex:
+    """
+    常驻进程（监视目录、HTTP 服务）用的查找表持有者。
+
+    查找表常驻内存，每次取用只比较两张基础表的指纹（按文件大小和修改时间记忆，开销很小），
+    指纹变化时才重新加载；多线程同时取用时只会加载一次。
+    """
+
+    def __init__(self, info_path: str, name_path: str) -> None:
+        self.info_path = info_path
+        self.name_path = name_path
+        self._index: ReferenceIndex | None = None
+        self._key: tuple[str, str] | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> tuple[ReferenceIndex, bool]:
+        """返回 (查找表, 本次是否重新加载)。"""
+        key = (
+            workbook_fingerprint(self.info_path),
+            workbook_fingerprint(self.name_path),
+        )
+
+        with self._lock:
+            if self._index is not None and key == self._key:
+                return self._index, False
+
+            self._index = load_reference_index(self.info_path, self.name_path)
+            self._key = key
+            return self._index, True
@@ -0,0 +1,118 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Generic, Sequence, TypeVar
+
+import pandas as pd
+
+
+# 默认最多缓存的拣货单份数和总字节数，超过任一上限时淘汰最久未使用的结果。
+DEFAULT_MAX_ENTRIES = 16
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+ValueT = TypeVar("ValueT")
+
+
+@dataclass(frozen=True)
+class ParsedResult:
+    """一份拣货单的完整处理结果。缓存对象在会话间共享，取出后只读使用。"""
+
+    result_df: pd.DataFrame
+    validation_df: pd.DataFrame
+    parse_issues_df: pd.DataFrame
+
+    def size_bytes(self) -> int:
+        return sum(
+            int(dataframe.memory_usage(index=True, deep=True).sum())
+            for dataframe in (
+                self.result_df,
+                self.validation_df,
+                self.parse_issues_df,
+            )
+        )
+
+
+def result_cache_key(
+    documents: Sequence[tuple[str, bytes]],
+    *reference_fingerprints: str,
+) -> str:
+    """
+    上传文件内容的 SHA-256 加上基础表指纹。
+
+    同一份 PDF 重复上传也会命中；基础表变化后旧结果自然失效。
+    多份一起上传时结果里带来源文件名，文件名和顺序也计入键。
+    """
+    if len(documents) == 1:
+        digest = hashlib.sha256(documents[0][1]).hexdigest()
+    else:
+        batch_digest = hashlib.sha256()
+        for file_name, pdf_bytes in documents:
+            batch_digest.update(file_name.encode("utf-8") + b"\0")
+            batch_digest.update(hashlib.sha256(pdf_bytes).digest())
+        digest = batch_digest.hexdigest()
+
+    return ":".join([digest, *reference_fingerprints])
+
+
+class ResultCache(Generic[ValueT]):
+    """按条数和总字节数双重限额的线程安全 LRU 缓存。"""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[ValueT, int]] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def get(self, key: str) -> ValueT | None:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value: ValueT, size: int) -> bool:
+        """写入缓存；单条超过字节上限时不缓存，返回 False。"""
+        if size > self.max_bytes or self.max_entries <= 0:
+            return False
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous[1]
+
+            self._entries[key] = (value, size)
+            self._total_bytes += size
+
+            while (
+                len(self._entries) > self.max_entries
+                or self._total_bytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
@@ -0,0 +1,336 @@
+import os
+import re
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from typing import IO, Callable
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from enrichment import SOURCE_COLUMN
+from excel_export import SPOOL_MAX_BYTES, spool_excel, write_excel
+from process_pool import new_process_pool
+
+
+EXCEL_FORMAT = "xlsx"
+
+# 导出包里各张表的文件名（不含扩展名），与工作簿里的工作表同名。
+TABLE_NAMES = (
+    "提取结果",
+    "校验报告",
+    "解析异常",
+)
+
+# 拆分导出时文件名里不能出现的字符。
+_UNSAFE_FILE_NAME_CHARS = re.compile(r'[\\/:*?"<>|\s]+')
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    """
+    一种下载格式。
+
+    除 Excel 外每种格式都打成 ZIP，三张表各一个文件；write_table 把一张表
+    直接写进 ZIP 条目，不先生成整份字节。split_columns 非空时按这些列分组，
+    每组一个工作簿，打成一个 ZIP。
+    """
+
+    label: str
+    extension: str
+    mime: str
+    write_table: Callable[[pd.DataFrame, IO[bytes]], None] | None = None
+    compression: int = zipfile.ZIP_DEFLATED
+    split_columns: tuple[str, ...] = ()
+
+
+def _write_csv(dataframe: pd.DataFrame, target: IO[bytes]) -> None:
+    # 带 BOM，Excel 直接双击打开时中文不乱码。
+    dataframe.to_csv(target, index=False, encoding="utf-8-sig")
+
+
+def _arrow_table(dataframe: pd.DataFrame) -> pa.Table:
+    """
+    转成 Arrow 表，数值列和字符串列直接按列转换。
+
+    解析异常里“行号”混有整数和“-”，Arrow 列只能有一种类型，这类混合列转成文字，
+    其余列不做额外复制。
+    """
+    mixed_columns = [
+        column
+        for column in dataframe.columns
+        if dataframe[column].dtype == object
+        and pd.api.types.infer_dtype(dataframe[column], skipna=True).startswith("mixed")
+    ]
+    if mixed_columns:
+        dataframe = dataframe.assign(
+            **{
+                column: dataframe[column].astype(str)
+                for column in mixed_columns
+            }
+        )
+
+    return pa.Table.from_pandas(dataframe, preserve_index=False)
+
+
+def _write_parquet(dataframe: pd.DataFrame, target: IO[bytes]) -> None:
+    pq.write_table(_arrow_table(dataframe), target)
+
+
+def _write_arrow_ipc(dataframe: pd.DataFrame, target: IO[bytes]) -> None:
+    table = _arrow_table(dataframe)
+    with pa.ipc.new_file(target, table.schema) as writer:
+        writer.write_table(table)
+
+
+EXPORT_FORMATS: dict[str, ExportFormat] = {
+    EXCEL_FORMAT: ExportFormat(
+        label="Excel 工作簿（.xlsx）",
+        extension=".xlsx",
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+    "csv": ExportFormat(
+        label="CSV（ZIP，每张表一个文件）",
+        extension=".csv",
+        mime="application/zip",
+        write_table=_write_csv,
+    ),
+    "parquet": ExportFormat(
+        label="Parquet（ZIP，每张表一个文件）",
+        extension=".parquet",
+        mime="application/zip",
+        write_table=_write_parquet,
+        # Parquet 文件内部已经压缩，ZIP 只做打包。
+        compression=zipfile.ZIP_STORED,
+    ),
+    "arrow": ExportFormat(
+        label="Arrow IPC（ZIP，每张表一个文件）",
+        extension=".arrow",
+        mime="application/zip",
+        write_table=_write_arrow_ipc,
+    ),
+    "xlsx_by_warehouse": ExportFormat(
+        label="按发货仓库拆分的 Excel（ZIP）",
+        extension=".xlsx",
+        mime="application/zip",
+        compression=zipfile.ZIP_STORED,
+        split_columns=("发货仓库",),
+    ),
+    "xlsx_by_shop": ExportFormat(
+        label="按店铺拆分的 Excel（ZIP）",
+        extension=".xlsx",
+        mime="application/zip",
+        compression=zipfile.ZIP_STORED,
+        split_columns=("店铺名称",),
+    ),
+    "xlsx_by_warehouse_shop": ExportFormat(
+        label="按发货仓库和店铺拆分的 Excel（ZIP）",
+        extension=".xlsx",
+        mime="application/zip",
+        compression=zipfile.ZIP_STORED,
+        split_columns=("发货仓库", "店铺名称"),
+    ),
+}
+
+
+def export_file_name(stem: str, format_key: str) -> str:
+    """下载文件名：Excel 用 .xlsx，其余格式是 ZIP 包。"""
+    if format_key == EXCEL_FORMAT:
+        return f"{stem}{EXPORT_FORMATS[format_key].extension}"
+
+    return f"{stem}_{format_key}.zip"
+
+
+def split_tables(
+    result_df: pd.DataFrame,
+    validation_df: pd.DataFrame,
+    parse_issues_df: pd.DataFrame,
+    split_columns: tuple[str, ...],
+) -> list[tuple[tuple[str, ...], pd.DataFrame, pd.DataFrame, pd.DataFrame]]:
+    """
+    按 split_columns 把结果分组，返回 [(分组取值, 提取结果, 校验报告, 解析异常)]。
+
+    校验报告与提取结果逐行对应，按行位置取同一批行，“结果行号”保留在完整结果里的编号；
+    解析异常取该组明细所在页（批量时按来源文件和页码）上的记录，
+    没有提取到任何明细的页不属于任何分组，只出现在完整导出里。
+    """
+    if len(validation_df) != len(result_df):
+        raise ValueError("校验报告与提取结果行数不一致，无法拆分")
+
+    page_columns = [
+        column
+        for column in (SOURCE_COLUMN, "页码")
+        if column in validation_df and column in parse_issues_df
+    ]
+    issue_pages = (
+        pd.MultiIndex.from_frame(parse_issues_df[page_columns])
+        if page_columns and not parse_issues_df.empty
+        else None
+    )
+
+    groups = []
+    for key, positions in result_df.groupby(
+        list(split_columns),
+        sort=True,
+        dropna=False,
+    ).indices.items():
+        group_validation = validation_df.iloc[positions]
+
+        if issue_pages is None:
+            group_issues = parse_issues_df.iloc[:0]
+        else:
+            group_pages = pd.MultiIndex.from_frame(
+                group_validation[page_columns].drop_duplicates()
+            )
+            group_issues = parse_issues_df[issue_pages.isin(group_pages)]
+
+        groups.append(
+            (
+                key if isinstance(key, tuple) else (key,),
+                result_df.iloc[positions],
+                group_validation,
+                group_issues,
+            )
+        )
+
+    return groups
+
+
+def _group_file_name(key: tuple[str, ...], used_names: set[str]) -> str:
+    stem = "_".join(
+        _UNSAFE_FILE_NAME_CHARS.sub("_", str(value)).strip("._-") or "未匹配"
+        for value in key
+    )
+    file_name = f"{stem}.xlsx"
+    suffix = 2
+
+    while file_name in used_names:
+        file_name = f"{stem}_{suffix}.xlsx"
+        suffix += 1
+
+    used_names.add(file_name)
+    return file_name
+
+
+def _write_split_archive(
+    target: IO[bytes],
+    export_format: ExportFormat,
+    result_df: pd.DataFrame,
+    validation_df: pd.DataFrame,
+    parse_issues_df: pd.DataFrame,
+    workers: int,
+) -> None:
+    """
+    每个分组写一个工作簿，再按分组顺序打进同一个 ZIP。
+
+    workers 大于 1 且分组不止一个时，各分组的工作簿在进程池里同时写到临时目录；
+    ZIP 本身只能顺序写入，在当前进程完成。
+    """
+    groups = split_tables(
+        result_df,
+        validation_df,
+        parse_issues_df,
+        export_format.split_columns,
+    )
+    used_names: set[str] = set()
+
+    with (
+        tempfile.TemporaryDirectory(prefix="pick-list-split-") as directory,
+        zipfile.ZipFile(target, "w", export_format.compression) as archive,
+    ):
+        paths = [
+            (
+                os.path.join(directory, f"{index}.xlsx"),
+                _group_file_name(key, used_names),
+            )
+            for index, (key, *_) in enumerate(groups)
+        ]
+
+        if workers <= 1 or len(groups) < 2:
+            for (path, _), (_, *tables) in zip(paths, groups):
+                write_excel(path, *tables)
+        else:
+            with new_process_pool(min(workers, len(groups))) as pool:
+                futures = [
+                    pool.submit(write_excel, path, *tables)
+                    for (path, _), (_, *tables) in zip(paths, groups)
+                ]
+                for future in futures:
+                    future.result()
+
+        for path, file_name in paths:
+            archive.write(path, file_name)
+
+
+def spool_export(
+    format_key: str,
+    result_df: pd.DataFrame,
+    validation_df: pd.DataFrame,
+    parse_issues_df: pd.DataFrame,
+    workers: int = 1,
+) -> IO[bytes]:
+    """
+    按指定格式生成导出文件，返回定位在开头的临时文件对象，读完后关闭即删除。
+
+    workers 只用于拆分导出，表示同时写工作簿的进程数。
+    """
+    export_format = EXPORT_FORMATS.get(format_key)
+    if export_format is None:
+        raise ValueError(
+            f"不支持的导出格式：{format_key}（可用：{'、'.join(EXPORT_FORMATS)}）"
+        )
+
+    if export_format.write_table is None and not export_format.split_columns:
+        return spool_excel(result_df, validation_df, parse_issues_df)
+
+    spool = tempfile.SpooledTemporaryFile(
+        max_size=SPOOL_MAX_BYTES,
+        suffix=".zip",
+    )
+
+    try:
+        if export_format.split_columns:
+            _write_split_archive(
+                spool,
+                export_format,
+                result_df,
+                validation_df,
+                parse_issues_df,
+                workers,
+            )
+        else:
+            with zipfile.ZipFile(spool, "w", export_format.compression) as archive:
+                for table_name, dataframe in zip(
+                    TABLE_NAMES,
+                    (result_df, validation_df, parse_issues_df),
+                ):
+                    with archive.open(
+                        f"{table_name}{export_format.extension}",
+                        "w",
+                    ) as entry:
+                        export_format.write_table(dataframe, entry)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+
+    return spool
+
+
+def build_export(
+    format_key: str,
+    result_df: pd.DataFrame,
+    validation_df: pd.DataFrame,
+    parse_issues_df: pd.DataFrame,
+    workers: int = 1,
+) -> bytes:
+    """按指定格式生成整份导出字节，供页面下载按钮使用。"""
+    with spool_export(
+        format_key,
+        result_df,
+        validation_df,
+        parse_issues_df,
+        workers=workers,
+    ) as spool:
+        return spool.read()
@@ -0,0 +1,88 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from validation_rules import SEVERITY_COLUMN
+
+
+# 结果表每页可选的行数；页面只把当前页的行发给浏览器。
+PAGE_SIZE_OPTIONS = (50, 100, 200, 500)
+DEFAULT_PAGE_SIZE = 100
+
+
+@dataclass(frozen=True)
+class ResultQuery:
+    """
+    结果浏览的筛选和排序条件，空元组表示不按该项筛选。
+
+    提取结果和校验报告逐行对应，筛选同时作用于两张表，得到的行位置两边通用。
+    """
+
+    warehouses: tuple[str, ...] = ()
+    shops: tuple[str, ...] = ()
+    severities: tuple[str, ...] = ()
+    sort_column: str | None = None
+    descending: bool = False
+
+
+def select_rows(
+    result_df: pd.DataFrame,
+    validation_df: pd.DataFrame,
+    query: ResultQuery,
+    sort_frame: pd.DataFrame | None = None,
+) -> np.ndarray:
+    """
+    按筛选条件选出行，返回按显示顺序排列的行位置。
+
+    sort_column 取自 sort_frame（默认提取结果），稳定排序，相同取值保持原顺序，空值排在最后。
+    """
+    mask = np.ones(len(result_df), dtype=bool)
+
+    if query.warehouses:
+        mask &= result_df["发货仓库"].isin(query.warehouses).to_numpy()
+    if query.shops:
+        mask &= result_df["店铺名称"].isin(query.shops).to_numpy()
+    if query.severities and SEVERITY_COLUMN in validation_df:
+        mask &= validation_df[SEVERITY_COLUMN].isin(query.severities).to_numpy()
+
+    positions = np.flatnonzero(mask)
+
+    if query.sort_column is None:
+        return positions
+
+    sort_frame = result_df if sort_frame is None else sort_frame
+    order = (
+        sort_frame[query.sort_column]
+        .iloc[positions]
+        .reset_index(drop=True)
+        .sort_values(
+            ascending=not query.descending,
+            kind="stable",
+            na_position="last",
+        )
+        .index
+        .to_numpy()
+    )
+
+    return positions[order]
+
+
+def page_count(row_count: int, page_size: int) -> int:
+    return max((row_count + page_size - 1) // page_size, 1)
+
+
+def clamp_page(page: int, row_count: int, page_size: int) -> int:
+    """把页码限制在 1 到总页数之间；筛选后行数变少时，停在原页码可能已超出末页。"""
+    return min(max(page, 1), page_count(row_count, page_size))
+
+
+def page_rows(
+    frame: pd.DataFrame,
+    positions: np.ndarray,
+    page: int,
+    page_size: int,
+) -> pd.DataFrame:
+    """取第 page 页（从 1 开始）的行，保留原行索引，便于对照完整结果。"""
+    start = (page - 1) * page_size
+    return frame.iloc[positions[start:start + page_size]]
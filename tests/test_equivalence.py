@@ -0,0 +1,264 @@
+"""
+并行解析、页缓存必须与逐页串行解析的结果完全一致，整列匹配校验必须与逐行循环的旧实现完全一致。
+
+测试用的拣货单 PDF 由下面的最小写入器现场生成：每行文字一个文本对象，字体用
+Identity-H 编码加 ToUnicode 映射，pypdf 提取出的文本层与 WMS 拣货单相同，
+不依赖额外的 PDF 生成库。
+
+用法（在仓库根目录执行）：
+    python -m pytest tests
+"""
+import os
+import random
+import sys
+from typing import Any
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from bench_enrichment import enrich_and_validate_legacy, synthetic_records  # noqa: E402
+from enrichment import enrich_and_validate  # noqa: E402
+from page_cache import PageCache  # noqa: E402
+from pdf_text_parser import MIN_PAGES_PER_TASK, iter_pdf_pages, parse_pdf_text  # noqa: E402
+from reference_data import ReferenceIndex, load_reference_index  # noqa: E402
+from validation_rules import SEVERITY_COLUMN  # noqa: E402
+
+
+# 页数足够让 workers=2、3 时都真正分成多个进程池任务。
+PAGE_COUNT = 4 * MIN_PAGES_PER_TASK
+
+# 这些页只有表头没有明细，会走表格引擎补救，并留下“本页未提取到明细”。
+EMPTY_PAGES = (3, 17)
+
+ParseResult = tuple[list[dict[str, Any]], list[dict[str, Any]]]
+
+
+def _pdf_string(text: str) -> str:
+    # Identity-H 下每个字符两字节，字形编号直接取 Unicode 码位。
+    return "<" + text.encode("utf-16-be").hex().upper() + ">"
+
+
+def _to_unicode_cmap(characters: set[str]) -> bytes:
+    codes = sorted(
+        f"<{ord(character):04X}> <{ord(character):04X}>"
+        for character in characters
+    )
+    blocks = [
+        f"{len(codes[start:start + 100])} beginbfchar\n"
+        + "\n".join(codes[start:start + 100])
+        + "\nendbfchar"
+        for start in range(0, len(codes), 100)
+    ]
+    return (
+        "/CIDInit /ProcSet findresource begin\n"
+        "12 dict begin\nbegincmap\n"
+        "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def\n"
+        "/CMapName /Adobe-Identity-UCS def\n/CMapType 2 def\n"
+        "1 begincodespacerange\n<0000> <FFFF>\nendcodespacerange\n"
+        + "\n".join(blocks)
+        + "\nendcmap\nCMapName currentdict /CMap defineresource pop\nend\nend\n"
+    ).encode("ascii")
+
+
+def write_text_pdf(pages: list[list[str]]) -> bytes:
+    """把每页的文字行依次写成一份 A4 横向 PDF，返回整份字节。"""
+    characters = {character for lines in pages for line in lines for character in line}
+    objects: list[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",
+        b"<< /Type /Font /Subtype /Type0 /BaseFont /STSong-Light /Encoding /Identity-H"
+        b" /DescendantFonts [4 0 R] /ToUnicode 5 0 R >>",
+        b"<< /Type /Font /Subtype /CIDFontType0 /BaseFont /STSong-Light"
+        b" /CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >>"
+        b" /DW 1000 >>",
+    ]
+
+    def add_stream(data: bytes) -> None:
+        objects.append(
+            b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream"
+        )
+
+    add_stream(_to_unicode_cmap(characters))
+
+    page_ids = []
+    for lines in pages:
+        content = "\n".join(
+            f"BT /F1 10 Tf 30 {570 - 16 * index} Td {_pdf_string(line)} Tj ET"
+            for index, line in enumerate(lines)
+        )
+        add_stream(content.encode("ascii"))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 842 595]"
+            b" /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_ids.append(len(objects))
+
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids),
+        len(page_ids),
+    )
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref_offset,
+    )
+    return bytes(output)
+
+
+def pick_list_pages(
+    reference: ReferenceIndex,
+    page_count: int,
+    seed: int = 20260713,
+) -> list[list[str]]:
+    """
+    仿照 WMS 拣货单的文本层生成各页文字行。
+
+    SKU 从基础表里抽取，约一成换成基础表里没有的 SKU；EMPTY_PAGES 只有表头。
+    """
+    rnd = random.Random(seed)
+    sku_ids = list(reference.info_by_sku_id)
+    sku_codes = list(reference.name_by_sku_code)
+    attributes = ["颜色：黑色", "型号：XXL", "型号：10cm/3.94in", "风格：Type-B-with"]
+    pages = []
+
+    for page_number in range(1, page_count + 1):
+        lines = [
+            f"收货仓：华东{page_number % 3 + 1}号仓 拣货单 打印时间：2026-07-13 10:21 "
+            f"第{page_number}页/共{page_count}页",
+            "序号 商品信息 属性集 SKU ID 货号 发货数",
+        ]
+
+        if page_number in EMPTY_PAGES:
+            lines.append("本页格式异常")
+        else:
+            for skc_index in range(1, 4):
+                lines.append(f"{skc_index} SKC：{rnd.randint(10**9, 10**11)}")
+                lines.append("SKC货号：")
+                for _ in range(3):
+                    sku_id, sku_code = rnd.choice(sku_ids), rnd.choice(sku_codes)
+                    if rnd.random() < 0.1:
+                        sku_id = str(rnd.randint(10**10, 10**11))
+                        sku_code = f"ZZ{rnd.randint(10**6, 10**7)}"
+                    lines.append(
+                        f"{rnd.choice(attributes)} {sku_id} {sku_code} {rnd.randint(1, 40)}"
+                    )
+            lines.append("合计 99")
+
+        pages.append(lines)
+
+    return pages
+
+
+@pytest.fixture(scope="module")
+def reference() -> ReferenceIndex:
+    return load_reference_index(
+        os.path.join(ROOT, "product_info.xlsx"),
+        os.path.join(ROOT, "name_map.xlsx"),
+    )
+
+
+@pytest.fixture(scope="module")
+def pick_list_pdf(reference: ReferenceIndex) -> bytes:
+    return write_text_pdf(pick_list_pages(reference, PAGE_COUNT))
+
+
+@pytest.fixture(scope="module")
+def serial_result(pick_list_pdf: bytes) -> ParseResult:
+    return parse_pdf_text(pick_list_pdf, workers=1)
+
+
+def test_generated_pdf_parses(serial_result: ParseResult) -> None:
+    records, issues = serial_result
+
+    assert len(records) == (PAGE_COUNT - len(EMPTY_PAGES)) * 9
+    assert sorted({issue["页码"] for issue in issues}) == list(EMPTY_PAGES)
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_parallel_parse_matches_serial(
+    pick_list_pdf: bytes,
+    serial_result: ParseResult,
+    workers: int,
+) -> None:
+    assert parse_pdf_text(pick_list_pdf, workers=workers) == serial_result
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_page_cache_warm_run_matches_cold(
+    tmp_path,
+    pick_list_pdf: bytes,
+    serial_result: ParseResult,
+    workers: int,
+) -> None:
+    page_cache = PageCache(str(tmp_path))
+
+    cold = list(iter_pdf_pages(pick_list_pdf, workers=workers, page_cache=page_cache))
+    warm = list(iter_pdf_pages(pick_list_pdf, workers=workers, page_cache=page_cache))
+
+    assert not any(page.from_cache for page in cold)
+    assert all(page.from_cache for page in warm)
+    assert [
+        (page.page_number, page.records, page.issues, page.engine)
+        for page in warm
+    ] == [
+        (page.page_number, page.records, page.issues, page.engine)
+        for page in cold
+    ]
+    assert parse_pdf_text(
+        pick_list_pdf,
+        workers=workers,
+        page_cache=page_cache,
+    ) == serial_result
+
+
+# 每批 9 行相当于逐页调用，批数多、旧实现慢，只取较少的合成明细。
+@pytest.mark.parametrize(
+    ("batch_rows", "synthetic_rows"),
+    [(9, 300), (1000, 3000), (5000, 3000)],
+)
+@pytest.mark.parametrize("plain_dicts", [False, True])
+def test_vectorized_enrichment_matches_legacy(
+    reference: ReferenceIndex,
+    serial_result: ParseResult,
+    batch_rows: int,
+    synthetic_rows: int,
+    plain_dicts: bool,
+) -> None:
+    # 解析出的明细之外再加合成明细，覆盖 SKU ID 命中、货号降级匹配和未匹配的各种组合。
+    records = synthetic_records(reference, synthetic_rows) + serial_result[0]
+    tables = (
+        reference.info_by_sku_id,
+        reference.info_by_sku_code,
+        reference.name_by_sku_code,
+    )
+    if plain_dicts:
+        tables = tuple(dict(table) for table in tables)
+
+    for start in range(0, len(records), batch_rows):
+        batch = records[start:start + batch_rows]
+        legacy_result, legacy_validation = enrich_and_validate_legacy(
+            batch,
+            *tables,
+            first_row_number=start + 1,
+        )
+        result_df, validation_df = enrich_and_validate(
+            batch,
+            *tables,
+            first_row_number=start + 1,
+        )
+
+        assert result_df.equals(legacy_result)
+        # 新实现多出按规则级别汇总的“问题级别”列，对比时去掉。
+        assert validation_df.drop(columns=[SEVERITY_COLUMN]).equals(legacy_validation)
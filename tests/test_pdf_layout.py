@@ -0,0 +1,121 @@
+"""
+按坐标重建的表格必须与 pdfplumber extract_table 的行结构一致。
+
+测试表格用 reportlab 画出带网格线的拣货单，商品信息等单元格有多行文字，
+分别按顶端、居中、底端对齐，并有跨两行的合并单元格。
+reportlab 和 pdfplumber 都只用于对照，未安装时跳过。
+"""
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pypdf import PdfReader  # noqa: E402
+
+from pdf_layout import extract_table_rows, parse_table_page  # noqa: E402
+
+pdfplumber = pytest.importorskip("pdfplumber")
+pytest.importorskip("reportlab")
+
+from reportlab.lib.pagesizes import A4, landscape  # noqa: E402
+from reportlab.pdfbase import pdfmetrics  # noqa: E402
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont  # noqa: E402
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle  # noqa: E402
+
+
+FONT_NAME = "STSong-Light"
+
+HEADER = ["序号", "商品信息", "属性集", "SKU ID", "货号", "发货数"]
+
+# 每个 SKU 一行，商品信息和属性集的单元格里有两三行文字。
+MULTI_LINE_ROWS = [
+    ["1", "商品A\nSKC：111111", "颜色：黑色", "82866116858", "Y01048822", "26"],
+    ["2", "商品B\nSKC：222222\n第三行", "型号：XXL", "1286607093", "Y01048853", "3"],
+    ["3", "商品C\nSKC：333333", "型号：A\n第二行", "72677021834", "Y310126005", "17"],
+]
+
+# 第一个 SKC 的序号和商品信息跨两行合并，最后是合计行。
+MERGED_ROWS = [
+    ["1", "商品A\nSKC：111111", "颜色：黑色", "82866116858", "Y01048822", "26"],
+    ["", "", "颜色：白色", "82866116859", "Y01048823", "2"],
+    ["2", "商品B\nSKC：222222", "型号：A\n第二行", "72677021834", "Y310126005", "17"],
+    ["", "合计 45", "", "", "", ""],
+]
+MERGED_SPANS = [
+    ("SPAN", (0, 1), (0, 2)),
+    ("SPAN", (1, 1), (1, 2)),
+]
+
+
+def build_table_pdf(
+    rows: list[list[str]],
+    valign: str,
+    spans: list[tuple[str, tuple[int, int], tuple[int, int]]] | None = None,
+) -> bytes:
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(UnicodeCIDFont(FONT_NAME))
+
+    table = Table([HEADER] + rows)
+    table.setStyle(
+        TableStyle(
+            [
+                ("FONT", (0, 0), (-1, -1), FONT_NAME, 10),
+                ("GRID", (0, 0), (-1, -1), 0.5, "black"),
+                ("VALIGN", (0, 0), (-1, -1), valign),
+            ]
+            + (spans or [])
+        )
+    )
+
+    output = io.BytesIO()
+    SimpleDocTemplate(output, pagesize=landscape(A4)).build([table])
+    return output.getvalue()
+
+
+def plumber_rows(pdf_bytes: bytes) -> list[list[str]]:
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        return [
+            [cell or "" for cell in row]
+            for row in pdf.pages[0].extract_table()
+        ]
+
+
+@pytest.mark.parametrize("valign", ["TOP", "MIDDLE", "BOTTOM"])
+@pytest.mark.parametrize(
+    ("rows", "spans"),
+    [(MULTI_LINE_ROWS, None), (MERGED_ROWS, MERGED_SPANS)],
+    ids=["multi-line", "merged"],
+)
+def test_rows_match_pdfplumber(
+    valign: str,
+    rows: list[list[str]],
+    spans: list | None,
+) -> None:
+    pdf_bytes = build_table_pdf(rows, valign, spans)
+    expected = plumber_rows(pdf_bytes)
+
+    assert expected[1:] == rows
+    assert extract_table_rows(PdfReader(io.BytesIO(pdf_bytes)).pages[0]) == expected
+
+
+@pytest.mark.parametrize("valign", ["TOP", "MIDDLE", "BOTTOM"])
+def test_table_records_keep_their_skc(valign: str) -> None:
+    pdf_bytes = build_table_pdf(MERGED_ROWS, valign, MERGED_SPANS)
+    records, issues = parse_table_page(
+        1,
+        PdfReader(io.BytesIO(pdf_bytes)).pages[0],
+        "华东1号仓",
+    )
+
+    assert [
+        (record["SKC ID"], record["货品编码"])
+        for record in records
+    ] == [
+        ("111111", "Y01048822"),
+        ("111111", "Y01048823"),
+        ("222222", "Y310126005"),
+    ]
+    assert issues == []
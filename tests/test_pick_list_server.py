@@ -0,0 +1,117 @@
+"""
+服务在读请求体之前拒绝的请求（404、400、411、413、503），调用方必须完整收到 JSON 错误，
+而不是在上传请求体时被断开连接。
+
+服务在当前进程的线程里运行，监听随机端口；请求体远大于套接字缓冲区。
+"""
+import http.client
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pick_list_server import (  # noqa: E402
+    BoundedThreadingHTTPServer,
+    PickListRequestHandler,
+    PickListService,
+)
+
+
+MAX_UPLOAD_BYTES = 1024 * 1024
+LARGE_BODY = b"%PDF-1.4\n" + b"0" * (16 * 1024 * 1024)
+
+
+@pytest.fixture(scope="module")
+def server():
+    service = PickListService(
+        os.path.join(ROOT, "product_info.xlsx"),
+        os.path.join(ROOT, "name_map.xlsx"),
+        workers=1,
+        max_queue=0,
+        max_upload_bytes=MAX_UPLOAD_BYTES,
+    )
+    handler = type("Handler", (PickListRequestHandler,), {"service": service})
+    httpd = BoundedThreadingHTTPServer(("127.0.0.1", 0), handler, max_threads=4)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+
+    yield service, httpd.server_address[1]
+
+    httpd.shutdown()
+    httpd.server_close()
+    service.close()
+
+
+def post(
+    port: int,
+    path: str,
+    body: bytes,
+    headers: dict[str, str] | None = None,
+) -> tuple[int, dict]:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    try:
+        if headers is None:
+            connection.request("POST", path, body=body)
+        else:
+            # 自行发送请求头，可以省略 Content-Length。
+            connection.putrequest("POST", path)
+            for name, value in headers.items():
+                connection.putheader(name, value)
+            connection.endheaders()
+            connection.send(body)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+def test_oversized_upload_gets_413(server) -> None:
+    _, port = server
+    status, payload = post(port, "/extract", LARGE_BODY)
+
+    assert status == 413
+    assert "上限" in payload["error"]
+
+
+def test_unknown_format_gets_400(server) -> None:
+    _, port = server
+    status, payload = post(port, "/extract?format=docx", LARGE_BODY)
+
+    assert status == 400
+    assert "format" in payload["error"]
+
+
+def test_unknown_path_gets_404(server) -> None:
+    _, port = server
+    status, _ = post(port, "/upload", LARGE_BODY)
+
+    assert status == 404
+
+
+def test_missing_content_length_gets_411(server) -> None:
+    _, port = server
+    status, _ = post(port, "/extract", b"%PDF-1.4\n" + b"0" * 4096, headers={})
+
+    assert status == 411
+
+
+def test_full_queue_gets_503(server) -> None:
+    service, port = server
+    # 占住唯一的处理名额，排队上限为 0，下一个请求直接被拒绝。
+    assert service.admission.enter()
+    try:
+        status, payload = post(
+            port,
+            "/extract",
+            LARGE_BODY[:MAX_UPLOAD_BYTES],
+        )
+    finally:
+        service.admission.leave()
+
+    assert status == 503
+    assert "排队" in payload["error"]
@@ -0,0 +1,133 @@
+"""
+监视目录的状态文件：重启后没改动过的文件不再读取，旧版状态文件平滑升级，内容哈希按时间和条数淘汰。
+
+测试 PDF 是标题不同的空白页，内容哈希各不相同；处理结果是没有明细的工作簿。
+"""
+import io
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+from pypdf import PdfWriter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pick_list_watch  # noqa: E402
+from pick_list_watch import STATE_FILE_NAME, PickListWatcher  # noqa: E402
+
+
+def write_pdf(path: str, title: str) -> None:
+    writer = PdfWriter()
+    writer.add_blank_page(width=842, height=595)
+    writer.add_metadata({"/Title": title})
+    output = io.BytesIO()
+    writer.write(output)
+    with open(path, "wb") as handle:
+        handle.write(output.getvalue())
+
+
+def new_watcher(directory: str, monkeypatch) -> tuple[PickListWatcher, list[str]]:
+    """返回监视器和它读取并处理（计算哈希）过的文件列表。"""
+    watcher = PickListWatcher(
+        directory,
+        os.path.join(ROOT, "product_info.xlsx"),
+        os.path.join(ROOT, "name_map.xlsx"),
+        settle_seconds=0,
+    )
+    handled: list[str] = []
+    handle = watcher._handle
+
+    def spy(pdf_path, stat):
+        handled.append(os.path.basename(pdf_path))
+        return handle(pdf_path, stat)
+
+    monkeypatch.setattr(watcher, "_handle", spy)
+    return watcher, handled
+
+
+def read_state(directory: str) -> dict:
+    with open(os.path.join(directory, STATE_FILE_NAME), encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def test_restart_skips_unchanged_files_without_reading(tmp_path, monkeypatch, capsys) -> None:
+    directory = str(tmp_path)
+    write_pdf(os.path.join(directory, "a.pdf"), "a")
+    write_pdf(os.path.join(directory, "b.pdf"), "b")
+
+    watcher, handled = new_watcher(directory, monkeypatch)
+    assert watcher.poll() == 2
+    assert sorted(handled) == ["a.pdf", "b.pdf"]
+    assert sorted(read_state(directory)["files"]) == ["a.pdf", "b.pdf"]
+
+    # 重启后只有改动过的 b.pdf 被重新读取。
+    write_pdf(os.path.join(directory, "b.pdf"), "b2")
+    os.utime(os.path.join(directory, "b.pdf"), ns=(1, 1))
+    capsys.readouterr()
+
+    watcher, handled = new_watcher(directory, monkeypatch)
+    assert watcher.poll() == 1
+    assert handled == ["b.pdf"]
+    assert "跳过" not in capsys.readouterr().out
+
+
+def test_duplicate_drop_is_logged_once(tmp_path, monkeypatch, capsys) -> None:
+    directory = str(tmp_path)
+    write_pdf(os.path.join(directory, "a.pdf"), "same")
+    watcher, _ = new_watcher(directory, monkeypatch)
+    watcher.poll()
+
+    write_pdf(os.path.join(directory, "copy.pdf"), "same")
+    capsys.readouterr()
+    assert watcher.poll() == 0
+    assert "copy.pdf：内容与已处理的 a.pdf 相同，跳过" in capsys.readouterr().out
+
+    watcher, handled = new_watcher(directory, monkeypatch)
+    assert watcher.poll() == 0
+    assert handled == []
+
+
+def test_legacy_state_is_upgraded_quietly(tmp_path, monkeypatch, capsys) -> None:
+    directory = str(tmp_path)
+    write_pdf(os.path.join(directory, "a.pdf"), "a")
+    watcher, _ = new_watcher(directory, monkeypatch)
+    watcher.poll()
+
+    # 改写成旧版格式：只有内容哈希一层。
+    legacy = read_state(directory)["digests"]
+    with open(os.path.join(directory, STATE_FILE_NAME), "w", encoding="utf-8") as handle:
+        json.dump(legacy, handle)
+    capsys.readouterr()
+
+    watcher, handled = new_watcher(directory, monkeypatch)
+    assert watcher.poll() == 0
+    assert handled == ["a.pdf"]
+    assert "跳过" not in capsys.readouterr().out
+    assert list(read_state(directory)["files"]) == ["a.pdf"]
+
+
+def test_old_digests_are_aged_out(tmp_path, monkeypatch) -> None:
+    directory = str(tmp_path)
+    monkeypatch.setattr(pick_list_watch, "MAX_DIGESTS", 2)
+
+    now = datetime.now()
+    digests = {
+        f"{index:064x}": {
+            "文件": f"old{index}.pdf",
+            "输出": f"old{index}_提取结果.xlsx",
+            "处理时间": (now - timedelta(days=days)).isoformat(timespec="seconds"),
+        }
+        for index, days in enumerate([40, 3, 2, 1])
+    }
+    with open(os.path.join(directory, STATE_FILE_NAME), "w", encoding="utf-8") as handle:
+        json.dump({"version": 2, "files": {}, "digests": digests}, handle)
+
+    write_pdf(os.path.join(directory, "new.pdf"), "new")
+    watcher, _ = new_watcher(directory, monkeypatch)
+    assert watcher.poll() == 1
+
+    kept = [entry["文件"] for entry in read_state(directory)["digests"].values()]
+    assert kept == ["new.pdf", "old3.pdf"]
+
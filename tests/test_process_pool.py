@@ -0,0 +1,35 @@
+"""进程池的启动方式：导入时不做任何设置，不支持 forkserver 的平台（Windows）改用 spawn。"""
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import process_pool  # noqa: E402
+
+
+@pytest.fixture
+def fresh_context(monkeypatch):
+    monkeypatch.setattr(process_pool, "_context", None)
+
+
+def test_forkserver_preferred_when_available(fresh_context) -> None:
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        pytest.skip("当前平台不支持 forkserver")
+
+    assert process_pool.pool_context().get_start_method() == "forkserver"
+
+
+def test_spawn_without_forkserver(monkeypatch, fresh_context) -> None:
+    monkeypatch.setattr(
+        multiprocessing,
+        "get_all_start_methods",
+        lambda: ["spawn"],
+    )
+
+    assert process_pool.pool_context().get_start_method() == "spawn"
+
+    with process_pool.new_process_pool(1) as pool:
+        assert pool.submit(abs, -3).result() == 3
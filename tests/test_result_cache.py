@@ -0,0 +1,71 @@
+"""
+结果缓存按最近使用顺序淘汰：超过字节上限时从最久未用的一端逐条淘汰，单条超过上限的结果不缓存，也不挤掉已有结果。
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_cache import ResultCache  # noqa: E402
+
+
+def cached_keys(cache: ResultCache) -> list[str]:
+    """从最久未用到最近使用。"""
+    return list(cache._entries)
+
+
+def test_byte_budget_evicts_least_recently_used_first() -> None:
+    cache: ResultCache[str] = ResultCache(max_entries=10, max_bytes=100)
+    for key in "abcd":
+        assert cache.put(key, key, 25)
+
+    # 读取 a 后它变成最近使用，接下来先淘汰 b、c。
+    assert cache.get("a") == "a"
+    assert cache.put("e", "e", 40)
+
+    assert cached_keys(cache) == ["d", "a", "e"]
+    assert cache.total_bytes == 90
+    assert cache.get("b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entry_larger_than_budget_is_not_cached() -> None:
+    cache: ResultCache[str] = ResultCache(max_entries=10, max_bytes=100)
+    cache.put("a", "a", 30)
+    cache.put("b", "b", 30)
+
+    assert not cache.put("huge", "huge", 101)
+    assert cached_keys(cache) == ["a", "b"]
+    assert cache.total_bytes == 60
+
+    # 正好等于上限的结果可以缓存，其余结果全部让位。
+    assert cache.put("full", "full", 100)
+    assert cached_keys(cache) == ["full"]
+    assert cache.total_bytes == 100
+
+
+def test_replacing_key_updates_size_and_order() -> None:
+    cache: ResultCache[str] = ResultCache(max_entries=10, max_bytes=100)
+    cache.put("a", "a1", 60)
+    cache.put("b", "b", 30)
+    cache.put("a", "a2", 20)
+
+    assert cached_keys(cache) == ["b", "a"]
+    assert cache.total_bytes == 50
+    assert cache.get("a") == "a2"
+
+
+def test_entry_limit_evicts_oldest() -> None:
+    cache: ResultCache[str] = ResultCache(max_entries=2, max_bytes=100)
+    for key in "abc":
+        cache.put(key, key, 1)
+
+    assert cached_keys(cache) == ["b", "c"]
+    assert cache.total_bytes == 2
+
+
+def test_zero_entries_disables_cache() -> None:
+    cache: ResultCache[str] = ResultCache(max_entries=0, max_bytes=100)
+
+    assert not cache.put("a", "a", 1)
+    assert len(cache) == 0
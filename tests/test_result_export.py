@@ -0,0 +1,131 @@
+"""
+拆分导出的分组：解析异常跟着所在页走，一页上有几个分组的明细，这一页的异常就出现在几个分组里。
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_export import split_tables  # noqa: E402
+from validation_rules import SOURCE_COLUMN  # noqa: E402
+
+
+def tables(
+    warehouses: list,
+    pages: list[int],
+    sources: list[str] | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    result_df = pd.DataFrame(
+        {
+            "发货仓库": warehouses,
+            "发货数量": range(1, len(pages) + 1),
+        }
+    )
+    validation_df = pd.DataFrame(
+        {
+            "结果行号": range(1, len(pages) + 1),
+            "页码": pages,
+        }
+    )
+    if sources is not None:
+        result_df.insert(0, SOURCE_COLUMN, sources)
+        validation_df.insert(0, SOURCE_COLUMN, sources)
+
+    return result_df, validation_df
+
+
+def issues(pages: list[int], sources: list[str] | None = None) -> pd.DataFrame:
+    issues_df = pd.DataFrame(
+        {
+            "页码": pages,
+            "行号": ["-"] * len(pages),
+            "问题类型": [f"异常{index}" for index in range(len(pages))],
+            "原始内容": [""] * len(pages),
+        }
+    )
+    if sources is not None:
+        issues_df.insert(0, SOURCE_COLUMN, sources)
+
+    return issues_df
+
+
+def summarize(groups) -> dict[tuple, tuple[list[int], list[str]]]:
+    return {
+        key: (
+            list(validation["结果行号"]),
+            list(group_issues["问题类型"]),
+        )
+        for key, _, validation, group_issues in groups
+    }
+
+
+def test_issue_on_shared_page_goes_to_every_group() -> None:
+    result_df, validation_df = tables(
+        ["华东仓", "华南仓", "华东仓", "华南仓"],
+        [1, 1, 2, 3],
+    )
+    # 第 1 页两个仓库都有明细；第 4 页没有任何明细。
+    issues_df = issues([1, 2, 4, 1])
+
+    groups = split_tables(result_df, validation_df, issues_df, ("发货仓库",))
+
+    assert summarize(groups) == {
+        ("华东仓",): ([1, 3], ["异常0", "异常1", "异常3"]),
+        ("华南仓",): ([2, 4], ["异常0", "异常3"]),
+    }
+
+
+def test_same_page_number_in_other_file_does_not_leak() -> None:
+    result_df, validation_df = tables(
+        ["华东仓", "华南仓", "华南仓"],
+        [1, 1, 2],
+        sources=["a.pdf", "b.pdf", "a.pdf"],
+    )
+    issues_df = issues([1, 1, 2], sources=["a.pdf", "b.pdf", "b.pdf"])
+
+    groups = split_tables(result_df, validation_df, issues_df, ("发货仓库",))
+
+    assert summarize(groups) == {
+        ("华东仓",): ([1], ["异常0"]),
+        ("华南仓",): ([2, 3], ["异常1"]),
+    }
+
+
+def test_rows_taken_by_position_and_missing_keys_kept() -> None:
+    result_df, validation_df = tables(
+        ["华东仓", np.nan, "华东仓"],
+        [1, 2, 3],
+    )
+    # 两张表的索引不同，只能按行位置对应。
+    validation_df.index = [10, 20, 30]
+
+    groups = split_tables(result_df, validation_df, issues([2]), ("发货仓库",))
+    summary = summarize(groups)
+
+    assert summary[("华东仓",)] == ([1, 3], [])
+    missing = [key for key in summary if pd.isna(key[0])]
+    assert len(missing) == 1
+    assert summary[missing[0]] == ([2], ["异常0"])
+    for _, group_result, group_validation, _ in groups:
+        assert list(group_result["发货数量"]) == list(group_validation["结果行号"])
+
+
+def test_without_issues_every_group_gets_empty_table() -> None:
+    result_df, validation_df = tables(["华东仓", "华南仓"], [1, 1])
+    empty = issues([])
+
+    groups = split_tables(result_df, validation_df, empty, ("发货仓库",))
+
+    assert [len(group_issues) for *_, group_issues in groups] == [0, 0]
+    assert all(list(group_issues.columns) == list(empty.columns) for *_, group_issues in groups)
+
+
+def test_row_count_mismatch_rejected() -> None:
+    result_df, validation_df = tables(["华东仓", "华南仓"], [1, 1])
+
+    with pytest.raises(ValueError):
+        split_tables(result_df, validation_df.iloc[:1], issues([1]), ("发货仓库",))
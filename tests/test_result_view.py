@@ -0,0 +1,123 @@
+"""
+结果浏览的筛选、排序和分页：空值排在最后、相同取值保持原顺序，页码超出范围时收回到末页。
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_view import (  # noqa: E402
+    ResultQuery,
+    clamp_page,
+    page_count,
+    page_rows,
+    select_rows,
+)
+from validation_rules import (  # noqa: E402
+    PASSED,
+    SEVERITY_COLUMN,
+    SEVERITY_NOTICE,
+    SEVERITY_REVIEW,
+)
+
+
+def tables() -> tuple[pd.DataFrame, pd.DataFrame]:
+    result_df = pd.DataFrame(
+        {
+            "发货仓库": ["华东仓", "华南仓", "华东仓", "华东仓", "华南仓", "华东仓"],
+            "店铺名称": ["甲店", "甲店", "乙店", "甲店", "乙店", "乙店"],
+            "发货数量": [2, np.nan, 1, 2, np.nan, 1],
+        },
+        index=[10, 11, 12, 13, 14, 15],
+    )
+    validation_df = pd.DataFrame(
+        {
+            "结果行号": range(1, 7),
+            "商品名称": ["b", None, "a", "b", "c", None],
+            SEVERITY_COLUMN: [
+                PASSED,
+                SEVERITY_REVIEW,
+                SEVERITY_NOTICE,
+                PASSED,
+                SEVERITY_REVIEW,
+                PASSED,
+            ],
+        }
+    )
+    return result_df, validation_df
+
+
+def positions(query: ResultQuery, sort_by_validation: bool = False) -> list[int]:
+    result_df, validation_df = tables()
+    return select_rows(
+        result_df,
+        validation_df,
+        query,
+        sort_frame=validation_df if sort_by_validation else None,
+    ).tolist()
+
+
+def test_sort_keeps_ties_in_order_and_nan_last() -> None:
+    assert positions(ResultQuery(sort_column="发货数量")) == [2, 5, 0, 3, 1, 4]
+    assert positions(ResultQuery(sort_column="发货数量", descending=True)) == [0, 3, 2, 5, 1, 4]
+
+
+def test_sort_is_stable_on_many_ties() -> None:
+    values = np.random.default_rng(3).integers(0, 3, 500).astype(float)
+    values[::7] = np.nan
+    result_df = pd.DataFrame({"发货数量": values})
+    validation_df = pd.DataFrame(index=result_df.index)
+
+    for descending in (False, True):
+        order = select_rows(
+            result_df,
+            validation_df,
+            ResultQuery(sort_column="发货数量", descending=descending),
+        ).tolist()
+        expected = sorted(
+            range(len(values)),
+            key=lambda position: (
+                np.isnan(values[position]),
+                -values[position] if descending else values[position],
+                position,
+            ),
+        )
+        assert order == expected
+
+
+def test_sort_after_filter_returns_original_positions() -> None:
+    query = ResultQuery(warehouses=("华东仓",), sort_column="发货数量")
+    assert positions(query) == [2, 5, 0, 3]
+
+    query = ResultQuery(severities=(PASSED, SEVERITY_REVIEW), sort_column="商品名称")
+    assert positions(query, sort_by_validation=True) == [0, 3, 4, 1, 5]
+
+
+def test_filters_combine() -> None:
+    assert positions(ResultQuery()) == [0, 1, 2, 3, 4, 5]
+    assert positions(ResultQuery(warehouses=("华东仓",), shops=("乙店",))) == [2, 5]
+    assert positions(ResultQuery(severities=(SEVERITY_REVIEW,))) == [1, 4]
+    assert positions(ResultQuery(shops=("丙店",))) == []
+
+
+def test_page_rows_keep_original_index() -> None:
+    result_df, _ = tables()
+    order = np.array([5, 4, 3, 2, 1, 0])
+
+    assert list(page_rows(result_df, order, 1, 4).index) == [15, 14, 13, 12]
+    assert list(page_rows(result_df, order, 2, 4).index) == [11, 10]
+
+
+def test_page_count_and_clamp() -> None:
+    assert page_count(0, 50) == 1
+    assert page_count(100, 50) == 2
+    assert page_count(101, 50) == 3
+
+    # 筛选后只剩 120 行，原来停在第 5 页，应收回到末页。
+    assert clamp_page(5, 120, 50) == 3
+    assert clamp_page(2, 120, 50) == 2
+    assert clamp_page(4, 0, 50) == 1
+    assert clamp_page(0, 120, 50) == 1
@@ -0,0 +1,72 @@
+"""
+文本解析失败的页交给表格引擎时，缺 SKC ID 或货号的表格明细不能顶替文本结果。
+
+页面是空白页（文本解析必然报“本页未提取到明细”），表格引擎的输出用 monkeypatch 指定。
+"""
+import os
+import sys
+from typing import Any
+
+from pypdf import PageObject
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_text_parser  # noqa: E402
+from pdf_text_parser import ENGINE_TABLE, ENGINE_TEXT  # noqa: E402
+
+
+def table_record(skc_id: str, sku_code: str) -> dict[str, Any]:
+    return {
+        "页码": 1,
+        "发货仓库": "-",
+        "SKC ID": skc_id,
+        "SKU ID": "82866116858",
+        "货品编码": sku_code,
+        "发货数量": 3,
+        "属性集": "",
+        "原始内容": f"82866116858 {sku_code} 3".strip(),
+    }
+
+
+def parse_with_table_result(monkeypatch, records: list[dict[str, Any]]):
+    monkeypatch.setattr(
+        pdf_text_parser,
+        "parse_table_page",
+        lambda page_number, page, warehouse: (records, []),
+    )
+    return pdf_text_parser._parse_page(
+        1,
+        PageObject.create_blank_page(width=842, height=595),
+        table_fallback=True,
+    )
+
+
+def issue_types(issues: list[dict[str, Any]]) -> list[str]:
+    return [issue["问题类型"] for issue in issues]
+
+
+def test_table_rows_without_skc_keep_text_result(monkeypatch) -> None:
+    _, records, issues, engine = parse_with_table_result(
+        monkeypatch,
+        [table_record("", "Y01048822"), table_record("", "Y01048853")],
+    )
+
+    assert engine == ENGINE_TEXT
+    assert records == []
+    assert issue_types(issues) == ["未识别到发货仓库", "本页未提取到明细"]
+
+
+def test_incomplete_table_rows_become_issues(monkeypatch) -> None:
+    complete = table_record("111111", "Y01048822")
+    _, records, issues, engine = parse_with_table_result(
+        monkeypatch,
+        [complete, table_record("111111", ""), table_record("", "Y01048853")],
+    )
+
+    assert engine == ENGINE_TABLE
+    assert records == [complete]
+    assert issue_types(issues) == [
+        "未识别到发货仓库",
+        "明细字段不完整",
+        "明细字段不完整",
+    ]
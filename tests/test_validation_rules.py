@@ -0,0 +1,118 @@
+"""
+evaluate_rules 把各条规则的掩码按位打包后按组合拼文字，结果必须和逐行逐条判断一致。
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from validation_rules import (  # noqa: E402
+    PASSED,
+    RULES,
+    SEVERITY_NOTICE,
+    SEVERITY_REVIEW,
+    SOURCE_COLUMN,
+    ValidationRule,
+    evaluate_rules,
+)
+
+
+def column_rule(index: int, severity: str = SEVERITY_REVIEW) -> ValidationRule:
+    """第 index 列为 True 的行触发的规则。"""
+    return ValidationRule(f"规则{index}", lambda frame: frame[f"c{index}"], severity)
+
+
+def expected(frame: pd.DataFrame, rules: list[ValidationRule]) -> tuple[list[str], list[str]]:
+    messages = []
+    severities = []
+
+    for _, row in frame.iterrows():
+        triggered = [rule for rule in rules if row[rule.name.replace("规则", "c")]]
+        messages.append("；".join(rule.name for rule in triggered) or PASSED)
+        if any(rule.severity == SEVERITY_REVIEW for rule in triggered):
+            severities.append(SEVERITY_REVIEW)
+        elif triggered:
+            severities.append(SEVERITY_NOTICE)
+        else:
+            severities.append(PASSED)
+
+    return messages, severities
+
+
+def test_mixed_rows_match_row_by_row() -> None:
+    frame = pd.DataFrame(
+        {
+            "c0": [False, True, False, True, False, True],
+            "c1": [False, False, True, True, False, True],
+            "c2": [False, False, False, False, True, True],
+        }
+    )
+    rules = [column_rule(0), column_rule(1, SEVERITY_NOTICE), column_rule(2, SEVERITY_NOTICE)]
+
+    messages, severities = evaluate_rules(frame, rules)
+
+    assert list(messages) == [
+        PASSED,
+        "规则0",
+        "规则1",
+        "规则0；规则1",
+        "规则2",
+        "规则0；规则1；规则2",
+    ]
+    assert list(severities) == [
+        PASSED,
+        SEVERITY_REVIEW,
+        SEVERITY_NOTICE,
+        SEVERITY_REVIEW,
+        SEVERITY_NOTICE,
+        SEVERITY_REVIEW,
+    ]
+
+
+def test_all_63_bits_including_sign_bit() -> None:
+    rule_count = 63
+    rng = np.random.default_rng(7)
+    values = rng.random((200, rule_count)) < 0.3
+    # 只触发最高位、全部触发、全部不触发的行各放一行。
+    values[0] = False
+    values[0, rule_count - 1] = True
+    values[1] = True
+    values[2] = False
+    frame = pd.DataFrame(values, columns=[f"c{index}" for index in range(rule_count)])
+    rules = [
+        column_rule(index, SEVERITY_NOTICE if index % 2 else SEVERITY_REVIEW)
+        for index in range(rule_count)
+    ]
+
+    messages, severities = evaluate_rules(frame, rules)
+    expected_messages, expected_severities = expected(frame, rules)
+
+    assert list(messages) == expected_messages
+    assert list(severities) == expected_severities
+    assert messages[0] == "规则62"
+    assert messages[2] == PASSED
+
+
+def test_too_many_rules_rejected() -> None:
+    frame = pd.DataFrame({"c0": [True]})
+
+    with pytest.raises(ValueError):
+        evaluate_rules(frame, [column_rule(0)] * 64)
+
+
+def test_repeated_sku_grouped_per_source_file() -> None:
+    frame = pd.DataFrame(
+        {
+            SOURCE_COLUMN: ["a.pdf", "b.pdf", "a.pdf", "a.pdf"],
+            "SKU ID": ["1", "1", "2", "2"],
+            "页码": [1, 2, 1, 2],
+        }
+    )
+
+    messages, _ = evaluate_rules(frame, [RULES["SKU 跨页重复"]])
+
+    assert list(messages) == [PASSED, PASSED, "SKU 跨页重复", "SKU 跨页重复"]
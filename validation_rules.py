@@ -0,0 +1,199 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+import numpy as np
+import pandas as pd
+
+
+PASSED = "通过"
+SEVERITY_COLUMN = "问题级别"
+# 一次处理多份 PDF 时，三张表最前面加这一列标明每行来自哪个文件。
+SOURCE_COLUMN = "来源文件"
+
+# 需复核：行里有信息缺失或未匹配，不能直接使用；提示：数据可能有问题，值得看一眼。
+SEVERITY_REVIEW = "需复核"
+SEVERITY_NOTICE = "提示"
+_SEVERITY_ORDER = {
+    SEVERITY_NOTICE: 1,
+    SEVERITY_REVIEW: 2,
+}
+
+# 掩码矩阵按位打包成 int64，一次最多 63 条规则。
+_MAX_RULES = 63
+
+# 发货数量超过“上四分位数 + 该倍数 × 四分位距”且超过上四分位数两倍时视为异常。
+QUANTITY_OUTLIER_IQR_FACTOR = 3.0
+
+
+@dataclass(frozen=True)
+class ValidationRule:
+    """
+    一条逐行校验规则。
+
+    predicate 接收整张待校验表（结果列加 SKU ID、页码，批量时还有来源文件），
+    返回与行数等长的布尔掩码，True 表示这一行有该问题；name 即写入“校验结果”的文字。
+    """
+
+    name: str
+    predicate: Callable[[pd.DataFrame], Any]
+    severity: str = SEVERITY_REVIEW
+
+
+RULES: dict[str, ValidationRule] = {}
+
+
+def validation_rule(
+    name: str,
+    severity: str = SEVERITY_REVIEW,
+) -> Callable[[Callable[[pd.DataFrame], Any]], Callable[[pd.DataFrame], Any]]:
+    """把整列判断函数登记为校验规则；规则名不能重复。"""
+    if severity not in _SEVERITY_ORDER:
+        raise ValueError(f"未知的问题级别：{severity}")
+
+    def register(
+        predicate: Callable[[pd.DataFrame], Any],
+    ) -> Callable[[pd.DataFrame], Any]:
+        if name in RULES:
+            raise ValueError(f"校验规则重复登记：{name}")
+
+        RULES[name] = ValidationRule(name, predicate, severity)
+        return predicate
+
+    return register
+
+
+@validation_rule("发货仓库未识别")
+def _warehouse_unknown(frame: pd.DataFrame) -> pd.Series:
+    return frame["发货仓库"] == "未知"
+
+
+@validation_rule("SKC ID 缺失")
+def _skc_missing(frame: pd.DataFrame) -> pd.Series:
+    return frame["SKC ID"].isin(["", "-"])
+
+
+@validation_rule("店铺名称未匹配")
+def _shop_unmatched(frame: pd.DataFrame) -> pd.Series:
+    return frame["店铺名称"] == "-"
+
+
+@validation_rule("回收标签类别未匹配")
+def _label_unmatched(frame: pd.DataFrame) -> pd.Series:
+    return frame["回收标签类别"] == "-"
+
+
+@validation_rule("商品名称未匹配")
+def _name_unmatched(frame: pd.DataFrame) -> pd.Series:
+    return frame["商品名称"] == "-"
+
+
+@validation_rule("发货数量异常", SEVERITY_NOTICE)
+def _quantity_outlier(frame: pd.DataFrame) -> pd.Series:
+    quantities = pd.to_numeric(frame["发货数量"], errors="coerce")
+    lower, upper = quantities.quantile([0.25, 0.75])
+    threshold = max(
+        upper + QUANTITY_OUTLIER_IQR_FACTOR * (upper - lower),
+        upper * 2,
+    )
+    return quantities.isna() | (quantities <= 0) | (quantities > threshold)
+
+
+@validation_rule("SKU 跨页重复", SEVERITY_NOTICE)
+def _sku_repeated_across_pages(frame: pd.DataFrame) -> pd.Series:
+    keys = [column for column in (SOURCE_COLUMN, "SKU ID") if column in frame]
+    page_counts = frame.groupby(keys, sort=False)["页码"].transform("nunique")
+    return (page_counts > 1) & (frame["SKU ID"] != "")
+
+
+# 默认启用的规则，顺序即“校验结果”里问题的排列顺序。
+DEFAULT_RULE_NAMES = (
+    "发货仓库未识别",
+    "SKC ID 缺失",
+    "店铺名称未匹配",
+    "回收标签类别未匹配",
+    "商品名称未匹配",
+)
+OPTIONAL_RULE_NAMES = tuple(
+    name
+    for name in RULES
+    if name not in DEFAULT_RULE_NAMES
+)
+
+
+def resolve_rules(names: Iterable[str]) -> list[ValidationRule]:
+    """按名称取出规则，保持传入顺序。"""
+    rules = []
+
+    for name in names:
+        rule = RULES.get(name)
+        if rule is None:
+            raise ValueError(
+                f"未知的校验规则：{name}（可用：{'、'.join(RULES)}）"
+            )
+        rules.append(rule)
+
+    return rules
+
+
+DEFAULT_RULES = tuple(resolve_rules(DEFAULT_RULE_NAMES))
+
+
+def evaluate_rules(
+    frame: pd.DataFrame,
+    rules: Iterable[ValidationRule],
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    对整张表逐条规则求掩码，返回每行的 (校验结果文字, 问题级别)。
+
+    各条规则的掩码排成矩阵后按位打包成一个整数，相同问题组合的行共用同一段文字，
+    只为实际出现的组合拼接一次字符串。
+    """
+    rules = list(rules)
+    row_count = len(frame)
+
+    if len(rules) > _MAX_RULES:
+        raise ValueError(f"一次最多启用 {_MAX_RULES} 条校验规则")
+
+    if not rules or row_count == 0:
+        passed = np.full(row_count, PASSED, dtype=object)
+        return passed, passed.copy()
+
+    masks = np.column_stack(
+        [
+            np.asarray(rule.predicate(frame), dtype=bool)
+            for rule in rules
+        ]
+    )
+    bit_values = np.int64(1) << np.arange(len(rules), dtype=np.int64)
+    codes = masks.astype(np.int64) @ bit_values
+    unique_codes, inverse = np.unique(codes, return_inverse=True)
+
+    messages = []
+    severities = []
+    for code in unique_codes.tolist():
+        triggered = [
+            rule
+            for bit, rule in enumerate(rules)
+            if code >> bit & 1
+        ]
+        messages.append("；".join(rule.name for rule in triggered) or PASSED)
+        severities.append(
+            max(
+                (rule.severity for rule in triggered),
+                key=_SEVERITY_ORDER.__getitem__,
+                default=PASSED,
+            )
+        )
+
+    return (
+        np.array(messages, dtype=object)[inverse],
+        np.array(severities, dtype=object)[inverse],
+    )
+
+
+def needs_review(validation_df: pd.DataFrame) -> pd.Series:
+    """需要人工复核的行；只有提示级别问题的行不算。"""
+    if validation_df.empty:
+        return pd.Series(False, index=validation_df.index)
+
+    return validation_df[SEVERITY_COLUMN] == SEVERITY_REVIEW